@@ -0,0 +1,119 @@
+"""Collector benchmark and delivery check, with agents and collector on localhost.
+
+Starts a collector in this process and agent processes that submit
+synthetic results (FakeChecker) to a CollectorAgent as fast as --rate
+allows. Reports the results ingested per second and checks that every
+submitted result was ingested exactly once. With --outage the collector is
+stopped for that many seconds halfway through, so the agents have to spool
+to disk and catch up once it is back.
+
+    python benchmarks/bench_collector.py --agents 4 --targets 500 --rate 20000
+    python benchmarks/bench_collector.py --agents 2 --outage 3
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import tempfile
+import time
+
+from fake_checker import FakeChecker, fake_targets
+
+from src.core.collector import Collector, CollectorAgent, FleetStore
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_agent(index, port, targets, rate, duration, spool_dir, submitted):
+    """Agent process: submit results at `rate` per second for `duration` seconds"""
+    checker = FakeChecker(loss=0.01, error_rate=0.001, seed=index)
+    agent = CollectorAgent("127.0.0.1", port, f"agent-{index}", os.path.join(spool_dir, f"agent-{index}"),
+                           flush_interval=0.2)
+    agent.start()
+    names = fake_targets(targets)
+    count = 0
+    started = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - started
+        if elapsed >= duration:
+            break
+        # Submit in small steps to hold the rate without busy waiting
+        due = int(min(elapsed + 0.01, duration) * rate) - count
+        for _ in range(due):
+            agent.submit(checker.check(names[count % len(names)]))
+            count += 1
+        time.sleep(0.005)
+    agent.stop(timeout=30.0)
+    submitted.put(count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=4)
+    parser.add_argument("--targets", type=int, default=500, help="targets per agent")
+    parser.add_argument("--rate", type=int, default=10000, help="results per second per agent")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--outage", type=float, default=0.0, help="seconds the collector is down mid-run")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    port = free_port()
+    store = FleetStore(history_capacity=600)
+    collector = Collector(store, "127.0.0.1", port)
+    collector.start()
+
+    context = multiprocessing.get_context("spawn")
+    submitted = context.Queue()
+    with tempfile.TemporaryDirectory() as spool_dir:
+        processes = [context.Process(target=run_agent, args=(i, port, args.targets, args.rate, args.duration,
+                                                             spool_dir, submitted))
+                     for i in range(args.agents)]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+
+        if args.outage:
+            time.sleep(args.duration / 2)
+            collector.stop()
+            down_at = store.results
+            time.sleep(args.outage)
+            collector = Collector(store, "127.0.0.1", port)
+            collector.start()
+        totals = [submitted.get() for _ in processes]
+        for process in processes:
+            process.join()
+        # Agents stop once their last batch is acknowledged or spooled
+        elapsed = time.perf_counter() - started
+        collector.stop()
+        leftover = sum(len(files) for _, _, files in os.walk(spool_dir))
+
+    sent = sum(totals)
+    report = {
+        "benchmark": "collector",
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "agents": args.agents,
+        "targets_per_agent": args.targets,
+        "submitted": sent,
+        "ingested": store.results,
+        "ingested_per_second": round(store.results / elapsed, 1),
+        "lost": sent - store.results,
+        "spooled_batches_left": leftover,
+    }
+    if args.outage:
+        report["ingested_before_outage"] = down_at
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""Pipeline benchmark: probe -> stats -> history -> log -> tray/window.
+
+Synthetic results from FakeChecker are pushed through the same code paths
+the engine drives, without touching the network:
+
+- end-to-end results per second, headless (MonitorCore) and with the tray
+  and a visible main window under Qt's offscreen platform
+- per-stage cost in ns per result
+- memory growth over a long headless run, measured with tracemalloc
+
+Results are printed (or written with --output) as JSON; --compare reports the
+change against an earlier output and --max-regression turns that into a
+check that exits non-zero.
+
+    python benchmarks/bench_pipeline.py --targets 20 --loss 0.02 --output before.json
+    python benchmarks/bench_pipeline.py --targets 20 --loss 0.02 --compare before.json --max-regression 15
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from fake_checker import LATENCY_DISTRIBUTIONS, FakeChecker, fake_targets
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def write_settings(targets, log_writer_mode):
+    with open("settings.json", "w") as f:
+        json.dump({
+            "server": targets,
+            "log_writer": {"mode": log_writer_mode},
+            # Keep every stage on its normal path: no popups from synthetic loss
+            "notifications": {
+                "notify_on_disconnect": False,
+                "notify_on_reconnect": False,
+                "notify_on_poor_connection": True,
+                "poor_connection_threshold": 100000,
+                "poor_connection_loss": 100,
+            },
+        }, f)
+
+
+def make_checker(args):
+    return FakeChecker(args.latency, args.spread, args.distribution, args.loss, args.error_rate, args.seed)
+
+
+def generate(checker, targets, count):
+    results = []
+    while len(results) < count:
+        results.extend(checker.check_many(targets))
+    return results[:count]
+
+
+def per_result_ns(function, results):
+    started = time.perf_counter_ns()
+    for result in results:
+        function(result)
+    return (time.perf_counter_ns() - started) / len(results)
+
+
+def per_batch_ns(function, results, batch_size):
+    started = time.perf_counter_ns()
+    for i in range(0, len(results), batch_size):
+        function(results[i:i + batch_size])
+    return (time.perf_counter_ns() - started) / len(results)
+
+
+def bench_core(args, targets):
+    from src.core.monitor import MonitorCore
+    from src.utils.config import Config
+
+    checker = make_checker(args)
+    monitor = MonitorCore(Config())
+    metrics = {}
+
+    # End to end: generate, process, and wait for the log writer to catch up
+    started = time.perf_counter()
+    processed = 0
+    while processed < args.results:
+        for result in checker.check_many(targets):
+            monitor.dispatch_result(result)
+        processed += len(targets)
+    monitor.logger.flush()
+    metrics["core_results_per_second"] = processed / (time.perf_counter() - started)
+
+    results = generate(checker, targets, args.results)
+    metrics["probe_fake_ns"] = per_batch_ns(lambda batch: checker.check_many(targets), results, len(targets))
+    metrics["stage_stats_ns"] = per_result_ns(monitor.update_stats, results)
+    metrics["stage_history_ns"] = per_result_ns(monitor.history.record, results)
+    metrics["stage_log_ns"] = per_result_ns(monitor.logger.log_result, results)
+    started = time.perf_counter_ns()
+    monitor.logger.flush()
+    metrics["stage_log_flush_ns"] = (time.perf_counter_ns() - started) / len(results)
+    metrics["stage_quality_ns"] = per_result_ns(monitor.check_connection_quality, results)
+    metrics["stage_process_result_ns"] = per_result_ns(monitor.process_result, results)
+    monitor.logger.close()
+    return metrics
+
+
+def bench_gui(args, targets):
+    from PyQt6.QtWidgets import QApplication
+    from src.ui.monitor import NetworkMonitor
+
+    class BenchMonitor(NetworkMonitor):
+        def start(self):
+            # Results come from the benchmark, not the probe engine
+            self.engine.first_probe_at = time.monotonic()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+    checker = make_checker(args)
+    monitor = BenchMonitor()
+    window = monitor.main_window
+    window.show()
+    app.processEvents()
+    metrics = {}
+
+    # End to end through the coalescer, flushing at the configured rate
+    results = generate(checker, targets, args.results)
+    started = time.perf_counter()
+    for i, result in enumerate(results):
+        monitor.handle_result(result)
+        if i % len(targets) == len(targets) - 1:
+            app.processEvents()
+    monitor.ui_updates.flush()
+    app.processEvents()
+    monitor.logger.flush()
+    metrics["gui_results_per_second"] = len(results) / (time.perf_counter() - started)
+
+    batch = max(1, args.ui_batch)
+    metrics["stage_coalescer_submit_ns"] = per_result_ns(monitor.ui_updates.submit, results)
+    monitor.ui_updates.clear()
+    metrics["stage_tray_update_ns"] = per_batch_ns(monitor.system_tray.update_status, results, batch)
+
+    def update_window(batch_results):
+        window.update_status(batch_results)
+        app.processEvents()
+    metrics["stage_window_update_ns"] = per_batch_ns(update_window, results, batch)
+
+    started = time.perf_counter_ns()
+    window.refresh_statistics()
+    app.processEvents()
+    metrics["window_statistics_refresh_ns"] = time.perf_counter_ns() - started
+    window.hide()
+    monitor.logger.close()
+    return metrics
+
+
+def bench_memory(args, targets):
+    from src.core.monitor import MonitorCore
+    from src.utils.config import Config
+
+    checker = make_checker(args)
+    monitor = MonitorCore(Config())
+    # Warm up so lazily created per-target state is not counted as growth
+    for result in generate(checker, targets, min(args.memory_results // 10, 10000) or 1):
+        monitor.process_result(result)
+    monitor.logger.flush()
+    gc.collect()
+
+    tracemalloc.start()
+    checkpoints = []
+    step = max(1, args.memory_results // 10)
+    processed = 0
+    while processed < args.memory_results:
+        for result in generate(checker, targets, step):
+            monitor.process_result(result)
+        processed += step
+        monitor.logger.flush()
+        gc.collect()
+        checkpoints.append((processed, tracemalloc.get_traced_memory()[0]))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    monitor.logger.close()
+
+    first_results, first_bytes = checkpoints[0]
+    last_results, last_bytes = checkpoints[-1]
+    growth = (last_bytes - first_bytes) / max(1, last_results - first_results) * 1000
+    return {
+        "memory_growth_bytes_per_1k_results": growth,
+        "memory_traced_bytes": last_bytes,
+        "memory_peak_traced_bytes": peak,
+        "memory_history_bytes": monitor.history.nbytes,
+    }, checkpoints
+
+
+def compare(metrics, baseline, max_regression):
+    """Percent change per metric; higher is better only for *_per_second"""
+    changes = {}
+    regressions = []
+    for name, value in metrics.items():
+        old = baseline.get(name)
+        if not isinstance(old, (int, float)) or not isinstance(value, (int, float)) or old == 0:
+            continue
+        change = (value - old) / abs(old) * 100
+        changes[name] = change
+        worse = -change if name.endswith("_per_second") else change
+        if max_regression is not None and worse > max_regression and not name.startswith("memory_traced"):
+            regressions.append(name)
+    return changes, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", type=int, default=10)
+    parser.add_argument("--results", type=int, default=50000, help="results per throughput/stage measurement")
+    parser.add_argument("--memory-results", type=int, default=200000, help="results in the memory growth run")
+    parser.add_argument("--latency", type=float, default=20.0, help="median/mean latency in ms")
+    parser.add_argument("--spread", type=float, default=0.5, help="lognormal sigma, or ms for normal/uniform")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--loss", type=float, default=0.01, help="probability of a lost probe")
+    parser.add_argument("--error-rate", type=float, default=0.001, help="probability of a probe error")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-writer", choices=("buffered", "direct"), default="buffered")
+    parser.add_argument("--ui-batch", type=int, default=40, help="results per tray/window update")
+    parser.add_argument("--skip-gui", action="store_true", help="only run the headless stages")
+    parser.add_argument("--skip-memory", action="store_true")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="JSON output of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, help="fail if any metric is this many percent worse")
+    args = parser.parse_args()
+
+    targets = fake_targets(args.targets)
+    output = {
+        "benchmark": "pipeline",
+        "python": platform.python_version(),
+        "parameters": {key: value for key, value in vars(args).items()
+                       if key not in ("output", "compare", "max_regression")},
+        "metrics": {},
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            write_settings(targets, args.log_writer)
+            output["metrics"].update(bench_core(args, targets))
+            if not args.skip_gui:
+                output["metrics"].update(bench_gui(args, targets))
+            if not args.skip_memory:
+                memory, checkpoints = bench_memory(args, targets)
+                output["metrics"].update(memory)
+                output["memory_checkpoints"] = checkpoints
+        finally:
+            os.chdir(cwd)
+
+    failed = False
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f).get("metrics", {})
+        changes, regressions = compare(output["metrics"], baseline, args.max_regression)
+        output["change_percent"] = changes
+        if regressions:
+            print(f"Regressed by more than {args.max_regression}%: {', '.join(regressions)}", file=sys.stderr)
+            failed = True
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Probe plugin benchmark against local stand-in servers.
+
+Starts a TCP listener, a keep-alive HTTP server and a DNS responder on
+127.0.0.1, points many tcp://, dns:// and http:// targets at them and runs
+probe rounds through PluginChecker, the same way the engine does. Reports
+probes per second, the mean phase timings and how many TCP connections the
+HTTP server had to accept, once with connection pooling and once without.
+
+    python benchmarks/bench_probes.py --targets 200 --rounds 20
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.network import NetworkChecker  # noqa: E402
+from src.core.probes import DnsProbe, HttpProbe, PluginChecker, TcpProbe  # noqa: E402
+
+
+class StandInServers:
+    """TCP, HTTP and DNS servers on one background event loop"""
+
+    def __init__(self, nxdomain=("missing.test",)):
+        self.nxdomain = set(nxdomain)
+        self.http_connections = 0
+        self.http_requests = 0
+        self.dns_queries = 0
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        self.tcp_port, self.http_port, self.dns_port = asyncio.run_coroutine_threadsafe(
+            self._start(), self.loop).result()
+
+    async def _start(self):
+        self._tcp = await asyncio.start_server(self._accept, "127.0.0.1", 0, backlog=1024)
+        self._http = await asyncio.start_server(self._serve_http, "127.0.0.1", 0, backlog=1024)
+        self._dns, _ = await self.loop.create_datagram_endpoint(
+            lambda: _DnsResponder(self), local_addr=("127.0.0.1", 0))
+        return (self._tcp.sockets[0].getsockname()[1], self._http.sockets[0].getsockname()[1],
+                self._dns.get_extra_info("sockname")[1])
+
+    async def _accept(self, reader, writer):
+        writer.close()
+
+    async def _serve_http(self, reader, writer):
+        self.http_connections += 1
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                self.http_requests += 1
+                status = b"404 Not Found" if request.split(b" ", 2)[1].startswith(b"/missing") else b"200 OK"
+                writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Length: 0\r\nConnection: keep-alive\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        async def stop():
+            self._tcp.close()
+            self._http.close()
+            self._dns.close()
+        asyncio.run_coroutine_threadsafe(stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+class _DnsResponder(asyncio.DatagramProtocol):
+    def __init__(self, servers):
+        self.servers = servers
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.servers.dns_queries += 1
+        query_id = data[:2]
+        labels, position = [], 12
+        while data[position]:
+            labels.append(data[position + 1:position + 1 + data[position]].decode())
+            position += data[position] + 1
+        question = data[12:position + 5]
+        if ".".join(labels) in self.servers.nxdomain:
+            self.transport.sendto(query_id + struct.pack("!HHHHH", 0x8183, 1, 0, 0, 0) + question, addr)
+            return
+        answer = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 60, 4) + bytes([127, 0, 0, 1])
+        self.transport.sendto(query_id + struct.pack("!HHHHH", 0x8180, 1, 1, 0, 0) + question + answer, addr)
+
+
+def make_targets(servers, count):
+    targets = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            targets.append(f"tcp://127.0.0.1:{servers.tcp_port}")
+        elif kind == 1:
+            targets.append(f"dns://127.0.0.1:{servers.dns_port}/host{i}.test")
+        else:
+            targets.append(f"http://127.0.0.1:{servers.http_port}/health/{i}")
+    return targets
+
+
+def run(servers, targets, rounds, pool_size, concurrency, timeout):
+    checker = PluginChecker(NetworkChecker(), [TcpProbe(timeout), DnsProbe(timeout), HttpProbe(timeout, pool_size)],
+                            timeout)
+    servers.http_connections = servers.http_requests = 0
+    checker.check_many(targets, concurrency)  # Warm up the loop and the pool
+    connections_before = servers.http_connections
+
+    results = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        results.extend(checker.check_many(targets, concurrency))
+    elapsed = time.perf_counter() - started
+    checker.close()
+
+    phases = {}
+    for result in results:
+        for phase, value in (result.timings or {}).items():
+            phases.setdefault(phase, []).append(value)
+    failures = [result for result in results if not result.is_connected]
+    return {
+        "probes": len(results),
+        "probes_per_second": round(len(results) / elapsed, 1),
+        "round_ms": round(elapsed / rounds * 1000, 2),
+        "failures": len(failures),
+        "first_failure": failures[0].status if failures else None,
+        "http_connections": servers.http_connections - connections_before,
+        "mean_phase_ms": {phase: round(math.fsum(values) / len(values), 3) for phase, values in sorted(phases.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", type=int, default=150)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    # Every HTTP target is on the one stand-in host, so the pool needs room for all of them
+    parser.add_argument("--pool-size", type=int, default=64)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    servers = StandInServers()
+    targets = make_targets(servers, args.targets)
+    report = {
+        "targets": args.targets,
+        "rounds": args.rounds,
+        "pooled": run(servers, targets, args.rounds, args.pool_size, args.concurrency, args.timeout),
+        "unpooled": run(servers, targets, args.rounds, 0, args.concurrency, args.timeout),
+    }
+    servers.close()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
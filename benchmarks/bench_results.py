@@ -0,0 +1,131 @@
+"""Result object benchmark: memory and allocation cost of one PingResult.
+
+Builds the same synthetic outcomes (FakeChecker's mix of latencies, loss
+and errors) as the compact slotted PingResult and as the dataclass it
+replaced (LegacyPingResult below: datetime timestamp, server and status
+strings), and reports for each:
+
+- bytes per retained result, measured with tracemalloc
+- results created per second
+- generation 0 garbage collections while a ring of recent results (like the
+  connection log view) is kept and older ones are dropped
+
+    python benchmarks/bench_results.py --results 200000 --targets 500 --error-rate 0.01
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+from fake_checker import fake_targets
+
+from src.core.network import PingResult
+
+ERROR_TEXT = "[Errno 101] Network is unreachable"
+
+
+@dataclass
+class LegacyPingResult:
+    timestamp: datetime
+    server: str
+    ping_time: float
+    is_connected: bool
+    status: str
+    timings: dict = None
+    resolve_error: str = None
+
+
+def legacy_result(server, outcome, latency):
+    if outcome == 0:
+        return LegacyPingResult(datetime.now(), server, latency, True, "Connected")
+    if outcome == 1:
+        return LegacyPingResult(datetime.now(), server, float('nan'), False, "Connection Lost")
+    return LegacyPingResult(datetime.now(), server, float('nan'), False, f"Error: {ERROR_TEXT}")
+
+
+def compact_result(server, outcome, latency):
+    if outcome == 0:
+        return PingResult.connected(server, latency)
+    if outcome == 1:
+        return PingResult.lost(server)
+    return PingResult.error(server, ERROR_TEXT)
+
+
+def outcomes(count, targets, loss, error_rate, seed=1):
+    """(server, outcome, latency) draws: 0 connected, 1 lost, 2 error"""
+    draw = random.Random(seed)
+    names = fake_targets(targets)
+    plan = []
+    for i in range(count):
+        value = draw.random()
+        outcome = 2 if value < error_rate else 1 if value < error_rate + loss else 0
+        plan.append((names[i % targets], outcome, round(draw.gauss(20.0, 5.0), 2)))
+    return plan
+
+
+def bytes_per_result(factory, plan):
+    retained = [None] * len(plan)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i, (server, outcome, latency) in enumerate(plan):
+        retained[i] = factory(server, outcome, latency)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return round((after - before) / len(plan), 1)
+
+
+def churn(factory, plan, ring):
+    """Results per second and gen 0 collections with only the last `ring` results kept"""
+    recent = [None] * ring
+    gc.collect()
+    collections = gc.get_stats()[0]["collections"]
+    started = time.perf_counter()
+    for i, (server, outcome, latency) in enumerate(plan):
+        recent[i % ring] = factory(server, outcome, latency)
+    elapsed = time.perf_counter() - started
+    return round(len(plan) / elapsed, 1), gc.get_stats()[0]["collections"] - collections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=200000)
+    parser.add_argument("--targets", type=int, default=500)
+    parser.add_argument("--loss", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--ring", type=int, default=10000, help="recent results kept while measuring churn")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    plan = outcomes(args.results, args.targets, args.loss, args.error_rate)
+    report = {
+        "benchmark": "results",
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "results": args.results,
+        "targets": args.targets,
+    }
+    for name, factory in (("legacy", legacy_result), ("compact", compact_result)):
+        per_second, collections = churn(factory, plan, args.ring)
+        report[name] = {
+            "bytes_per_result": bytes_per_result(factory, plan),
+            "results_per_second": per_second,
+            "gen0_collections": collections,
+        }
+    legacy, compact = report["legacy"]["bytes_per_result"], report["compact"]["bytes_per_result"]
+    report["bytes_saved_percent"] = round((1 - compact / legacy) * 100, 1)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Sharded probing benchmark: result throughput against the number of workers.
+
+Runs the in-process ProbeEngine and then ShardedEngine with 1, 2, 4, ...
+worker processes over the same synthetic targets (FakeChecker, no network
+access) with a check interval short enough that probing is CPU bound, and
+counts the results that reach the parent process per second. Speedup and
+efficiency are relative to one worker; near-linear scaling needs as many
+free cores as workers.
+
+    python benchmarks/bench_sharding.py --targets 5000 --max-workers 8
+"""
+import argparse
+import json
+import os
+import platform
+import threading
+import time
+
+from fake_checker import FakeChecker, fake_targets
+
+from src.core.engine import ProbeEngine
+from src.core.sharding import ShardedEngine
+
+
+class BenchConfig:
+    def __init__(self, targets, interval_ms):
+        self.settings = {
+            "server": targets,
+            "check_interval": interval_ms,
+            "max_concurrency": 16,
+            "scheduler": {"adaptive": False, "jitter": 0.0},
+            "notifications": {"poor_connection_threshold": 100000},
+            "fake_checker": {"latency": 20.0, "loss": 0.01, "error_rate": 0.001},
+        }
+
+    def get_targets(self):
+        return self.settings["server"]
+
+
+def make_fake_checker(settings):
+    """Checker factory for the workers; module-level so it can be pickled"""
+    return FakeChecker(**settings.get("fake_checker", {}))
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, result):
+        with self.lock:
+            self.count += 1
+
+
+def measure(engine, counter, warmup, duration):
+    engine.start()
+    time.sleep(warmup)
+    before = counter.count
+    started = time.perf_counter()
+    time.sleep(duration)
+    received = counter.count - before
+    elapsed = time.perf_counter() - started
+    engine.stop()
+    return round(received / elapsed, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", type=int, default=5000)
+    parser.add_argument("--interval", type=int, default=100, help="check interval in ms")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds measured per run")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds before measuring, for worker startup")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    config = BenchConfig(fake_targets(args.targets), args.interval)
+    offered = args.targets * 1000 / args.interval
+
+    counter = Counter()
+    in_process = measure(ProbeEngine(make_fake_checker(config.settings), config, counter), counter,
+                         args.warmup, args.duration)
+
+    runs = []
+    workers = 1
+    while workers <= args.max_workers:
+        counter = Counter()
+        engine = ShardedEngine(config, counter, workers, checker_factory=make_fake_checker)
+        runs.append({"workers": workers, "results_per_second": measure(engine, counter, args.warmup, args.duration)})
+        workers *= 2
+    single = runs[0]["results_per_second"] or 1.0
+    for run in runs:
+        run["speedup"] = round(run["results_per_second"] / single, 2)
+        run["efficiency"] = round(run["speedup"] / run["workers"], 2)
+
+    report = {
+        "benchmark": "sharding",
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "targets": args.targets,
+        "offered_results_per_second": offered,
+        "in_process_results_per_second": in_process,
+        "sharded": runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Startup benchmark: time to tray icon and time to first probe.
+
+Each run starts a fresh interpreter with Qt's offscreen platform, builds the
+application the way src/main.py does and stops at the first probe result.
+Results are printed as JSON; --max-tray-ms and --max-probe-ms turn the run
+into a regression check that exits non-zero when a median is over budget.
+
+    python benchmarks/bench_startup.py --runs 5 --server 127.0.0.1
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(servers):
+    started = time.monotonic()
+    sys.path.insert(0, ROOT)
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    from src.ui.monitor import NetworkMonitor
+    from src.ui.splash_screen import SplashScreen
+    imported = time.monotonic()
+
+    with open("settings.json", "w") as f:
+        json.dump({"server": servers}, f)
+
+    app = QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+    splash = SplashScreen()
+    splash.show()
+    app.processEvents()
+    monitor = NetworkMonitor(progress=splash.set_step)
+    splash.close()
+
+    def poll():
+        if "first_result" in monitor.startup_times:
+            app.quit()
+    timer = QTimer()
+    timer.timeout.connect(poll)
+    timer.start(1)
+    QTimer.singleShot(10000, app.quit)
+    app.exec()
+    monitor.shutdown()
+
+    offset = monitor.startup_started - started
+    times = monitor.startup_times
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "tray_icon_ms": (offset + times["tray_icon"]) * 1000,
+        "first_probe_ms": (offset + times["first_probe"]) * 1000 if "first_probe" in times else None,
+        "first_result_ms": (offset + times["first_result"]) * 1000 if "first_result" in times else None,
+        "main_window_built": monitor.is_main_window_built,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--server", action="append", help="server to probe (default: 127.0.0.1)")
+    parser.add_argument("--max-tray-ms", type=float, help="fail if the median time to tray icon is higher")
+    parser.add_argument("--max-probe-ms", type=float, help="fail if the median time to first probe is higher")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    servers = args.server or ["127.0.0.1"]
+
+    if args.child:
+        child(servers)
+        return 0
+
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    command = [sys.executable, os.path.abspath(__file__), "--child"]
+    for server in servers:
+        command += ["--server", server]
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            output = subprocess.run(command, cwd=workdir, env=env, check=True,
+                                    capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    summary = {"benchmark": "startup", "runs": runs}
+    for key in ("import_ms", "tray_icon_ms", "first_probe_ms", "first_result_ms"):
+        values = [run[key] for run in runs if run[key] is not None]
+        summary[f"median_{key}"] = statistics.median(values) if values else None
+    print(json.dumps(summary, indent=2))
+
+    failed = False
+    if args.max_tray_ms is not None and summary["median_tray_icon_ms"] > args.max_tray_ms:
+        print(f"Time to tray icon over budget: {summary['median_tray_icon_ms']:.1f} ms", file=sys.stderr)
+        failed = True
+    if args.max_probe_ms is not None and (summary["median_first_probe_ms"] or float('inf')) > args.max_probe_ms:
+        print(f"Time to first probe over budget: {summary['median_first_probe_ms']} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Synthetic NetworkChecker for benchmarks: no network access, reproducible results."""
+import math
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.core.network import NetworkChecker, PingResult
+
+LATENCY_DISTRIBUTIONS = ("lognormal", "normal", "uniform", "constant")
+
+
+def fake_targets(count):
+    """count distinct target names in the TEST-NET-1 range"""
+    return [f"192.0.2.{i % 254 + 1}" if count <= 254 else f"target-{i}.test" for i in range(count)]
+
+
+class FakeChecker(NetworkChecker):
+    """Produces PingResults from a configurable distribution instead of probing.
+
+    latency is the median (lognormal), mean (normal), midpoint (uniform) or
+    value (constant) in ms; spread is sigma for lognormal, the standard
+    deviation in ms for normal and the half-width in ms for uniform. loss and
+    error_rate are probabilities per probe. With simulate_delay the check
+    sleeps for the generated latency, like a real probe would.
+    """
+
+    def __init__(self, latency=20.0, spread=0.5, distribution="lognormal", loss=0.0, error_rate=0.0,
+                 seed=None, simulate_delay=False):
+        super().__init__()
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency = latency
+        self.spread = spread
+        self.distribution = distribution
+        self.loss = loss
+        self.error_rate = error_rate
+        self.simulate_delay = simulate_delay
+        self.random = random.Random(seed)
+        self.checks = 0
+
+    def sample_latency(self):
+        if self.distribution == "lognormal":
+            return self.random.lognormvariate(math.log(self.latency), self.spread)
+        if self.distribution == "normal":
+            return max(0.01, self.random.gauss(self.latency, self.spread))
+        if self.distribution == "uniform":
+            return max(0.01, self.random.uniform(self.latency - self.spread, self.latency + self.spread))
+        return self.latency
+
+    def check(self, server):
+        self.checks += 1
+        draw = self.random.random()
+        if draw < self.error_rate:
+            return PingResult.error(server, "synthetic failure")
+        if draw < self.error_rate + self.loss:
+            if self.simulate_delay:
+                time.sleep(self.timeout)
+            return PingResult.lost(server)
+        latency = self.sample_latency()
+        if self.simulate_delay:
+            time.sleep(latency / 1000.0)
+        return PingResult.connected(server, round(latency, 2))
+
+    def check_many(self, servers, max_concurrency=16):
+        if self.simulate_delay:
+            return super().check_many(servers, max_concurrency)
+        return [self.check(server) for server in servers]
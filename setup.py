@@ -8,6 +8,18 @@ setup(
         'PyQt6',
         'ping3',
     ],
+    extras_require={
+        'analysis': ['numpy'],
+        'dev': ['pytest'],
+    },
+    entry_points={
+        'console_scripts': [
+            'network-monitor-headless=src.headless:main',
+            'network-monitor-report=src.core.analysis:main',
+            'network-monitor-collector=src.core.collector:main',
+            'network-monitor-store=src.utils.sqlite_store:main',
+        ],
+    },
     author="Matija Mandic",
     author_email="matija.mandic@gmail.com",
     description="Network connectivity monitoring tool",
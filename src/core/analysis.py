@@ -0,0 +1,424 @@
+"""Outage and SLA analysis over the CSV probe logs.
+
+Log segments are read in large blocks and parsed into columnar NumPy arrays
+(timestamp key, server id, float32 latency, status code), so every
+computation after parsing is vectorized. NumPy is an optional dependency
+that is only needed for this module.
+
+    python -m src.core.analysis --log network_log.csv --start "2024-12-01 00:00:00"
+"""
+import argparse
+import gzip
+import json
+import math
+import sys
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from src.core.network import StatusCode
+from src.utils.log_index import TIMESTAMP_LENGTH, list_segments, load_index, timestamp_key
+
+READ_BLOCK_SIZE = 16 * 1024 * 1024
+SECONDS_PER_DAY = 86400
+
+ProbeColumns = namedtuple("ProbeColumns", ["keys", "servers", "latencies", "codes", "server_names"])
+ProbeColumns.__doc__ = """Columnar probe data; servers are indexes into server_names"""
+
+Outage = namedtuple("Outage", ["server", "start", "end", "duration", "samples"])
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("The analysis module requires NumPy (pip install numpy)")
+
+
+def key_to_datetime(key):
+    """Inverse of timestamp_key: back to the naive local time written in the log"""
+    return datetime(1970, 1, 1) + timedelta(seconds=int(key))
+
+
+def _to_key(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        value = value.strftime("%Y-%m-%d %H:%M:%S")
+    return timestamp_key(value)
+
+
+def _gather(buf, starts, ends, width):
+    """Fixed-width 'S<width>' array of buf[start:end] slices (zero padded, truncated)"""
+    index = starts[:, None] + np.arange(width)
+    raw = np.where(index < ends[:, None], buf[np.minimum(index, len(buf) - 1)], 0).astype(np.uint8)
+    return np.ascontiguousarray(raw).view(f"S{width}").ravel()
+
+
+def _parse_timestamps(buf, starts):
+    """Vectorized timestamp_key for the lines starting at starts; returns (keys, valid mask)"""
+    raw = buf[np.minimum(starts[:, None] + np.arange(19), len(buf) - 1)].astype(np.int32)
+    valid = (raw[:, 4] == ord("-")) & (raw[:, 10] == ord(" ")) & (raw[:, 16] == ord(":"))
+    digits = raw - ord("0")
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+    hour = digits[:, 11] * 10 + digits[:, 12]
+    minute = digits[:, 14] * 10 + digits[:, 15]
+    second = digits[:, 17] * 10 + digits[:, 18]
+
+    # Days since 1970-01-01 of a proleptic Gregorian date (H. Hinnant's days_from_civil)
+    y = year - (month <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = (era * 146097 + doe - 719468).astype(np.int64)
+    return days * SECONDS_PER_DAY + hour * 3600 + minute * 60 + second, valid
+
+
+def _parse_pings(pings):
+    """float32 latencies of the ping fields (N/A is NaN), and a mask of the
+    parseable ones or None when all of them are"""
+    text = np.where(pings == b"N/A", b"nan", pings)
+    try:
+        return text.astype(np.float64).astype(np.float32), None
+    except ValueError:
+        pass
+    # Some row was truncated or edited by hand: parse row by row to find it
+    latencies = np.full(len(text), np.nan, dtype=np.float32)
+    parsed = np.ones(len(text), dtype=bool)
+    for i, value in enumerate(text):
+        try:
+            latencies[i] = float(value)
+        except ValueError:
+            parsed[i] = False
+    return latencies, parsed
+
+
+def _parse_block(block, server_table):
+    """Parse a block of complete CSV lines into column arrays.
+
+    Works on the raw bytes: line starts come from the newline positions and
+    the field boundaries from the first three commas of each line, so no
+    Python code runs per row.
+    """
+    buf = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord("\n"))
+    if not len(newlines):
+        return None
+    starts = np.concatenate(([0], newlines[:-1] + 1))
+    ends = newlines
+
+    commas = np.flatnonzero(buf == ord(","))
+    first = np.searchsorted(commas, starts + TIMESTAMP_LENGTH)
+    valid = first + 2 < len(commas)
+    first = np.minimum(first, max(len(commas) - 3, 0))
+    if len(commas) < 3:
+        return None
+    comma1, comma2, comma3 = commas[first], commas[first + 1], commas[first + 2]
+    keys, stamp_valid = _parse_timestamps(buf, starts)
+    valid &= stamp_valid & (comma1 == starts + TIMESTAMP_LENGTH) & (comma3 < ends)
+    if not valid.all():
+        keep = np.flatnonzero(valid)
+        if not len(keep):
+            return None
+        keys, ends, comma1, comma2, comma3 = keys[keep], ends[keep], comma1[keep], comma2[keep], comma3[keep]
+
+    server_width = int((comma2 - comma1).max())
+    servers, inverse = np.unique(_gather(buf, comma1 + 1, comma2, server_width), return_inverse=True)
+    ids = np.array([server_table.setdefault(s.decode(), len(server_table)) for s in servers],
+                   dtype=np.int32)
+
+    pings = _gather(buf, comma2 + 1, comma3, int((comma3 - comma2).max()))
+    latencies, parsed = _parse_pings(pings)
+
+    prefixes = _gather(buf, comma3 + 1, ends, 9)
+    codes = np.full(len(keys), StatusCode.CONNECTION_LOST, dtype=np.uint8)
+    codes[prefixes == b"Connected"] = StatusCode.CONNECTED
+    codes[(prefixes.astype("S5") == b"Error") | (prefixes.astype("S6") == b'"Error')] = StatusCode.ERROR
+    servers = ids[inverse.ravel()]
+    if parsed is not None:
+        # Rows with a malformed ping are dropped
+        if not parsed.any():
+            return None
+        keys, servers, latencies, codes = keys[parsed], servers[parsed], latencies[parsed], codes[parsed]
+    return keys, servers, latencies, codes
+
+
+def _segment_blocks(segment, offset):
+    with open(segment, "rb") as raw:
+        raw.seek(offset)
+        stream = gzip.GzipFile(fileobj=raw) if segment.endswith(".gz") else raw
+        remainder = b""
+        while True:
+            data = stream.read(READ_BLOCK_SIZE)
+            if not data:
+                break
+            data = remainder + data
+            cut = data.rfind(b"\n") + 1
+            remainder = data[cut:]
+            if cut:
+                yield data[:cut]
+        # A partially written last row is ignored
+
+
+def iter_chunks(log_file="network_log.csv", start=None, end=None, server_table=None):
+    """Yield (keys, server ids, latencies, codes) arrays, one per block read.
+
+    start/end (datetime or log timestamp string) limit the rows; indexed
+    segments outside the range are skipped and the others are entered at
+    the indexed offset.
+    """
+    require_numpy()
+    start_key, end_key = _to_key(start), _to_key(end)
+    server_table = server_table if server_table is not None else {}
+    for segment in list_segments(log_file):
+        try:
+            index = load_index(segment)
+        except OSError:
+            continue
+        if index.first_key is None:
+            continue
+        if start_key is not None and index.last_key < start_key:
+            continue
+        if end_key is not None and index.first_key >= end_key:
+            break
+        offset = index.seek_offset(start_key) if start_key is not None else 0
+        for block in _segment_blocks(segment, offset):
+            parsed = _parse_block(block, server_table)
+            if parsed is None:
+                continue
+            keys, ids, latencies, codes = parsed
+            if start_key is not None or end_key is not None:
+                mask = np.ones(len(keys), dtype=bool)
+                if start_key is not None:
+                    mask &= keys >= start_key
+                if end_key is not None:
+                    mask &= keys < end_key
+                if not mask.all():
+                    keys, ids, latencies, codes = keys[mask], ids[mask], latencies[mask], codes[mask]
+            if len(keys):
+                yield keys, ids, latencies, codes
+
+
+def load(log_file="network_log.csv", start=None, end=None):
+    """Load all matching rows into one ProbeColumns"""
+    require_numpy()
+    server_table = {}
+    chunks = list(iter_chunks(log_file, start, end, server_table))
+    names = [None] * len(server_table)
+    for name, index in server_table.items():
+        names[index] = name
+    if not chunks:
+        return ProbeColumns(np.empty(0, np.int64), np.empty(0, np.int32),
+                            np.empty(0, np.float32), np.empty(0, np.uint8), names)
+    return ProbeColumns(
+        np.concatenate([c[0] for c in chunks]),
+        np.concatenate([c[1] for c in chunks]),
+        np.concatenate([c[2] for c in chunks]),
+        np.concatenate([c[3] for c in chunks]),
+        names
+    )
+
+
+def _by_server_and_time(columns):
+    order = np.lexsort((columns.keys, columns.servers))
+    return columns.keys[order], columns.servers[order], columns.codes[order]
+
+
+def outages(columns):
+    """Outage intervals: runs of non-Connected samples per server.
+
+    An outage starts at its first failed sample and ends at the next
+    successful sample (or the last failed one if it is still ongoing).
+    """
+    keys, servers, codes = _by_server_and_time(columns)
+    if not len(keys):
+        return []
+    down = codes != StatusCode.CONNECTED
+    new_group = np.empty(len(keys), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = servers[1:] != servers[:-1]
+
+    previous_down = np.empty(len(keys), dtype=bool)
+    previous_down[0] = False
+    previous_down[1:] = down[:-1]
+    previous_down[new_group] = False
+    starts = np.flatnonzero(down & ~previous_down)
+
+    next_down = np.empty(len(keys), dtype=bool)
+    next_down[-1] = False
+    next_down[:-1] = down[1:]
+    last_in_group = np.empty(len(keys), dtype=bool)
+    last_in_group[-1] = True
+    last_in_group[:-1] = new_group[1:]
+    next_down[last_in_group] = False
+    ends = np.flatnonzero(down & ~next_down)
+
+    # The outage is over at the following sample of the same server, if any
+    recovered = ~last_in_group[ends]
+    end_keys = np.where(recovered, keys[np.minimum(ends + 1, len(keys) - 1)], keys[ends])
+    durations = end_keys - keys[starts]
+    samples = ends - starts + 1
+    return [
+        Outage(columns.server_names[servers[s]], key_to_datetime(keys[s]), key_to_datetime(e), int(d), int(n))
+        for s, e, d, n in zip(starts, end_keys, durations, samples)
+    ]
+
+
+def reliability(columns, outage_list=None):
+    """Per server: observed time, downtime, outage count, MTTR and MTBF in seconds.
+
+    outage_list is outages(columns), when the caller already has it.
+    """
+    if outage_list is None:
+        outage_list = outages(columns)
+    keys, servers, _ = _by_server_and_time(columns)
+    if not len(keys):
+        return {}
+    size = len(columns.server_names)
+    server_ids = {name: i for i, name in enumerate(columns.server_names)}
+    outage_servers = np.fromiter((server_ids[o.server] for o in outage_list), dtype=np.int64,
+                                 count=len(outage_list))
+    durations = np.fromiter((o.duration for o in outage_list), dtype=np.int64, count=len(outage_list))
+    downtimes = np.bincount(outage_servers, weights=durations, minlength=size)
+    counts = np.bincount(outage_servers, minlength=size)
+    # Rows are grouped by server: observed time runs from a group's first to its last key
+    firsts = np.flatnonzero(np.concatenate(([True], servers[1:] != servers[:-1])))
+    lasts = np.append(firsts[1:] - 1, len(keys) - 1)
+
+    results = {}
+    for first, last in zip(firsts, lasts):
+        server_id = servers[first]
+        observed = int(keys[last] - keys[first])
+        downtime = int(downtimes[server_id])
+        count = int(counts[server_id])
+        results[columns.server_names[server_id]] = {
+            "observed_seconds": observed,
+            "downtime_seconds": downtime,
+            "outages": count,
+            "mttr_seconds": downtime / count if count else math.nan,
+            "mtbf_seconds": (observed - downtime) / count if count else math.nan,
+        }
+    return results
+
+
+def daily_availability(columns):
+    """Fraction of successful probes per server per day: {server: {date: availability}}"""
+    if not len(columns.keys):
+        return {}
+    days = columns.keys // SECONDS_PER_DAY
+    first_day = int(days.min())
+    day_index = days - first_day
+    day_count = int(day_index.max()) + 1
+    combined = columns.servers.astype(np.int64) * day_count + day_index
+    size = len(columns.server_names) * day_count
+    total = np.bincount(combined, minlength=size)
+    up = np.bincount(combined, weights=(columns.codes == StatusCode.CONNECTED), minlength=size)
+
+    results = {}
+    for server_id, name in enumerate(columns.server_names):
+        row = {}
+        for day in range(day_count):
+            slot = server_id * day_count + day
+            if total[slot]:
+                date = key_to_datetime((first_day + day) * SECONDS_PER_DAY).date()
+                row[date] = float(up[slot] / total[slot])
+        results[name] = row
+    return results
+
+
+def latency_distribution(columns, percentiles=(50, 90, 95, 99, 99.9), bins=50):
+    """Per server latency percentiles and a log-spaced histogram of answered probes"""
+    results = {}
+    answered = ~np.isnan(columns.latencies)
+    for server_id, name in enumerate(columns.server_names):
+        latencies = columns.latencies[(columns.servers == server_id) & answered].astype(np.float64)
+        if not len(latencies):
+            results[name] = {"count": 0}
+            continue
+        low = max(float(latencies.min()), 0.01)
+        high = max(float(latencies.max()), low * 1.01)
+        counts, edges = np.histogram(latencies, bins=np.geomspace(low, high, bins + 1))
+        values = np.percentile(latencies, percentiles)
+        results[name] = {
+            "count": int(len(latencies)),
+            "mean": float(latencies.mean()),
+            "percentiles": {f"p{p:g}": float(v) for p, v in zip(percentiles, values)},
+            "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+        }
+    return results
+
+
+def report(columns):
+    """All analyses in one JSON-friendly dict"""
+    availability = daily_availability(columns)
+    outage_list = outages(columns)
+    return {
+        "rows": int(len(columns.keys)),
+        "reliability": reliability(columns, outage_list),
+        "availability": {server: {str(day): value for day, value in days.items()}
+                         for server, days in availability.items()},
+        "latency": latency_distribution(columns),
+        "outages": [
+            {"server": o.server, "start": str(o.start), "end": str(o.end),
+             "duration_seconds": o.duration, "samples": o.samples}
+            for o in outage_list
+        ],
+    }
+
+
+def format_duration(seconds):
+    if seconds is None or (isinstance(seconds, float) and math.isnan(seconds)):
+        return "n/a"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def format_report(data, max_outages=20):
+    lines = [f"Rows analysed: {data['rows']}", ""]
+    for server, stats in data["reliability"].items():
+        latency = data["latency"].get(server, {})
+        percentiles = latency.get("percentiles", {})
+        lines.append(f"{server}")
+        lines.append(f"  outages: {stats['outages']}  downtime: {format_duration(stats['downtime_seconds'])}"
+                     f"  MTTR: {format_duration(stats['mttr_seconds'])}"
+                     f"  MTBF: {format_duration(stats['mtbf_seconds'])}")
+        if percentiles:
+            lines.append("  latency: " + "  ".join(f"{name} {value:.1f}ms" for name, value in percentiles.items()))
+        for day, value in data["availability"].get(server, {}).items():
+            lines.append(f"  {day}: {value * 100:.3f}% available")
+        lines.append("")
+    if data["outages"]:
+        lines.append(f"Longest outages (of {len(data['outages'])}):")
+        for outage in sorted(data["outages"], key=lambda o: -o["duration_seconds"])[:max_outages]:
+            lines.append(f"  {outage['server']}: {outage['start']} -> {outage['end']}"
+                         f" ({format_duration(outage['duration_seconds'])})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Outage and SLA report from Network Monitor logs")
+    parser.add_argument("--log", default="network_log.csv", help="active log file (rotated segments are included)")
+    parser.add_argument("--start", help='first timestamp, e.g. "2024-12-01 00:00:00"')
+    parser.add_argument("--end", help="timestamp to stop before")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        columns = load(args.log, args.start, args.end)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    data = report(columns)
+    print(json.dumps(data, indent=2) if args.json else format_report(data))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
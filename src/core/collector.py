@@ -0,0 +1,611 @@
+"""Agent -> collector protocol, the agent side and the collector.
+
+Agents ship their results to a collector over TCP; the collector keeps
+per-agent, per-target history and statistics and streams fleet snapshots
+to viewers (the Fleet tab of the main window).
+
+Every message is a frame: FRAME (type, payload length) and the payload.
+
+    HELLO     agent or viewer -> collector  JSON {"agent": name, "version": n} or {"viewer": true, ...}
+    BATCH     agent -> collector            zlib(BATCH_ID + names table + result batch)
+    ACK       collector -> agent            BATCH_ID of the ingested batch
+    SNAPSHOT  collector -> viewer           zlib(JSON fleet snapshot)
+
+A result batch is the packed format of src.core.sharding, with target
+indexes into the batch's own names table. BATCH_ID is (session, sequence):
+a session is one run of an agent, and sequences within it only grow, so a
+batch resent after a lost ACK is ingested once.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import select
+import socket
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+from src.core.history import HistoryStore
+from src.core.sharding import decode_batch, encode_batch
+from src.core.stats import TargetStats
+from src.utils.metrics import Metrics
+
+PROTOCOL_VERSION = 1
+FRAME = struct.Struct("!BI")
+BATCH_ID = struct.Struct("!QQ")
+NAMES_LENGTH = struct.Struct("!I")
+HELLO, BATCH, ACK, SNAPSHOT = 1, 2, 3, 4
+MAX_FRAME = 64 * 1024 * 1024
+SPOOL_SUFFIX = ".batch"
+# Seconds one connection attempt to the collector may take
+CONNECT_TIMEOUT = 2.0
+
+
+def encode_agent_batch(session, sequence, results):
+    names = list(dict.fromkeys(result.server for result in results))
+    indexes = {name: i for i, name in enumerate(names)}
+    names_blob = "\0".join(names).encode()
+    body = (BATCH_ID.pack(session, sequence) + NAMES_LENGTH.pack(len(names_blob)) + names_blob +
+            encode_batch(0, [indexes[result.server] for result in results], results))
+    # The fastest level already shrinks the records several times
+    return zlib.compress(body, 1)
+
+
+def decode_agent_batch(payload):
+    """(session, sequence, results) of a BATCH payload"""
+    body = zlib.decompress(payload)
+    session, sequence = BATCH_ID.unpack_from(body)
+    offset = BATCH_ID.size
+    (length,) = NAMES_LENGTH.unpack_from(body, offset)
+    offset += NAMES_LENGTH.size
+    names = body[offset:offset + length].decode().split("\0")
+    return session, sequence, decode_batch(body[offset + length:], names)
+
+
+def batch_id(payload):
+    """(session, sequence) of a BATCH payload, without decompressing the results"""
+    return BATCH_ID.unpack(zlib.decompressobj().decompress(payload, BATCH_ID.size))
+
+
+def send_frame(sock, kind, payload):
+    sock.sendall(FRAME.pack(kind, len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionResetError("Connection closed by peer")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    kind, length = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    if length > MAX_FRAME:
+        raise ConnectionError(f"Frame of {length} bytes is too large")
+    return kind, _recv_exact(sock, length)
+
+
+class CollectorAgent:
+    """Sends results to a collector in compressed batches from a background thread.
+
+    submit() only appends to a list, so it never blocks the pipeline. Every
+    batch_rows results or flush_interval seconds the rows become a batch.
+    At most max_in_flight batches are sent without an ACK; the rest wait in
+    memory, and beyond max_queued batches (or while the collector cannot be
+    reached) the oldest are written to spool_dir. Spooled batches, including
+    those left by an earlier run, are sent first once the collector is back,
+    so each agent's results arrive in order. The spool is capped at
+    max_spool_mb; the oldest batches are dropped beyond that.
+    """
+
+    def __init__(self, host, port, name=None, spool_dir="spool", batch_rows=500, flush_interval=1.0,
+                 max_in_flight=8, max_queued=32, max_spool_mb=100, metrics=None):
+        self.host = host
+        self.port = port
+        self.name = name or socket.gethostname()
+        self.spool_dir = spool_dir
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_spool_bytes = max_spool_mb * 1024 * 1024
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.session = random.getrandbits(63)
+        self._sequence = 0
+        self._rows = []
+        self._lock = threading.Lock()
+        # Batches waiting to be sent: (payload, spool path or None)
+        self._queued = deque()
+        self._spool = deque()
+        self._spool_bytes = 0
+        # Sent, unacknowledged batches: (payload, spool path or None, BATCH_ID)
+        self._in_flight = deque()
+        self._sock = None
+        self._retry_at = 0.0
+        self._backoff = 1.0
+        self._stopped = threading.Event()
+        self._stop_timeout = 2.0
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.metrics.gauge("agent_queued_batches", lambda: len(self._queued) + len(self._spool))
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        for name in sorted(os.listdir(self.spool_dir)):
+            if name.endswith(SPOOL_SUFFIX):
+                path = os.path.join(self.spool_dir, name)
+                self._spool.append(path)
+                self._spool_bytes += os.path.getsize(path)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="CollectorAgent", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Deliver what can be delivered within timeout and spool the rest"""
+        if self._thread is None:
+            self._finish(timeout)
+            return
+        # The worker thread finishes by itself, so only it ever touches the
+        # socket, the batches and the spool
+        self._stop_timeout = timeout
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout + CONNECT_TIMEOUT + 1.0)
+        if self._thread.is_alive():
+            print(f"Collector agent is still finishing after {timeout}s; leaving it to spool in the background")
+        self._thread = None
+
+    def submit(self, result):
+        with self._lock:
+            self._rows.append(result)
+            full = len(self._rows) >= self.batch_rows
+        if full:
+            self._wakeup.set()
+
+    def _cut_batch(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if rows:
+            self._sequence += 1
+            self._queued.append((encode_agent_batch(self.session, self._sequence, rows), None))
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            if now >= next_flush or len(self._rows) >= self.batch_rows:
+                self._cut_batch()
+                next_flush = now + self.flush_interval
+            if self._sock is None and now >= self._retry_at:
+                self._connect()
+            if self._sock is not None:
+                self._pump(max(0.0, min(next_flush - time.monotonic(), 0.2)))
+            else:
+                self._wakeup.wait(max(0.0, min(next_flush, self._retry_at) - time.monotonic()))
+                self._wakeup.clear()
+            self._spill()
+        self._finish(self._stop_timeout)
+
+    def _finish(self, timeout):
+        self._cut_batch()
+        deadline = time.monotonic() + timeout
+        while self._in_flight or self._queued or self._spool:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if self._sock is None:
+                if now < self._retry_at:
+                    time.sleep(min(self._retry_at, deadline) - now)
+                    continue
+                self._connect(max(0.1, min(CONNECT_TIMEOUT, deadline - now)))
+                continue
+            self._pump(min(deadline - now, 0.2))
+        if self._sock is not None:
+            self._disconnect()
+        # Nothing is lost on exit: every unacknowledged batch goes to the spool
+        self.max_queued = 0
+        self._spill()
+
+    def _connect(self, timeout=CONNECT_TIMEOUT):
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=timeout)
+            send_frame(sock, HELLO, json.dumps({"agent": self.name, "version": PROTOCOL_VERSION}).encode())
+        except OSError:
+            self._retry_at = time.monotonic() + self._backoff
+            self._backoff = min(self._backoff * 2, 30.0)
+            return
+        sock.settimeout(10.0)
+        self._sock = sock
+        self._backoff = 1.0
+
+    def _disconnect(self):
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        self._sock = None
+        self._retry_at = time.monotonic() + self._backoff
+        # Unacknowledged batches go back in front, in their original order
+        while self._in_flight:
+            payload, path, _ = self._in_flight.pop()
+            if path is not None:
+                self._spool.appendleft(path)
+            else:
+                self._queued.appendleft((payload, None))
+
+    def _next_batch(self):
+        """Oldest unsent batch: spooled ones first, then those in memory"""
+        while self._spool:
+            path = self._spool.popleft()
+            try:
+                with open(path, "rb") as f:
+                    return f.read(), path
+            except OSError:
+                continue  # Dropped to stay under the spool cap
+        if self._queued:
+            return self._queued.popleft()
+        return None
+
+    def _pump(self, wait):
+        """Send up to the window, then read ACKs for at most `wait` seconds"""
+        try:
+            while len(self._in_flight) < self.max_in_flight:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                self._in_flight.append(batch + (batch_id(batch[0]),))
+                send_frame(self._sock, BATCH, batch[0])
+                self.metrics.increment("agent_batches_sent")
+            if not self._in_flight:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                return
+            readable, _, _ = select.select([self._sock], [], [], wait)
+            while readable and self._in_flight:
+                kind, payload = recv_frame(self._sock)
+                if kind == ACK:
+                    self._acknowledge(BATCH_ID.unpack(payload))
+                readable, _, _ = select.select([self._sock], [], [], 0)
+        except (OSError, struct.error):
+            self._disconnect()
+
+    def _acknowledge(self, acked):
+        """Retire the in-flight batch an ACK names; ACKs of no batch in flight are ignored"""
+        for index, (_, path, sent) in enumerate(self._in_flight):
+            if sent == acked:
+                del self._in_flight[index]
+                if path is not None:
+                    self._remove_spooled(path)
+                return
+        self.metrics.increment("agent_stale_acks")
+
+    def _spill(self):
+        """Move the oldest in-memory batches to the spool beyond max_queued"""
+        limit = self.max_queued if self._sock is not None else 0
+        while len(self._queued) > limit:
+            payload, _ = self._queued.popleft()
+            path = os.path.join(self.spool_dir, f"{time.time_ns():020d}{SPOOL_SUFFIX}")
+            try:
+                with open(path, "wb") as f:
+                    f.write(payload)
+            except OSError:
+                self.metrics.increment("agent_batches_dropped")
+                continue
+            self._spool.append(path)
+            self._spool_bytes += len(payload)
+            self.metrics.increment("agent_batches_spooled")
+        while self._spool_bytes > self.max_spool_bytes and len(self._spool) > 1:
+            self._remove_spooled(self._spool.popleft())
+            self.metrics.increment("agent_batches_dropped")
+
+    def _remove_spooled(self, path):
+        try:
+            self._spool_bytes -= os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class AgentState:
+    """What the collector knows about one agent"""
+
+    def __init__(self, name, history_capacity, pyramid):
+        self.name = name
+        self.address = None
+        self.connected = False
+        self.last_seen = None
+        self.results = 0
+        self.sessions = {}  # session -> last ingested sequence
+        self.stats = {}
+        self.history = HistoryStore(history_capacity, pyramid)
+        self.last_results = {}
+
+
+class FleetStore:
+    """Per-agent, per-target history and statistics at the collector.
+
+    Results are placed on this process's monotonic timeline by their wall
+    timestamps, so late (spooled) batches land where they belong.
+    """
+
+    def __init__(self, history_capacity=3600, pyramid=False):
+        self.history_capacity = history_capacity
+        self.pyramid = pyramid
+        self.agents = {}
+        self.results = 0
+        self._lock = threading.Lock()
+
+    def agent(self, name):
+        state = self.agents.get(name)
+        if state is None:
+            state = self.agents[name] = AgentState(name, self.history_capacity, self.pyramid)
+        return state
+
+    def ingest(self, name, session, sequence, results):
+        """Add a batch unless it was already ingested; returns whether it was new"""
+        with self._lock:
+            state = self.agent(name)
+            if sequence <= state.sessions.get(session, 0):
+                return False
+            state.sessions[session] = sequence
+            stats = state.stats
+            for result in results:
+                # decode_batch already placed the agent's wall clock times on our monotonic clock
+                timestamp = result.monotonic_ns / 1e9
+                target = stats.get(result.server)
+                if target is None:
+                    target = stats[result.server] = TargetStats()
+                target.update(result, timestamp)
+                state.history.record(result, timestamp)
+                state.last_results[result.server] = result
+            state.results += len(results)
+            state.last_seen = time.time()
+            self.results += len(results)
+        return True
+
+    def set_connected(self, name, address, connected):
+        with self._lock:
+            state = self.agent(name)
+            state.connected = connected
+            state.address = address
+            state.last_seen = time.time()
+
+    def snapshot(self):
+        """Fleet status as plain data; percentiles are left out to keep it cheap"""
+        now = time.monotonic()
+        with self._lock:
+            agents = []
+            for state in self.agents.values():
+                targets = []
+                for server, stats in state.stats.items():
+                    result = state.last_results[server]
+                    targets.append({
+                        "target": server,
+                        "status": result.status,
+                        "connected": result.is_connected,
+                        "ping": result.ping_time,
+                        "timestamp": result.wall_time,
+                        "ewma": stats.ewma,
+                        "jitter": stats.jitter,
+                        "loss_1m": stats.loss("1m", now),
+                        "loss_1h": stats.loss("1h", now),
+                        "checks": stats.total_checks,
+                        "failures": stats.failures,
+                    })
+                agents.append({
+                    "agent": state.name,
+                    "address": state.address,
+                    "connected": state.connected,
+                    "last_seen": state.last_seen,
+                    "results": state.results,
+                    "targets": targets,
+                })
+        return {"time": time.time(), "results": self.results, "agents": agents}
+
+
+class Collector:
+    """TCP server that ingests agent batches into a FleetStore and streams
+    snapshots to viewers, on its own event loop thread.
+
+    Batches are ingested in arrival order and acknowledged afterwards; an
+    agent that sends faster than the collector ingests is slowed down by its
+    ACK window and by TCP flow control.
+    """
+
+    def __init__(self, store=None, host="127.0.0.1", port=9470, snapshot_interval=1.0):
+        self.store = store if store is not None else FleetStore()
+        self.host = host
+        self.port = port
+        self.snapshot_interval = snapshot_interval
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._handlers = set()
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()[:2] if self._server is not None else None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="Collector", daemon=True)
+        self._thread.start()
+        try:
+            self._server = asyncio.run_coroutine_threadsafe(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=1024), self._loop).result()
+        except OSError:
+            self.stop()
+            raise
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def close():
+            if self._server is not None:
+                self._server.close()
+            # Closing the connections ends their handlers at the next read
+            for writer in list(self._handlers):
+                writer.close()
+            if self._handlers:
+                await asyncio.sleep(0.1)
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result(5.0)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5.0)
+        self._loop.close()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @staticmethod
+    async def _read_frame(reader):
+        kind, length = FRAME.unpack(await reader.readexactly(FRAME.size))
+        if length > MAX_FRAME:
+            raise ConnectionError(f"Frame of {length} bytes is too large")
+        return kind, await reader.readexactly(length)
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        address = f"{peer[0]}:{peer[1]}" if peer else None
+        name = None
+        self._handlers.add(writer)
+        try:
+            kind, payload = await self._read_frame(reader)
+            hello = json.loads(payload) if kind == HELLO else {}
+            if hello.get("viewer"):
+                await self._serve_viewer(reader, writer)
+                return
+            name = hello.get("agent")
+            if not name:
+                return
+            self.store.set_connected(name, address, True)
+            while True:
+                kind, payload = await self._read_frame(reader)
+                if kind != BATCH:
+                    break
+                session, sequence, results = decode_agent_batch(payload)
+                self.store.ingest(name, session, sequence, results)
+                writer.write(FRAME.pack(ACK, BATCH_ID.size) + BATCH_ID.pack(session, sequence))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, zlib.error, struct.error):
+            pass
+        finally:
+            if name:
+                self.store.set_connected(name, address, False)
+            self._handlers.discard(writer)
+            writer.close()
+
+    async def _serve_viewer(self, reader, writer):
+        # Viewers never send anything after HELLO; EOF means they left
+        closed = asyncio.ensure_future(reader.read())
+        try:
+            while not closed.done():
+                payload = zlib.compress(json.dumps(self.store.snapshot()).encode())
+                writer.write(FRAME.pack(SNAPSHOT, len(payload)) + payload)
+                await writer.drain()
+                await asyncio.wait([closed], timeout=self.snapshot_interval)
+        finally:
+            closed.cancel()
+
+
+class FleetClient:
+    """Viewer connection to a collector; calls on_snapshot(snapshot) from its
+    own thread for every snapshot, and on_snapshot(exception) when the
+    connection fails. The client reconnects until it is stopped."""
+
+    def __init__(self, host, port, on_snapshot):
+        self.host = host
+        self.port = port
+        self.on_snapshot = on_snapshot
+        self._sock = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="FleetClient", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                with socket.create_connection((self.host, self.port), timeout=5.0) as sock:
+                    self._sock = sock
+                    sock.settimeout(None)
+                    send_frame(sock, HELLO, json.dumps({"viewer": True, "version": PROTOCOL_VERSION}).encode())
+                    while not self._stopped.is_set():
+                        kind, payload = recv_frame(sock)
+                        if kind == SNAPSHOT:
+                            self.on_snapshot(json.loads(zlib.decompress(payload)))
+            except (OSError, ValueError, zlib.error, struct.error) as e:
+                if not self._stopped.is_set():
+                    self.on_snapshot(e)
+            finally:
+                self._sock = None
+            self._stopped.wait(2.0)
+
+
+def main(argv=None):
+    """Run a collector until interrupted, printing the ingest rate"""
+    parser = argparse.ArgumentParser(description="Network Monitor collector")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=9470)
+    parser.add_argument("--history", type=int, default=3600, help="results kept per agent and target")
+    parser.add_argument("--pyramid", action="store_true", help="also keep long-range latency aggregates")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="seconds between rate reports")
+    args = parser.parse_args(argv)
+
+    collector = Collector(FleetStore(args.history, args.pyramid), args.host, args.port)
+    collector.start()
+    print(f"Collector listening on {collector.address[0]}:{collector.address[1]}")
+    last = 0
+    try:
+        while True:
+            time.sleep(args.report_interval)
+            store = collector.store
+            connected = sum(1 for agent in list(store.agents.values()) if agent.connected)
+            rate = (store.results - last) / args.report_interval
+            last = store.results
+            print(f"{connected}/{len(store.agents)} agents connected, {math.floor(rate)} results/s, "
+                  f"{store.results} total")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
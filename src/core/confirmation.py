@@ -0,0 +1,256 @@
+"""Outage confirmation: decide up/down from a burst of probes instead of one.
+
+A single lost packet used to flip a target to "Connection Lost" and raise a
+notification, while a real outage was only reported after one full probe
+timeout. Now the first failure marks the target suspect and fires a short
+parallel burst at it: the target itself `burst_size` times plus any
+alternative paths configured for it (another probe type or address of the
+same service). The target is declared down when at least `quorum` of the
+burst failed. Otherwise it was a false alarm and stays up.
+
+Burst probes open fresh connections, so their timeout follows the target:
+BURST_TIMEOUT_FACTOR times its recent p99 latency, at least `timeout` (a few
+hundred ms) and at most the regular probe timeout, which is also used while
+a target has no recent latency. A slow or distant target is not declared
+down just because a burst could not finish a handshake in a fixed time.
+
+Recovery uses hysteresis: a down target is only declared up again after
+`recover_after` consecutive successful probes, so a flapping link does not
+raise a notification per probe.
+
+Bursts for every target that turns suspect at the same time run as one
+round on the confirmation thread, so a full network outage is confirmed for
+all targets at once.
+"""
+import math
+import threading
+import time
+
+from src.core.network import create_checker
+from src.utils.metrics import Metrics
+
+UNKNOWN, UP, SUSPECT, DOWN = "unknown", "up", "suspect", "down"
+# Cap on probes in flight during a burst round
+BURST_CONCURRENCY = 64
+# Burst probe timeout as a multiple of the target's recent p99 latency; covers
+# the handshakes of a new connection
+BURST_TIMEOUT_FACTOR = 4
+
+
+class _TargetState:
+    __slots__ = ("state", "successes", "suspect_at", "last_up_at")
+
+    def __init__(self):
+        self.state = UNKNOWN
+        # Consecutive successes while down
+        self.successes = 0
+        # Monotonic ns of the failure that started the pending burst
+        self.suspect_at = 0
+        # Monotonic ns of the last successful probe
+        self.last_up_at = 0
+
+
+class ConfirmationEngine:
+    """Tracks the confirmed state of every target.
+
+    observe() takes every regular result on the thread that processes
+    results; on_change(server, down, result) is called when a target is
+    confirmed down or up, either from observe() or from the confirmation
+    thread. `result` is the probe result that settled it: the last of the
+    recovering probes, or the first failed probe of a confirming burst.
+
+    Metrics: confirmation_burst (burst duration), time_to_detect (last
+    successful probe to confirmed down, an upper bound of detection time),
+    the confirmations_started/_down/_refuted counters and the
+    confirmation_false_positive_rate gauge: the share of first failures a
+    single probe would have reported but the burst refuted.
+    """
+
+    def __init__(self, settings, on_change, metrics=None, checker=None, stats=None):
+        self.on_change = on_change
+        self.metrics = metrics if metrics is not None else Metrics()
+        # TargetStats by server, for the recent latency of each target
+        self.stats = stats if stats is not None else {}
+        self.targets = {}
+        self.configure(settings)
+        # Built on first use; only needed once something fails
+        self._checker = checker
+        self._retired = []
+        self._settings = settings
+        self._pending = []
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._stopped = False
+        self._thread = None
+        self.metrics.gauge("confirmation_false_positive_rate", self.false_positive_rate)
+
+    def configure(self, settings):
+        options = settings.get('confirmation', {})
+        self.enabled = options.get('enabled', True)
+        self.burst_size = max(1, options.get('burst_size', 3))
+        quorum = options.get('quorum', 0.6)
+        # A quorum of 0 would declare targets down on a fully answered burst
+        self.quorum = min(1.0, quorum) if quorum > 0 else 0.6
+        self.timeout = options.get('timeout', 300) / 1000.0
+        self.max_timeout = max(self.timeout, settings.get('probes', {}).get('timeout', 2.0))
+        self.recover_after = max(1, options.get('recover_after', 2))
+        self.paths = options.get('paths', {})
+
+    def false_positive_rate(self):
+        counters = self.metrics.counters
+        started = counters["confirmations_started"]
+        return counters["confirmations_refuted"] / started if started else 0.0
+
+    def burst_timeout(self, server):
+        """Timeout in seconds of a burst probe of server"""
+        stats = self.stats.get(server)
+        p99 = stats.recent_sketch().quantile(0.99) if stats is not None else math.nan
+        if math.isnan(p99):
+            return self.max_timeout
+        return min(self.max_timeout, max(self.timeout, BURST_TIMEOUT_FACTOR * p99 / 1000.0))
+
+    def state(self, server):
+        target = self.targets.get(server)
+        return target.state if target is not None else UNKNOWN
+
+    def retain(self, servers):
+        """Forget targets that are no longer monitored"""
+        with self._lock:
+            for server in list(self.targets):
+                if server not in servers:
+                    del self.targets[server]
+
+    def observe(self, result):
+        with self._lock:
+            down = self._observe(result)
+        if down is not None:
+            self.on_change(result.server, down, result)
+
+    def _observe(self, result):
+        """The new down flag when this result settles a state change, else None"""
+        target = self.targets.get(result.server)
+        if target is None:
+            target = self.targets[result.server] = _TargetState()
+        if result.is_connected:
+            if target.state == DOWN:
+                target.successes += 1
+                if target.successes >= self.recover_after:
+                    target.state = UP
+                    target.successes = 0
+                    target.last_up_at = result.monotonic_ns
+                    return False
+            elif target.state != SUSPECT:
+                # The first result of a target is not news
+                target.state = UP
+                target.last_up_at = result.monotonic_ns
+            return None
+
+        target.successes = 0
+        if target.state in (SUSPECT, DOWN):
+            return None
+        if not self.enabled:
+            # Without bursts every failure is believed, as before
+            target.state = DOWN
+            return True
+        target.state = SUSPECT
+        target.suspect_at = result.monotonic_ns
+        self.metrics.increment("confirmations_started")
+        self._pending.append(result)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="Confirmation", daemon=True)
+            self._thread.start()
+        self._condition.notify()
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                suspects = self._pending
+                self._pending = []
+            try:
+                self._confirm(suspects)
+            except Exception as e:
+                # Keep the thread alive for later rounds; these targets are
+                # settled by their next failure
+                print(f"Confirmation round failed: {e}")
+                with self._lock:
+                    for suspect in suspects:
+                        target = self.targets.get(suspect.server)
+                        if target is not None and target.state == SUSPECT:
+                            target.state = UP
+
+    def _confirm(self, suspects):
+        probes = []
+        sizes = []
+        with self._lock:
+            for result in suspects:
+                burst = [result.server] * self.burst_size + list(self.paths.get(result.server, []))
+                probes.extend(burst)
+                sizes.append(len(burst))
+            retired, self._retired = self._retired, []
+            if self._checker is None:
+                self._checker = create_checker(self._settings, timeout=self.max_timeout)
+            checker = self._checker
+        # One round, one timeout: long enough for the slowest target in it
+        timeout = max(self.burst_timeout(server) for server in set(probes))
+        for old in retired:
+            old.close()
+        try:
+            checker.set_timeout(timeout)
+            results = checker.check_many(probes, BURST_CONCURRENCY)
+        except Exception as e:
+            print(f"Confirmation burst failed ({e}); trusting the first failures")
+            results = [suspect for suspect, size in zip(suspects, sizes) for _ in range(size)]
+        finished = time.monotonic_ns()
+
+        changes = []
+        position = 0
+        metrics = self.metrics
+        with self._lock:
+            for suspect, size in zip(suspects, sizes):
+                burst = results[position:position + size]
+                position += size
+                failed = [result for result in burst if not result.is_connected]
+                down = bool(failed) and len(failed) >= self.quorum * len(burst)
+                target = self.targets.get(suspect.server)
+                if target is None or target.state != SUSPECT:
+                    continue  # Removed from the targets meanwhile
+                metrics.add("confirmation_burst", finished - target.suspect_at)
+                if down:
+                    target.state = DOWN
+                    metrics.increment("confirmations_down")
+                    if target.last_up_at:
+                        metrics.add("time_to_detect", finished - target.last_up_at)
+                    changes.append((suspect.server, failed[0]))
+                else:
+                    target.state = UP
+                    metrics.increment("confirmations_refuted")
+        for server, result in changes:
+            self.on_change(server, True, result)
+
+    def reconfigure(self, settings):
+        """Apply changed settings; the burst checker is rebuilt on next use"""
+        with self._lock:
+            self.configure(settings)
+            self._settings = settings
+            if self._checker is not None:
+                # Closed by the confirmation thread, which may be using it
+                self._retired.append(self._checker)
+                self._checker = None
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(self.max_timeout + 2.0)
+            self._thread = None
+        for checker in self._retired + [self._checker]:
+            if checker is not None:
+                checker.close()
+        self._retired = []
+        self._checker = None
@@ -0,0 +1,94 @@
+import threading
+import time
+from src.core.scheduler import ProbeScheduler
+from src.utils.metrics import Metrics
+
+
+class ProbeEngine:
+    """Runs network checks on a background thread and hands every
+    PingResult to a callback, so probing never blocks the GUI event loop"""
+
+    def __init__(self, checker, config, on_result, stats=None, metrics=None):
+        self.checker = checker
+        self.config = config
+        self.on_result = on_result
+        # Per-target TargetStats, read for current_streak to adapt the probe rate
+        self.stats = stats if stats is not None else {}
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.scheduler = ProbeScheduler(config)
+        self._paused = False
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._reset = False
+        # Monotonic time at which the first probe was sent
+        self.first_probe_at = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="ProbeEngine", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop the probe thread and wait for the current check to finish"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.checker.close()
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+        self._reset = True
+        self._wakeup.set()
+
+    def poke(self):
+        """Wake the engine so changed settings apply without waiting out the interval"""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if self._paused:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            now = time.monotonic()
+            self.scheduler.sync(self.config.get_targets(), now)
+            if self._reset:
+                self._reset = False
+                self.scheduler.reset(now)
+
+            # Sleep until the earliest absolute deadline; wakeups (settings
+            # changes, resume) simply re-evaluate the schedule
+            deadline = self.scheduler.next_deadline()
+            wait = None if deadline is None else deadline - now
+            if wait is None or wait > 0:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                continue
+
+            due = self.scheduler.pop_due(now)
+            if self.first_probe_at is None:
+                self.first_probe_at = time.monotonic()
+            metrics = self.metrics
+            started = metrics.clock()
+            results = self.checker.check_many(due, self.config.settings.get('max_concurrency', 16))
+            finished = time.monotonic()
+            if started:
+                metrics.add("probe_batch", metrics.clock() - started, len(due))
+                metrics.add("scheduler_lag", int(self.scheduler.last_lag * 1e9))
+            for i, result in enumerate(results):
+                if self._stopped.is_set() or self._paused:
+                    metrics.increment("results_dropped_paused", len(results) - i)
+                    break
+                stats = self.stats.get(result.server)
+                streak = stats.current_streak if stats is not None else 0
+                self.scheduler.record(result, streak, finished)
+                self.on_result(result)
@@ -0,0 +1,208 @@
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core.network import StatusCode
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STATUS_LABELS = {
+    StatusCode.CONNECTED: "connected",
+    StatusCode.CONNECTION_LOST: "lost",
+    StatusCode.ERROR: "error",
+}
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _number(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+class _TargetSeries:
+    __slots__ = ("probes", "buckets", "latency_sum", "latency_count", "up", "last_latency", "last_probe")
+
+    def __init__(self):
+        self.probes = [0] * len(STATUS_LABELS)
+        # Non-cumulative counts; the last slot is for latencies above every bound
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.up = 0
+        self.last_latency = math.nan
+        self.last_probe = 0.0
+
+    def copy(self):
+        other = _TargetSeries()
+        other.probes = list(self.probes)
+        other.buckets = list(self.buckets)
+        other.latency_sum = self.latency_sum
+        other.latency_count = self.latency_count
+        other.up = self.up
+        other.last_latency = self.last_latency
+        other.last_probe = self.last_probe
+        return other
+
+
+class ProbeMetrics:
+    """Counters, histograms and current status per target, for scraping.
+
+    Everything is updated in O(1) per result, so rendering a scrape only
+    copies a few numbers per target under the lock and never looks at the
+    history or the log.
+    """
+
+    def __init__(self, version="1.0.0"):
+        self.version = version
+        self._lock = threading.Lock()
+        self._targets = {}
+
+    def observe(self, result):
+        code = result.code
+        with self._lock:
+            series = self._targets.get(result.server)
+            if series is None:
+                series = self._targets[result.server] = _TargetSeries()
+            series.probes[code] += 1
+            series.last_probe = result.wall_time
+            if code == StatusCode.CONNECTED:
+                latency = result.latency / 1000.0
+                series.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+                series.latency_sum += latency
+                series.latency_count += 1
+                series.up = 1
+                series.last_latency = latency
+            else:
+                series.up = 0
+                series.last_latency = math.nan
+
+    def retain(self, servers):
+        """Stop exporting targets that are no longer monitored"""
+        with self._lock:
+            for server in list(self._targets):
+                if server not in servers:
+                    del self._targets[server]
+
+    def render(self, openmetrics=True):
+        """Exposition text in OpenMetrics or, with openmetrics=False, Prometheus text format"""
+        with self._lock:
+            targets = {server: series.copy() for server, series in self._targets.items()}
+
+        lines = []
+
+        def family(name, kind, help_text):
+            # OpenMetrics names counter families without the _total suffix
+            if kind == "counter" and not openmetrics:
+                name += "_total"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family("network_monitor_info", "gauge", "Network Monitor version")
+        lines.append(f'network_monitor_info{{version="{_escape(self.version)}"}} 1')
+
+        family("network_monitor_probes", "counter", "Probes sent, by result")
+        for server, series in targets.items():
+            label = _escape(server)
+            for code, status in STATUS_LABELS.items():
+                lines.append(f'network_monitor_probes_total{{target="{label}",status="{status}"}} {series.probes[code]}')
+
+        family("network_monitor_probe_failures", "counter", "Probes that got no reply or failed")
+        for server, series in targets.items():
+            failures = series.probes[StatusCode.CONNECTION_LOST] + series.probes[StatusCode.ERROR]
+            lines.append(f'network_monitor_probe_failures_total{{target="{_escape(server)}"}} {failures}')
+
+        family("network_monitor_latency_seconds", "histogram", "Round trip time of answered probes")
+        for server, series in targets.items():
+            label = _escape(server)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series.buckets):
+                cumulative += count
+                lines.append(f'network_monitor_latency_seconds_bucket{{target="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'network_monitor_latency_seconds_bucket{{target="{label}",le="+Inf"}} {series.latency_count}')
+            lines.append(f'network_monitor_latency_seconds_sum{{target="{label}"}} {_number(series.latency_sum)}')
+            lines.append(f'network_monitor_latency_seconds_count{{target="{label}"}} {series.latency_count}')
+
+        family("network_monitor_up", "gauge", "1 if the last probe got a reply")
+        for server, series in targets.items():
+            lines.append(f'network_monitor_up{{target="{_escape(server)}"}} {series.up}')
+
+        family("network_monitor_last_latency_seconds", "gauge", "Round trip time of the last probe (NaN if lost)")
+        for server, series in targets.items():
+            lines.append(f'network_monitor_last_latency_seconds{{target="{_escape(server)}"}} '
+                         f'{_number(series.last_latency)}')
+
+        family("network_monitor_last_probe_timestamp_seconds", "gauge", "Unix time of the last probe")
+        for server, series in targets.items():
+            lines.append(f'network_monitor_last_probe_timestamp_seconds{{target="{_escape(server)}"}} '
+                         f'{_number(series.last_probe)}')
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class _ScrapeHandler(BaseHTTPRequestHandler):
+    server_version = "NetworkMonitor"
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = self.server.probe_metrics.render(openmetrics).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes are too frequent to print
+
+
+class MetricsExporter:
+    """Serves ProbeMetrics over HTTP from its own threads.
+
+    Each scrape is answered on a server thread and only takes the metrics
+    lock long enough to copy the counters, so probing is never blocked.
+    """
+
+    def __init__(self, probe_metrics, host="127.0.0.1", port=9469):
+        self.probe_metrics = probe_metrics
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address if self._server is not None else None
+
+    def start(self):
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer((self.host, self.port), _ScrapeHandler)
+        self._server.daemon_threads = True
+        self._server.probe_metrics = self.probe_metrics
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsExporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(2.0)
+        self._server = None
+        self._thread = None
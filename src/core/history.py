@@ -0,0 +1,348 @@
+import math
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from itertools import accumulate
+
+# Samples per chunk; storage grows and is trimmed a chunk at a time
+CHUNK_SAMPLES = 4096
+# Gaps between samples are uint16 milliseconds; longer ones are kept aside
+MAX_DELTA_MS = 0xFFFF
+# Latencies are uint16 steps of LATENCY_STEP ms, saturating at MAX_LATENCY;
+# FAILED + status code marks a sample without a reply
+LATENCY_STEP = 0.1
+FAILED = 0xFFF0
+MAX_LATENCY = FAILED - 1
+BYTES_PER_SAMPLE = 4
+
+# (bucket seconds, buckets kept) per pyramid level: a day, a week, 30 days and a year
+PYRAMID_LEVELS = ((10, 8640), (60, 10080), (600, 4320), (3600, 8760))
+
+class HistorySlice(namedtuple("HistorySlice", ["epoch", "offsets", "latencies", "codes"])):
+    """Columns of a history window; offsets are milliseconds after epoch (monotonic seconds)"""
+    __slots__ = ()
+
+    def times(self):
+        """Yield the monotonic timestamp of every sample in the slice"""
+        epoch = self.epoch
+        for offset in self.offsets:
+            yield epoch + offset / 1000.0
+
+
+class _Chunk:
+    """Up to CHUNK_SAMPLES consecutive samples, delta encoded"""
+    __slots__ = ("first", "last", "deltas", "values", "long_deltas")
+
+    def __init__(self, offset):
+        self.first = offset
+        self.last = offset
+        self.deltas = array('H')
+        self.values = array('H')
+        # Sample index -> gap, for gaps that do not fit a uint16
+        self.long_deltas = {}
+
+    def offsets(self):
+        deltas = self.deltas
+        if self.long_deltas:
+            deltas = [self.long_deltas.get(i, delta) for i, delta in enumerate(deltas)]
+        return array('q', accumulate(deltas, initial=self.first))[1:]
+
+
+class HistoryBuffer:
+    """Growable store of the most recent probe results of one target.
+
+    Samples are kept in chunks of two uint16 columns: the milliseconds since
+    the previous sample and the latency in LATENCY_STEP ms steps, with the
+    status of failed probes encoded in the latency, i.e. 4 bytes per sample.
+    Storage grows with the samples, so a target that was just added costs
+    almost nothing, and the oldest chunk is dropped once `capacity` samples
+    remain without it. Appends are O(1) and, since timestamps only grow,
+    time windows are found by binary search over the chunks.
+
+    Latencies are rounded to LATENCY_STEP ms and saturate at about 6.5 s.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self.epoch = time.monotonic()
+        # Wall-clock time at the epoch, for labelling samples
+        self.wall_epoch = time.time()
+        self._chunks = []
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return sum(chunk.deltas.itemsize * len(chunk.deltas) + chunk.values.itemsize * len(chunk.values)
+                   for chunk in self._chunks)
+
+    def append(self, timestamp, latency, code):
+        """Add a sample; timestamp is in time.monotonic() seconds.
+
+        A sample older than the newest one is stored at the newest one's time.
+        """
+        offset = int((timestamp - self.epoch) * 1000)
+        if code or latency != latency:
+            value = FAILED + code
+        else:
+            value = min(max(0, round(latency / LATENCY_STEP)), MAX_LATENCY)
+
+        chunks = self._chunks
+        chunk = chunks[-1] if chunks else None
+        if chunk is None or len(chunk.values) >= CHUNK_SAMPLES:
+            chunk = _Chunk(max(offset, chunk.last) if chunk is not None else offset)
+            chunks.append(chunk)
+            delta = 0
+        else:
+            delta = max(0, offset - chunk.last)
+        if delta > MAX_DELTA_MS:
+            chunk.long_deltas[len(chunk.deltas)] = delta
+            chunk.deltas.append(MAX_DELTA_MS)
+        else:
+            chunk.deltas.append(delta)
+        chunk.values.append(value)
+        chunk.last += delta
+        self._count += 1
+        while len(chunks) > 1 and self._count - len(chunks[0].values) >= self.capacity:
+            self._count -= len(chunks.pop(0).values)
+
+    def _chunk_after(self, offset):
+        """Index of the first chunk whose last offset is >= offset"""
+        chunks = self._chunks
+        low, high = 0, len(chunks)
+        while low < high:
+            middle = (low + high) // 2
+            if chunks[middle].last < offset:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def window(self, start=None, end=None):
+        """Return the samples with start <= timestamp < end (monotonic seconds)"""
+        first_ms = None if start is None else math.ceil((start - self.epoch) * 1000)
+        end_ms = None if end is None else math.ceil((end - self.epoch) * 1000)
+        offsets = array('q')
+        values = array('H')
+        for chunk in self._chunks[0 if first_ms is None else self._chunk_after(first_ms):]:
+            if end_ms is not None and chunk.first >= end_ms:
+                break
+            chunk_offsets = chunk.offsets()
+            low = 0 if first_ms is None else bisect_left(chunk_offsets, first_ms)
+            high = len(chunk_offsets) if end_ms is None else bisect_left(chunk_offsets, end_ms)
+            offsets += chunk_offsets[low:high]
+            values += chunk.values[low:high]
+        return HistorySlice(
+            self.epoch,
+            offsets,
+            array('f', (value * LATENCY_STEP if value < FAILED else math.nan for value in values)),
+            array('B', (0 if value < FAILED else value - FAILED for value in values))
+        )
+
+    def last(self, seconds, now=None):
+        """Return the samples from the last `seconds` seconds"""
+        if now is None:
+            now = time.monotonic()
+        return self.window(now - seconds)
+
+    def to_wall(self, timestamp):
+        """Convert a monotonic timestamp from this buffer to time.time() seconds"""
+        return self.wall_epoch + (timestamp - self.epoch)
+
+
+class _PyramidLevel:
+    """Direct-mapped ring of fixed-width time buckets.
+
+    Bucket number n (monotonic seconds // width) lives in slot n % capacity,
+    so both updates and lookups are O(1) and a slot is recycled as soon as a
+    newer bucket maps onto it.
+    """
+
+    def __init__(self, width, capacity):
+        self.width = width
+        self.capacity = capacity
+        self.buckets = array('q', [-1]) * capacity
+        self.minimum = array('f', bytes(4 * capacity))
+        self.maximum = array('f', bytes(4 * capacity))
+        self.total = array('d', bytes(8 * capacity))
+        self.answered = array('I', bytes(4 * capacity))
+        self.lost = array('I', bytes(4 * capacity))
+
+    @property
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in
+                   (self.buckets, self.minimum, self.maximum, self.total, self.answered, self.lost))
+
+    def add(self, timestamp, latency):
+        bucket = int(timestamp // self.width)
+        slot = bucket % self.capacity
+        if self.buckets[slot] != bucket:
+            self.buckets[slot] = bucket
+            self.minimum[slot] = math.inf
+            self.maximum[slot] = -math.inf
+            self.total[slot] = 0.0
+            self.answered[slot] = 0
+            self.lost[slot] = 0
+        if latency != latency:
+            self.lost[slot] += 1
+            return
+        self.answered[slot] += 1
+        self.total[slot] += latency
+        if latency < self.minimum[slot]:
+            self.minimum[slot] = latency
+        if latency > self.maximum[slot]:
+            self.maximum[slot] = latency
+
+    def window(self, start, end):
+        """Yield (bucket start, min, max, total, answered, lost) for buckets starting in [start, end)"""
+        first = math.ceil(start / self.width)
+        last = int(math.ceil(end / self.width))
+        for bucket in range(max(first, last - self.capacity), last):
+            slot = bucket % self.capacity
+            if self.buckets[slot] == bucket:
+                yield (bucket * self.width, self.minimum[slot], self.maximum[slot],
+                       self.total[slot], self.answered[slot], self.lost[slot])
+
+
+class LatencyPyramid:
+    """Multi-resolution latency/loss aggregates of one target.
+
+    Every sample updates one bucket per level, so the pyramid is maintained
+    incrementally and a chart of any span, up to the coarsest level's
+    retention, can be decimated from about one bucket per column instead of
+    from the raw samples. Uses about 1 MB per target with the default levels.
+    """
+
+    def __init__(self, levels=PYRAMID_LEVELS):
+        self.levels = [_PyramidLevel(width, capacity) for width, capacity in levels]
+
+    @property
+    def nbytes(self):
+        return sum(level.nbytes for level in self.levels)
+
+    def append(self, timestamp, latency):
+        for level in self.levels:
+            level.add(timestamp, latency)
+
+    def level_for(self, column_width):
+        """Coarsest level with buckets no wider than a column, or None if raw samples are finer"""
+        chosen = None
+        for level in self.levels:
+            if level.width <= column_width:
+                chosen = level
+        return chosen
+
+
+def _add_to_column(columns, column, minimum, maximum, total, answered, lost):
+    entry = columns.get(column)
+    if entry is None:
+        columns[column] = [minimum, maximum, total, answered, lost]
+        return
+    if minimum < entry[0]:
+        entry[0] = minimum
+    if maximum > entry[1]:
+        entry[1] = maximum
+    entry[2] += total
+    entry[3] += answered
+    entry[4] += lost
+
+
+def decimate(buffer, pyramid, start, end, column_width):
+    """Min/max decimation of [start, end) (monotonic seconds) into fixed-width columns.
+
+    Returns {column number: (min, max, mean, loss)} where column number is
+    timestamp // column_width, so columns computed at different times line
+    up and can be cached by the caller. Columns without samples are absent;
+    min, max and mean are NaN for columns where every probe was lost.
+    Columns narrower than the finest pyramid level come from raw samples.
+    """
+    columns = {}
+    level = pyramid.level_for(column_width) if pyramid is not None else None
+    if level is not None:
+        for bucket_start, minimum, maximum, total, answered, lost in level.window(start, end):
+            _add_to_column(columns, int(bucket_start // column_width), minimum, maximum, total, answered, lost)
+    elif buffer is not None:
+        history = buffer.window(start, end)
+        epoch = history.epoch
+        for offset, latency in zip(history.offsets, history.latencies):
+            column = int((epoch + offset / 1000.0) // column_width)
+            if latency != latency:
+                _add_to_column(columns, column, math.inf, -math.inf, 0.0, 0, 1)
+            else:
+                _add_to_column(columns, column, latency, latency, latency, 1, 0)
+
+    result = {}
+    for column, (minimum, maximum, total, answered, lost) in columns.items():
+        if answered:
+            result[column] = (minimum, maximum, total / answered, lost / (answered + lost))
+        else:
+            result[column] = (math.nan, math.nan, math.nan, 1.0)
+    return result
+
+
+class HistoryStore:
+    """Per-target history buffers and, optionally, latency pyramids.
+
+    With max_bytes, the samples kept per target are capped so that the
+    buffers of all targets passed to retain() fit in about max_bytes. The
+    pyramids (about 1 MB each) are only kept while there are at most
+    pyramid_max_targets targets.
+    """
+
+    def __init__(self, capacity=86400, pyramid=True, max_bytes=None, pyramid_max_targets=None):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.pyramid_max_targets = pyramid_max_targets
+        self.pyramid_enabled = pyramid
+        self.use_pyramid = pyramid
+        self.target_capacity = capacity
+        self.buffers = {}
+        self.pyramids = {}
+
+    def get(self, server):
+        return self.buffers.get(server)
+
+    def pyramid(self, server):
+        return self.pyramids.get(server)
+
+    def record(self, result, timestamp=None):
+        buffer = self.buffers.get(result.server)
+        if buffer is None:
+            buffer = self.buffers[result.server] = HistoryBuffer(self.target_capacity)
+            if self.use_pyramid:
+                self.pyramids[result.server] = LatencyPyramid()
+        if timestamp is None:
+            timestamp = result.monotonic_ns / 1e9
+        latency = result.latency
+        buffer.append(timestamp, latency, result.code)
+        pyramid = self.pyramids.get(result.server)
+        if pyramid is not None:
+            pyramid.append(timestamp, latency)
+
+    def retain(self, servers):
+        """Drop the buffers of targets that are no longer monitored and fit
+        the others to the memory limits for this many targets"""
+        for server in list(self.buffers):
+            if server not in servers:
+                del self.buffers[server]
+                self.pyramids.pop(server, None)
+        capacity = self.capacity
+        if self.max_bytes is not None:
+            capacity = max(1, min(capacity, self.max_bytes // (BYTES_PER_SAMPLE * max(1, len(servers)))))
+        if capacity != self.target_capacity:
+            self.target_capacity = capacity
+            for buffer in self.buffers.values():
+                # Trimmed on the next append
+                buffer.capacity = capacity
+        self.use_pyramid = self.pyramid_enabled and (self.pyramid_max_targets is None
+                                                     or len(servers) <= self.pyramid_max_targets)
+        if not self.use_pyramid:
+            self.pyramids.clear()
+
+    @property
+    def nbytes(self):
+        return (sum(buffer.nbytes for buffer in self.buffers.values()) +
+                sum(pyramid.nbytes for pyramid in self.pyramids.values()))
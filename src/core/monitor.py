@@ -1,96 +1,248 @@
-from PyQt6.QtCore import QTimer
-from src.core.network import NetworkChecker
-from src.ui.main_window import MainWindow
-from src.ui.system_tray import SystemTray
+import time
+from src.core.collector import CollectorAgent
+from src.core.confirmation import ConfirmationEngine
+from src.core.engine import ProbeEngine
+from src.core.exporter import MetricsExporter, ProbeMetrics
+from src.core.history import HistoryStore
+from src.core.stats import TargetStats
+from src.core.network import create_checker
+from src.core.sharding import ShardedEngine
 from src.utils.config import Config
+from src.utils.metrics import Metrics
 from src.utils.logger import Logger
-from PyQt6.QtWidgets import QSystemTrayIcon
 
-class NetworkMonitor:
+# Notification levels passed to MonitorCore.notify
+INFO = "info"
+WARNING = "warning"
+CRITICAL = "critical"
+
+
+class MonitorCore:
+    """Monitoring pipeline without any UI: probing, statistics, history,
+    logging and notification decisions.
+
+    Results from the probe engine go through dispatch_result, which
+    processes them on the engine thread, and confirmed outages and
+    recoveries through dispatch_state_change. The Qt NetworkMonitor
+    overrides both to hop to the GUI thread first, and overrides notify to
+    show tray messages.
+    """
     VERSION = "1.0.0"
-    
-    def __init__(self):
-        self.config = Config()
-        self.logger = Logger()
-        self.network_checker = NetworkChecker()
-        self.stats = {
-            "total_checks": 0,
-            "failures": 0,
-            "current_streak": 0
-        }
+    # Seconds between connection quality checks of one target
+    QUALITY_CHECK_INTERVAL = 1.0
+
+    def __init__(self, config=None):
+        self.config = config if config is not None else Config()
+        self.metrics = Metrics(self.config.settings.get('diagnostics', {}).get('enabled', False))
+        self.logger = Logger(self.config.settings, self.metrics)
+        # Per-target statistics, history and last known status, keyed by server
+        self.stats = {}
+        history_settings = self.config.settings.get('history', {})
+        workers = self.config.settings.get('sharding', {}).get('workers', 0)
+        # Sharding is for target sets too large to keep pyramids of
+        self.history = HistoryStore(history_settings.get('capacity', 86400),
+                                    history_settings.get('pyramid', True) and workers <= 1,
+                                    history_settings.get('max_memory_mb', 256) * 1024 * 1024,
+                                    history_settings.get('pyramid_max_targets', 100))
+        self.history.retain(set(self.config.get_targets()))
         self.is_monitoring = True
-        self.last_status = "Unknown"
-        
-        # Initialize UI components - create main window first
-        self.main_window = MainWindow(self, self.config.settings)
-        self.system_tray = SystemTray(self)
-        
-        self.initialize()
+        # Confirms failures with a probe burst before a target counts as down
+        self.confirmation = ConfirmationEngine(self.config.settings, self.dispatch_state_change, self.metrics,
+                                               stats=self.stats)
+        # Targets currently flagged as having a poor connection
+        self.poor_targets = set()
+        self._quality_due = {}
+        if workers > 1:
+            # Each worker process builds its own checker
+            self.network_checker = None
+            self.engine = ShardedEngine(self.config, self.dispatch_result, workers, self.metrics)
+        else:
+            self.network_checker = create_checker(self.config.settings)
+            self.engine = ProbeEngine(self.network_checker, self.config, self.dispatch_result, self.stats,
+                                      self.metrics)
+        # Scrape endpoint; counters are only kept while it is enabled
+        self.probe_metrics = None
+        self.exporter = None
+        # Ships results to a collector when agent mode is enabled
+        self.agent = None
+
+    def start(self):
+        self.configure_exporter()
+        self.configure_agent()
+        self.engine.start()
 
-    def initialize(self):
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_connection)
-        self.timer.start(self.config.settings['check_interval'])
+    def configure_exporter(self):
+        """Start, stop or move the metrics endpoint to match the settings"""
+        options = self.config.settings.get('exporter', {})
+        wanted = (options.get('host', '127.0.0.1'), options.get('port', 9469)) if options.get('enabled', False) else None
+        current = (self.exporter.host, self.exporter.port) if self.exporter is not None else None
+        if wanted == current:
+            return
+        if self.exporter is not None:
+            self.exporter.stop()
+            self.exporter = None
+        if wanted is None:
+            self.probe_metrics = None
+            return
+        if self.probe_metrics is None:
+            self.probe_metrics = ProbeMetrics(self.VERSION)
+        exporter = MetricsExporter(self.probe_metrics, *wanted)
+        try:
+            exporter.start()
+        except OSError as e:
+            self.logger.log_error(f"Could not start metrics endpoint on {wanted[0]}:{wanted[1]}: {e}")
+            return
+        self.exporter = exporter
+
+    def configure_agent(self):
+        """Start, stop or redirect the collector agent to match the settings"""
+        options = self.config.settings.get('agent', {})
+        wanted = None
+        if options.get('enabled', False):
+            wanted = (options.get('collector_host', '127.0.0.1'), options.get('collector_port', 9470),
+                      options.get('name') or None, options.get('spool_dir', 'spool'))
+        current = None
+        if self.agent is not None:
+            current = (self.agent.host, self.agent.port, self.agent.name, self.agent.spool_dir)
+        if wanted is not None and current is not None and (wanted[2] is None or wanted[2] == current[2]):
+            wanted = (wanted[0], wanted[1], current[2], wanted[3])
+        if wanted == current:
+            return
+        if self.agent is not None:
+            self.agent.stop()
+            self.agent = None
+        if wanted is None:
+            return
+        self.agent = CollectorAgent(*wanted, max_spool_mb=options.get('max_spool_mb', 100), metrics=self.metrics)
+        self.agent.start()
 
-    def check_connection(self):
+    def dispatch_result(self, result):
+        """Called on the engine thread for every result"""
+        self.handle_result(result)
+
+    def handle_result(self, result):
         if not self.is_monitoring:
+            self.metrics.increment("results_dropped_paused")
             return
-            
-        result = self.network_checker.check(self.config.settings['server'])
+        self.process_result(result)
+
+    def process_result(self, result):
+        """Update stats, history and the log, and raise notifications"""
+        clock = self.metrics.clock
+        started = clock()
         self.update_stats(result)
-        self.system_tray.update_status(result)
-        self.main_window.update_status(result)
+        if self.probe_metrics is not None:
+            self.probe_metrics.observe(result)
+        stats_done = clock()
+        self.history.record(result)
+        history_done = clock()
         self.logger.log_result(result)
+        if self.agent is not None:
+            self.agent.submit(result)
+        log_done = clock()
         
-        # Handle connection state changes
-        if self.last_status != result.status:
-            if not result.is_connected and self.config.settings['notifications']['notify_on_disconnect']:
-                self.system_tray.showMessage(
-                    "Network Monitor",
-                    f"Connection Lost to {result.server}",
-                    QSystemTrayIcon.MessageIcon.Critical,
-                    3000
-                )
-            elif result.is_connected and self.last_status != "Unknown" and self.config.settings['notifications']['notify_on_reconnect']:
-                self.system_tray.showMessage(
-                    "Network Monitor",
-                    f"Connection Restored (Ping: {result.ping_time}ms)",
-                    QSystemTrayIcon.MessageIcon.Information,
-                    3000
-                )
-            elif result.is_connected and self.config.settings['notifications']['notify_on_poor_connection']:
-                threshold = self.config.settings['notifications']['poor_connection_threshold']
-                if result.ping_time > threshold:
-                    self.system_tray.showMessage(
-                        "Network Monitor",
-                        f"Poor Connection Detected (Ping: {result.ping_time}ms)",
-                        QSystemTrayIcon.MessageIcon.Warning,
-                        3000
-                    )
-        
-        self.last_status = result.status
+        # Connection state changes are reported through handle_state_change
+        self.confirmation.observe(result)
+        self.check_connection_quality(result)
+        if started:
+            metrics = self.metrics
+            metrics.add("stats", stats_done - started)
+            metrics.add("history", history_done - stats_done)
+            metrics.add("log", log_done - history_done)
+            metrics.add("notifications", clock() - log_done)
+
+    def dispatch_state_change(self, server, down, result):
+        """Called by the confirmation engine, on the thread that settled the change"""
+        self.handle_state_change(server, down, result)
+
+    def handle_state_change(self, server, down, result):
+        """Notify about a confirmed outage or recovery"""
+        if not self.is_monitoring:
+            return
+        notifications = self.config.settings['notifications']
+        if down and notifications['notify_on_disconnect']:
+            self.notify(CRITICAL, f"Connection Lost to {server}")
+        elif not down and notifications['notify_on_reconnect']:
+            self.notify(INFO, f"Connection Restored to {server} (Ping: {result.ping_time}ms)")
+
+    def check_connection_quality(self, result):
+        """Warn once when a target's p95 latency or recent loss crosses the thresholds"""
+        notifications = self.config.settings['notifications']
+        if not notifications.get('notify_on_poor_connection', True):
+            return
+        # Merging the percentile sketches is the costly part of a result, and
+        # a five minute p95 does not move between results; check each target
+        # about once a second
+        now = time.monotonic()
+        if now < self._quality_due.get(result.server, 0.0):
+            return
+        self._quality_due[result.server] = now + self.QUALITY_CHECK_INTERVAL
+
+        stats = self.stats[result.server]
+        recent = stats.recent_sketch(now)
+        if recent.count < 10:
+            return
+        p95 = recent.quantile(0.95)
+        loss = stats.loss("1m", now) * 100
+        is_poor = (p95 > notifications.get('poor_connection_threshold', 200)
+                   or loss > notifications.get('poor_connection_loss', 5))
+
+        if is_poor and result.server not in self.poor_targets:
+            self.poor_targets.add(result.server)
+            self.notify(WARNING, f"Poor Connection Detected to {result.server} (p95: {p95:.1f}ms, Loss: {loss:.1f}%)")
+        elif not is_poor:
+            self.poor_targets.discard(result.server)
+
+    def notify(self, level, message):
+        """Report a connection event; the base implementation goes through the logger"""
+        self.logger.log_event(level, message)
 
     def update_stats(self, result):
-        self.stats["total_checks"] += 1
-        if not result.is_connected:
-            self.stats["failures"] += 1
-            self.stats["current_streak"] = 0
-        else:
-            self.stats["current_streak"] += 1
+        stats = self.stats.get(result.server)
+        if stats is None:
+            stats = self.stats[result.server] = TargetStats()
+        stats.update(result)
 
     def toggle_monitoring(self):
         """Pause/Resume monitoring"""
         self.is_monitoring = not self.is_monitoring
         if self.is_monitoring:
-            self.timer.start(self.config.settings['check_interval'])
+            self.engine.resume()
         else:
-            self.timer.stop()
+            self.engine.pause()
 
     def save_settings(self, new_settings):
         """Save new settings and update the configuration"""
         self.config.settings = new_settings
         self.config.save_settings()
+        self.logger.settings = new_settings
+        self.logger.rotate_logs()
+
+        # Forget targets that are no longer monitored
+        targets = set(self.config.get_targets())
+        for server in list(self.stats):
+            if server not in targets:
+                del self.stats[server]
+                self.poor_targets.discard(server)
+                self._quality_due.pop(server, None)
+        self.confirmation.retain(targets)
+        self.confirmation.reconfigure(new_settings)
+        self.history.retain(targets)
+        if self.probe_metrics is not None:
+            self.probe_metrics.retain(targets)
+        self.configure_exporter()
+        self.configure_agent()
         
-        # Update the check interval if it has changed
-        if self.timer.interval() != new_settings['check_interval']:
-            self.timer.setInterval(new_settings['check_interval'])
+        # The engine reads the interval and targets every cycle; wake it so
+        # changes take effect immediately
+        self.engine.poke()
+
+    def shutdown(self):
+        """Stop background probing and flush buffered log rows before the application exits"""
+        self.engine.stop()
+        self.confirmation.stop()
+        if self.exporter is not None:
+            self.exporter.stop()
+        if self.agent is not None:
+            self.agent.stop()
+        self.logger.close()
@@ -1,42 +1,595 @@
 import ping3
-from dataclasses import dataclass
+import ipaddress
+import math
+import random
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from enum import IntEnum
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+DNS_TYPE_A = 1
+DNS_TYPE_CNAME = 5
+DNS_RCODES = {1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+
+class StatusCode(IntEnum):
+    CONNECTED = 0
+    CONNECTION_LOST = 1
+    ERROR = 2
+
+STATUS_CODES = tuple(StatusCode)
+CONNECTED_TEXT = "Connected"
+LOST_TEXT = "Connection Lost"
+
+# Results carry monotonic timestamps and the wall clock time of monotonic
+# zero when they were taken. The offset is re-anchored once the clocks drift
+# apart by more than this: the monotonic clock stops during suspend and
+# ignores NTP and manual steps of the wall clock.
+MAX_CLOCK_DRIFT_NS = 20_000_000
+_wall_offset_ns = time.time_ns() - time.monotonic_ns()
+
+
+def wall_offset_ns():
+    """Current wall clock time of monotonic zero, in ns"""
+    global _wall_offset_ns
+    offset = time.time_ns() - time.monotonic_ns()
+    if abs(offset - _wall_offset_ns) > MAX_CLOCK_DRIFT_NS:
+        _wall_offset_ns = offset
+    # Unchanged offsets are one shared int, so results only hold a reference
+    return _wall_offset_ns
+
+_target_ids = {}
+_target_names = []
+_intern_lock = threading.Lock()
+
+
+def target_id(name):
+    """Small integer standing for a target name, stable for the life of the process"""
+    target = _target_ids.get(name)
+    if target is None:
+        with _intern_lock:
+            target = _target_ids.get(name)
+            if target is None:
+                target = len(_target_names)
+                _target_names.append(sys.intern(name))
+                _target_ids[name] = target
+    return target
+
+
+def target_name(target):
+    return _target_names[target]
+
+
+class ResultDetail:
+    """The rarely present parts of a result, kept out of PingResult itself"""
+    __slots__ = ("error", "timings", "resolve_error")
+
+    def __init__(self, error=None, timings=None, resolve_error=None):
+        # Error text without the "Error: " prefix
+        self.error = error
+        # Phase durations in ms (resolve, connect, tls, first_byte, ...), when measured
+        self.timings = timings
+        # Why the hostname could not be resolved; set with a connected result
+        # when a stale cached address was used
+        self.resolve_error = resolve_error
+
 
-@dataclass
 class PingResult:
-    timestamp: datetime
-    server: str
-    ping_time: float
-    is_connected: bool
-    status: str
+    """One probe outcome.
+
+    A result is allocated for every probe, so it holds only a monotonic
+    timestamp in ns (for intervals and the history timeline), the wall clock
+    time of monotonic zero when it was taken (shared by all results until
+    the wall clock moves), an interned target id, the latency in ms (NaN
+    unless connected), a StatusCode and, when there is any, a ResultDetail.
+    The familiar server, ping_time, is_connected, status and timestamp are
+    derived on access.
+    """
+    __slots__ = ("monotonic_ns", "wall_offset_ns", "target", "latency", "code", "detail")
+
+    def __init__(self, target, latency, code, detail=None, monotonic_ns=None, wall_offset=None):
+        self.wall_offset_ns = wall_offset_ns() if wall_offset is None else wall_offset
+        self.monotonic_ns = time.monotonic_ns() if monotonic_ns is None else monotonic_ns
+        self.target = target
+        self.latency = latency
+        self.code = code
+        self.detail = detail
+
+    @classmethod
+    def connected(cls, server, latency, timings=None, resolve_error=None):
+        detail = ResultDetail(None, timings, resolve_error) if timings or resolve_error else None
+        return cls(target_id(server), latency, StatusCode.CONNECTED, detail)
+
+    @classmethod
+    def lost(cls, server, timings=None, resolve_error=None):
+        detail = ResultDetail(None, timings, resolve_error) if timings or resolve_error else None
+        return cls(target_id(server), math.nan, StatusCode.CONNECTION_LOST, detail)
+
+    @classmethod
+    def error(cls, server, message, timings=None, resolve_error=None):
+        return cls(target_id(server), math.nan, StatusCode.ERROR, ResultDetail(message, timings, resolve_error))
+
+    @classmethod
+    def from_wall(cls, server, latency, code, error, wall_time):
+        """Rebuild a result from another process: wall clock seconds and a target name"""
+        offset = wall_offset_ns()
+        return cls(target_id(server), latency, STATUS_CODES[code],
+                   ResultDetail(error) if error is not None else None,
+                   int(wall_time * 1e9) - offset, offset)
+
+    def __reduce__(self):
+        # Target ids and monotonic time only mean something in this process
+        return PingResult.from_wall, (self.server, self.latency, int(self.code),
+                                      self.detail.error if self.detail is not None else None, self.wall_time)
+
+    def __repr__(self):
+        return f"PingResult({self.server!r}, {self.latency!r}, {self.status!r}, {self.timestamp})"
+
+    @property
+    def server(self):
+        return _target_names[self.target]
+
+    @property
+    def ping_time(self):
+        return self.latency
+
+    @property
+    def is_connected(self):
+        return self.code == StatusCode.CONNECTED
+
+    @property
+    def status(self):
+        if self.code == StatusCode.CONNECTED:
+            return CONNECTED_TEXT
+        if self.code == StatusCode.CONNECTION_LOST:
+            return LOST_TEXT
+        return f"Error: {self.detail.error}"
+
+    @property
+    def wall_time(self):
+        """Epoch seconds"""
+        return (self.monotonic_ns + self.wall_offset_ns) / 1e9
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.wall_time)
+
+    @property
+    def timings(self):
+        return self.detail.timings if self.detail is not None else None
+
+    @property
+    def resolve_error(self):
+        return self.detail.resolve_error if self.detail is not None else None
+
+def build_dns_query(query_id, name, qtype):
+    """DNS query packet with one question and recursion desired"""
+    question = b"".join(bytes([len(label)]) + label for label in name.rstrip(".").encode("idna").split(b"."))
+    return struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0) + question + b"\x00" + struct.pack("!HH", qtype, 1)
+
+
+def _skip_dns_name(packet, position):
+    while True:
+        length = packet[position]
+        if length >= 0xC0:  # Compression pointer ends the name
+            return position + 2
+        if length == 0:
+            return position + 1
+        position += length + 1
+
+
+def parse_dns_addresses(packet):
+    """IPv4 addresses and the lowest TTL among the A/CNAME records of a DNS response"""
+    questions, answers = struct.unpack("!HH", packet[4:8])
+    position = 12
+    for _ in range(questions):
+        position = _skip_dns_name(packet, position) + 4
+    addresses, ttl = [], None
+    for _ in range(answers):
+        position = _skip_dns_name(packet, position)
+        rtype, _, record_ttl, length = struct.unpack("!HHIH", packet[position:position + 10])
+        position += 10
+        if rtype == DNS_TYPE_A and length == 4:
+            addresses.append(socket.inet_ntoa(packet[position:position + 4]))
+        if rtype in (DNS_TYPE_A, DNS_TYPE_CNAME):
+            ttl = record_ttl if ttl is None else min(ttl, record_ttl)
+        position += length
+    return addresses, ttl
+
+
+def system_nameservers(path="/etc/resolv.conf"):
+    try:
+        with open(path) as f:
+            return [line.split()[1] for line in f if line.startswith("nameserver") and len(line.split()) > 1]
+    except OSError:
+        return []
+
+
+class _CacheEntry:
+    __slots__ = ("address", "expires", "refresh_at", "stale_until", "error", "refreshing")
+
+    def __init__(self, address, expires, refresh_at, stale_until, error=None):
+        self.address = address
+        self.expires = expires
+        self.refresh_at = refresh_at
+        self.stale_until = stale_until
+        self.error = error
+        self.refreshing = False
+
+
+class ResolverCache:
+    """Hostname to IPv4 address cache shared by the ICMP backends.
+
+    Names are looked up with a direct query to the system's nameservers so
+    the record TTL (clamped to min_ttl..max_ttl) can be honoured; names the
+    nameservers do not answer for (e.g. from /etc/hosts) fall back to
+    getaddrinfo and are kept for default_ttl. An entry is refreshed in the
+    background once refresh_ahead of its TTL has passed, so probes normally
+    never wait for the resolver. After expiry the old address keeps being
+    served for up to max_stale seconds while a background lookup retries,
+    and a failed lookup is reported alongside it. A failed lookup without a
+    usable address is remembered for negative_ttl seconds so a resolver
+    outage does not stall every probe.
+
+    resolve() returns (address, resolve_ms, error): resolve_ms is the time
+    this call spent resolving (0 when answered from the cache) and address
+    is None when the name could not be resolved.
+    """
+
+    def __init__(self, default_ttl=300, min_ttl=5, max_ttl=3600, refresh_ahead=0.8, max_stale=86400,
+                 negative_ttl=5, timeout=2.0, nameservers=None):
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.refresh_ahead = refresh_ahead
+        self.max_stale = max_stale
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.nameservers = system_nameservers() if nameservers is None else nameservers
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def resolve(self, host):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None:
+                if now < entry.expires:
+                    if entry.address is not None and now >= entry.refresh_at:
+                        self._refresh_in_background(host, entry)
+                    return entry.address, 0.0, entry.error
+                if entry.address is not None and now < entry.stale_until:
+                    self._refresh_in_background(host, entry)
+                    return entry.address, 0.0, entry.error
+        if entry is None and self._is_address(host):
+            return host, 0.0, None
+
+        started = time.perf_counter()
+        entry = self._lookup(host, entry)
+        return entry.address, round((time.perf_counter() - started) * 1000, 3), entry.error
+
+    @staticmethod
+    def _is_address(host):
+        try:
+            ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return True
+
+    def _refresh_in_background(self, host, entry):
+        if entry.refreshing:
+            return
+        entry.refreshing = True
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="resolver")
+        self._executor.submit(self._lookup, host, entry)
+
+    def _lookup(self, host, previous):
+        """Resolve host, store the new entry and return it"""
+        now = time.monotonic()
+        try:
+            address, ttl = self._query(host)
+        except (OSError, ValueError) as e:
+            error = str(e) or e.__class__.__name__
+            if previous is not None and previous.address is not None and now < previous.stale_until:
+                entry = _CacheEntry(previous.address, now + self.negative_ttl, now + self.negative_ttl,
+                                    previous.stale_until, error)
+            else:
+                entry = _CacheEntry(None, now + self.negative_ttl, now + self.negative_ttl, now, error)
+        else:
+            ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+            entry = _CacheEntry(address, now + ttl, now + ttl * self.refresh_ahead, now + ttl + self.max_stale)
+        with self._lock:
+            self._entries[host] = entry
+        return entry
+
+    def _query(self, host):
+        """Address and TTL of host; raises OSError when it cannot be resolved"""
+        for nameserver in self.nameservers:
+            try:
+                addresses, ttl = self._query_nameserver(nameserver, host)
+            except (OSError, struct.error, IndexError):
+                continue  # Try the next nameserver, then getaddrinfo
+            if addresses:
+                return addresses[0], ttl if ttl is not None else self.default_ttl
+            break  # Authoritative "no such name": let getaddrinfo check the hosts file
+        try:
+            info = socket.getaddrinfo(host, None, socket.AF_INET, socket.SOCK_DGRAM)
+        except socket.gaierror as e:
+            raise OSError(f"DNS resolution failed: {e.strerror or e}") from e
+        return info[0][4][0], self.default_ttl
+
+    def _query_nameserver(self, nameserver, host):
+        # A nameserver is an address, or an (address, port) pair
+        address, port = nameserver if isinstance(nameserver, tuple) else (nameserver, 53)
+        query_id = random.getrandbits(16)
+        family = socket.AF_INET6 if ":" in address else socket.AF_INET
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect((address, port))
+            sock.send(build_dns_query(query_id, host, DNS_TYPE_A))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                sock.settimeout(max(0.001, deadline - time.monotonic()))
+                packet = sock.recv(4096)
+                if len(packet) >= 12 and struct.unpack("!H", packet[:2])[0] == query_id and packet[2] & 0x80:
+                    break
+        rcode = packet[3] & 0x0F
+        if rcode not in (0, 3):
+            raise OSError(f"DNS {DNS_RCODES.get(rcode, rcode)}")
+        return parse_dns_addresses(packet)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _resolve_failed(server, resolve_ms, error):
+    return PingResult.error(server, error, {'resolve': resolve_ms} if resolve_ms else None, error)
+
 
 class NetworkChecker:
-    def __init__(self):
+    def __init__(self, resolver=None):
         self.timeout = 1.0
+        self.resolver = resolver
+        self._executor = None
+        self._executor_size = 0
 
     def check(self, server: str) -> PingResult:
         try:
-            ping_time = ping3.ping(server, timeout=self.timeout)
-            is_connected = ping_time is not None
-            status = "Connected" if is_connected else "Connection Lost"
-            
-            if is_connected:
-                ping_time = round(ping_time * 1000, 2)
-            else:
-                ping_time = float('nan')
-
-            return PingResult(
-                timestamp=datetime.now(),
-                server=server,
-                ping_time=ping_time,
-                is_connected=is_connected,
-                status=status
-            )
+            address, resolve_ms, resolve_error = (
+                self.resolver.resolve(server) if self.resolver is not None else (server, 0.0, None))
+            if address is None:
+                return _resolve_failed(server, resolve_ms, resolve_error)
+
+            ping_time = ping3.ping(address, timeout=self.timeout)
+            timings = {'resolve': resolve_ms} if resolve_ms else None
+            if ping_time is None:
+                return PingResult.lost(server, timings, resolve_error)
+            return PingResult.connected(server, round(ping_time * 1000, 2), timings, resolve_error)
         except Exception as e:
-            return PingResult(
-                timestamp=datetime.now(),
-                server=server,
-                ping_time=float('nan'),
-                is_connected=False,
-                status=f"Error: {str(e)}"
-            )
+            return PingResult.error(server, str(e))
+
+    def check_many(self, servers, max_concurrency=16):
+        """Probe several servers concurrently, at most max_concurrency at a time.
+
+        Results are returned in the same order as servers, so a tick takes
+        roughly as long as its slowest probe rather than the sum of all of them.
+        """
+        if len(servers) <= 1:
+            return [self.check(server) for server in servers]
+
+        # The pool is sized to the cap and only rebuilt when the cap changes;
+        # idle threads are created lazily, so a large cap costs nothing.
+        workers = max(1, int(max_concurrency))
+        if self._executor is None or self._executor_size != workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe")
+            self._executor_size = workers
+        return list(self._executor.map(self.check, servers))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._executor_size = 0
+        if self.resolver is not None:
+            self.resolver.close()
+
+
+class IcmpChecker:
+    """ICMP echo backend that multiplexes every probe over one long-lived socket.
+
+    Echo requests for a whole batch are sent back to back, tagged with this
+    checker's identifier and a per-request sequence number, and the replies
+    are matched on source address and sequence in a single receive loop.
+    On Linux an unprivileged SOCK_DGRAM ICMP socket is used when allowed
+    (see net.ipv4.ping_group_range), otherwise a raw socket, which needs
+    administrator privileges.
+    """
+
+    # Identifiers of the open checkers in this process; every raw socket sees
+    # every echo reply, so each checker needs its own
+    _identifiers_in_use = set()
+    _identifiers_lock = threading.Lock()
+
+    def __init__(self, timeout=1.0, resolver=None):
+        self.timeout = timeout
+        self.resolver = resolver
+        self.sock, self.is_dgram = self._open_socket()
+        with self._identifiers_lock:
+            identifier = random.getrandbits(16)
+            while identifier in self._identifiers_in_use:
+                identifier = random.getrandbits(16)
+            self._identifiers_in_use.add(identifier)
+        self.identifier = identifier
+        self._sequence = random.getrandbits(16)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _open_socket():
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+            is_dgram = True
+        except OSError:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+            is_dgram = False
+        sock.setblocking(False)
+        return sock, is_dgram
+
+    @staticmethod
+    def _checksum(data):
+        if len(data) % 2:
+            data += b"\x00"
+        total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+        total = (total >> 16) + (total & 0xFFFF)
+        total += total >> 16
+        return ~total & 0xFFFF
+
+    def _build_echo(self, sequence):
+        payload = b"network-monitor\x00"
+        header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, self.identifier, sequence)
+        checksum = self._checksum(header + payload)
+        return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, self.identifier, sequence) + payload
+
+    def _next_sequence(self):
+        self._sequence = (self._sequence + 1) & 0xFFFF
+        return self._sequence
+
+    def _parse_reply(self, packet):
+        """Return the sequence number of an echo reply meant for us, or None"""
+        # Raw sockets (and DGRAM sockets on macOS) deliver the IP header too
+        if packet and packet[0] >> 4 == 4:
+            packet = packet[(packet[0] & 0x0F) * 4:]
+        if len(packet) < 8:
+            return None
+        icmp_type, _, _, identifier, sequence = struct.unpack("!BBHHH", packet[:8])
+        if icmp_type != ICMP_ECHO_REPLY:
+            return None
+        # The kernel rewrites the identifier of DGRAM echo requests, and only
+        # hands that socket its own replies, so only raw sockets check it
+        if not self.is_dgram and identifier != self.identifier:
+            return None
+        return sequence
+
+    def check(self, server: str) -> PingResult:
+        return self.check_many([server])[0]
+
+    def check_many(self, servers, max_concurrency=None):
+        """Probe all servers with one burst of echo requests and one receive loop.
+
+        max_concurrency is accepted for interface compatibility with
+        NetworkChecker; a single socket has no per-probe threads to cap.
+        """
+        with self._lock:
+            return self._probe_batch(servers)
+
+    def _probe_batch(self, servers):
+        results = [None] * len(servers)
+        pending = {}  # sequence -> (index, send time)
+        resolved = {}  # index -> (resolve ms, resolve error), when either is set
+
+        for index, server in enumerate(servers):
+            try:
+                if self.resolver is not None:
+                    address, resolve_ms, resolve_error = self.resolver.resolve(server)
+                    if address is None:
+                        results[index] = _resolve_failed(server, resolve_ms, resolve_error)
+                        continue
+                    if resolve_ms or resolve_error:
+                        resolved[index] = (resolve_ms, resolve_error)
+                else:
+                    address = socket.gethostbyname(server)
+                sequence = self._next_sequence()
+                sent_at = time.perf_counter()
+                self.sock.sendto(self._build_echo(sequence), (address, 0))
+                pending[(address, sequence)] = (index, sent_at)
+            except Exception as e:
+                results[index] = self._error_result(server, e)
+
+        deadline = time.perf_counter() + self.timeout
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([self.sock], [], [], remaining)
+            if not readable:
+                break
+            # Drain everything that is queued before going back to select
+            while True:
+                try:
+                    packet, source = self.sock.recvfrom(2048)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    break
+                received_at = time.perf_counter()
+                # A reply only counts from the address the request went to
+                entry = pending.pop((source[0], self._parse_reply(packet)), None)
+                if entry is None:
+                    continue
+                index, sent_at = entry
+                results[index] = PingResult.connected(servers[index], round((received_at - sent_at) * 1000, 2))
+
+        for index, _ in pending.values():
+            results[index] = PingResult.lost(servers[index])
+        for index, (resolve_ms, resolve_error) in resolved.items():
+            result = results[index]
+            if result.detail is None:
+                result.detail = ResultDetail()
+            if resolve_ms:
+                result.detail.timings = {'resolve': resolve_ms}
+            result.detail.resolve_error = resolve_error
+        return results
+
+    @staticmethod
+    def _error_result(server, error):
+        return PingResult.error(server, str(error))
+
+    def close(self):
+        self.sock.close()
+        with self._identifiers_lock:
+            self._identifiers_in_use.discard(self.identifier)
+        if self.resolver is not None:
+            self.resolver.close()
+
+
+def create_checker(settings, timeout=None):
+    """Build the checker selected by the 'backend' setting ('ping3' or 'icmp').
+
+    Hostnames probed by the backend are resolved through a ResolverCache
+    unless 'dns_cache' is disabled. URL targets (tcp://, dns://,
+    http(s)://) are always handled by the probe plugins; the backend only
+    probes plain hosts. timeout (seconds) replaces the probe timeout of the
+    backend and the plugins alike.
+    """
+    from src.core.probes import PluginChecker, default_plugins
+
+    resolver = None
+    cache = settings.get('dns_cache', {})
+    if cache.get('enabled', True):
+        resolver = ResolverCache(cache.get('default_ttl', 300), cache.get('min_ttl', 5), cache.get('max_ttl', 3600),
+                                 max_stale=cache.get('max_stale', 86400), timeout=cache.get('timeout', 2.0))
+    base = None
+    if settings.get('backend', 'ping3') == 'icmp':
+        try:
+            base = IcmpChecker(timeout if timeout is not None else 1.0, resolver)
+        except OSError as e:
+            print(f"ICMP socket backend unavailable ({e}), falling back to ping3")
+    if base is None:
+        base = NetworkChecker(resolver)
+        if timeout is not None:
+            base.timeout = timeout
+    options = settings.get('probes', {})
+    if timeout is None:
+        timeout = options.get('timeout', 2.0)
+    return PluginChecker(base, default_plugins(timeout, options), timeout)
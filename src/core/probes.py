@@ -0,0 +1,389 @@
+"""Probe plugins for targets written as URLs.
+
+    tcp://host:port                 TCP handshake time
+    dns://resolver[:port]/name      DNS query to a specific resolver (?type=A, AAAA, ...)
+    dns:///name                     lookup through the system resolver
+    http://host[:port]/path         HEAD request over a pooled keep-alive connection
+    https://host[:port]/path        same over TLS
+
+Targets without a scheme keep using the ICMP checker. Every plugin runs on
+one asyncio event loop owned by PluginChecker, so a round of many probes
+costs coroutines rather than threads.
+"""
+import asyncio
+import random
+import socket
+import ssl
+import struct
+import threading
+import time
+from urllib.parse import parse_qs, quote, urlsplit
+
+from src.core.network import DNS_RCODES, PingResult, build_dns_query
+
+DNS_TYPES = {"A": 1, "NS": 2, "CNAME": 5, "MX": 15, "TXT": 16, "AAAA": 28}
+USER_AGENT = "network-monitor/1.0"
+# Characters left as they are in request paths and queries (RFC 3986 pchar plus existing escapes)
+URL_SAFE = "/%:@!$&'()*+,;=-._~"
+
+
+def target_scheme(target):
+    """Lower-case scheme of a URL target, or None for a plain host"""
+    scheme, separator, _ = target.partition("://")
+    return scheme.lower() if separator else None
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def _connected(target, elapsed_ms, timings=None):
+    return PingResult.connected(target, round(elapsed_ms, 2), timings)
+
+
+def _lost(target, timings=None):
+    return PingResult.lost(target, timings)
+
+
+def _failed(target, error, timings=None):
+    return PingResult.error(target, error, timings)
+
+
+class ProbePlugin:
+    """Base class of probe types; one instance serves every target of its schemes.
+
+    probe() runs on the shared event loop and returns a PingResult whose
+    ping_time is the duration of the whole probe; phase durations go in
+    PingResult.timings (milliseconds).
+    """
+    schemes = ()
+
+    def __init__(self, timeout=1.0):
+        self.timeout = timeout
+
+    async def probe(self, target):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class TcpProbe(ProbePlugin):
+    """Time to complete a TCP handshake; the connection is closed right away"""
+    schemes = ("tcp",)
+
+    async def probe(self, target):
+        parts = urlsplit(target)
+        if not parts.hostname or not parts.port:
+            return _failed(target, "tcp targets need a host and a port")
+        started = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(parts.hostname, parts.port), self.timeout)
+        except asyncio.TimeoutError:
+            return _lost(target)
+        except OSError as e:
+            return _failed(target, str(e))
+        elapsed = _elapsed_ms(started)
+        writer.close()
+        return _connected(target, elapsed, {"connect": elapsed})
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self, query_id):
+        self.query_id = query_id
+        self.response = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        # Only the reply to our query (matching id, QR bit set) counts
+        if (len(data) >= 12 and not self.response.done()
+                and struct.unpack("!H", data[:2])[0] == self.query_id and data[2] & 0x80):
+            self.response.set_result(data)
+
+    def error_received(self, exc):
+        if not self.response.done():
+            self.response.set_exception(exc)
+
+
+class DnsProbe(ProbePlugin):
+    """DNS query time; a failed lookup is an error, not a lost connection"""
+    schemes = ("dns",)
+
+    async def probe(self, target):
+        parts = urlsplit(target)
+        name = parts.path.lstrip("/")
+        record = parse_qs(parts.query).get("type", ["A"])[0].upper()
+        if not name:
+            return _failed(target, "dns targets need a name to look up")
+        if record not in DNS_TYPES:
+            return _failed(target, f"unsupported DNS record type {record}")
+        if not parts.hostname:
+            if record not in ("A", "AAAA"):
+                # getaddrinfo() only resolves addresses
+                return _failed(target, f"the system resolver only looks up A and AAAA records, not {record}")
+            return await self._system_lookup(target, name, record)
+
+        loop = asyncio.get_running_loop()
+        query_id = random.getrandbits(16)
+        started = time.perf_counter()
+        transport = None
+        try:
+            transport, protocol = await loop.create_datagram_endpoint(
+                lambda: _DnsProtocol(query_id), remote_addr=(parts.hostname, parts.port or 53))
+            transport.sendto(build_dns_query(query_id, name, DNS_TYPES[record]))
+            response = await asyncio.wait_for(protocol.response, self.timeout)
+        except asyncio.TimeoutError:
+            return _lost(target)
+        except OSError as e:
+            return _failed(target, str(e))
+        finally:
+            if transport is not None:
+                transport.close()
+        elapsed = _elapsed_ms(started)
+        timings = {"query": elapsed}
+        rcode = response[3] & 0x0F
+        if rcode:
+            return _failed(target, f"DNS {DNS_RCODES.get(rcode, rcode)}", timings)
+        if not struct.unpack("!H", response[6:8])[0]:
+            return _failed(target, "DNS returned no answer", timings)
+        return _connected(target, elapsed, timings)
+
+    async def _system_lookup(self, target, name, record):
+        family = socket.AF_INET6 if record == "AAAA" else socket.AF_INET
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.get_running_loop().getaddrinfo(name, None, family=family), self.timeout)
+        except asyncio.TimeoutError:
+            return _lost(target)
+        except OSError as e:
+            return _failed(target, f"DNS {e}")
+        elapsed = _elapsed_ms(started)
+        return _connected(target, elapsed, {"query": elapsed})
+
+
+class HttpProbe(ProbePlugin):
+    """HEAD request over keep-alive connections pooled per host.
+
+    A new connection reports connect and (for https) tls timings; every
+    probe reports first_byte, the time from sending the request to reading
+    the status line. Statuses of 400 and above count as errors.
+    """
+    schemes = ("http", "https")
+
+    def __init__(self, timeout=1.0, max_idle_per_host=2):
+        super().__init__(timeout)
+        self.max_idle_per_host = max_idle_per_host
+        self.ssl_context = ssl.create_default_context()
+        self._idle = {}  # (scheme, host, port) -> [(reader, writer), ...]
+
+    async def probe(self, target):
+        parts = urlsplit(target)
+        if not parts.hostname:
+            return _failed(target, "http targets need a host")
+        timings = {}
+        started = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(self._probe(parts, timings), self.timeout)
+        except asyncio.TimeoutError:
+            return _lost(target, timings)
+        except (OSError, ssl.SSLError, ValueError, asyncio.IncompleteReadError) as e:
+            return _failed(target, str(e), timings)
+        elapsed = _elapsed_ms(started)
+        if status >= 400:
+            return _failed(target, f"HTTP {status}", timings)
+        return _connected(target, elapsed, timings)
+
+    async def _probe(self, parts, timings):
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        # Only the host name is IDNA-encoded; the path is percent-quoted so the
+        # request line stays ASCII
+        path = quote(parts.path or "/", safe=URL_SAFE)
+        if parts.query:
+            path += "?" + quote(parts.query, safe=URL_SAFE + "?")
+        host = parts.hostname.encode("idna").decode("ascii")
+        if ":" in host:
+            host = f"[{host}]"  # IPv6 literal
+        if parts.port:
+            host += f":{parts.port}"
+        request = (f"HEAD {path} HTTP/1.1\r\nHost: {host}\r\n"
+                   f"User-Agent: {USER_AGENT}\r\nAccept: */*\r\nConnection: keep-alive\r\n\r\n").encode("ascii")
+
+        # Try idle connections first; the server may have closed them meanwhile
+        idle = self._idle.get(key, [])
+        while idle:
+            reader, writer = idle.pop()
+            if reader.at_eof() or writer.is_closing():
+                writer.close()
+                continue
+            try:
+                return await self._request(key, reader, writer, request, timings)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                continue  # Stale connection; _request closed it
+
+        reader, writer = await self._connect(scheme, parts.hostname, port, timings)
+        return await self._request(key, reader, writer, request, timings)
+
+    async def _connect(self, scheme, host, port, timings):
+        started = time.perf_counter()
+        if scheme == "https" and not hasattr(asyncio.StreamWriter, "start_tls"):
+            # Python < 3.11 cannot upgrade a stream, so connect includes the handshake
+            connection = await asyncio.open_connection(host, port, ssl=self.ssl_context, server_hostname=host)
+            timings["connect"] = _elapsed_ms(started)
+            return connection
+        reader, writer = await asyncio.open_connection(host, port)
+        timings["connect"] = _elapsed_ms(started)
+        if scheme == "https":
+            started = time.perf_counter()
+            try:
+                await writer.start_tls(self.ssl_context, server_hostname=host)
+            except BaseException:
+                writer.close()
+                raise
+            timings["tls"] = _elapsed_ms(started)
+        return reader, writer
+
+    async def _request(self, key, reader, writer, request, timings):
+        """Send a HEAD request and read the response head; returns the status code"""
+        pooled = False
+        try:
+            writer.write(request)
+            await writer.drain()
+            sent = time.perf_counter()
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("Connection closed by server")
+            timings["first_byte"] = _elapsed_ms(sent)
+            version, status = status_line.split(None, 2)[:2]
+            keep_alive = version != b"HTTP/1.0"
+            while True:
+                line = await reader.readline()
+                if not line:
+                    keep_alive = False
+                    break
+                if line in (b"\r\n", b"\n"):
+                    break
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"connection":
+                    keep_alive = value.strip().lower() == b"keep-alive" or (
+                        keep_alive and value.strip().lower() != b"close")
+            # HEAD responses have no body, so the connection is ready for reuse
+            idle = self._idle.setdefault(key, [])
+            if keep_alive and len(idle) < self.max_idle_per_host:
+                idle.append((reader, writer))
+                pooled = True
+            return int(status)
+        finally:
+            if not pooled:
+                writer.close()
+
+    async def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+def default_plugins(timeout=1.0, settings=None):
+    settings = settings or {}
+    return [
+        TcpProbe(timeout),
+        DnsProbe(timeout),
+        HttpProbe(timeout, settings.get('http_pool_size', 2)),
+    ]
+
+
+class PluginChecker:
+    """Checker that sends URL targets to probe plugins and plain hosts to a base checker.
+
+    The plugins share one asyncio event loop on a background thread, started
+    the first time a URL target is probed. Within a round the plugin probes
+    and the base checker's probes run at the same time, sharing
+    max_concurrency in proportion to their number of targets, and results
+    come back in the order of the servers passed in.
+    """
+
+    def __init__(self, base, plugins=None, timeout=1.0):
+        self.base = base
+        self.timeout = timeout
+        self.plugins = {}
+        for plugin in plugins if plugins is not None else default_plugins(timeout):
+            self.register(plugin)
+        self._loop = None
+        self._thread = None
+
+    def register(self, plugin):
+        for scheme in plugin.schemes:
+            self.plugins[scheme] = plugin
+
+    def _event_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="ProbeLoop", daemon=True)
+            self._thread.start()
+        return self._loop
+
+    def set_timeout(self, timeout):
+        """Change the probe timeout (seconds) of the base checker and every plugin"""
+        self.timeout = timeout
+        self.base.timeout = timeout
+        for plugin in self.plugins.values():
+            plugin.timeout = timeout
+
+    def check(self, server):
+        return self.check_many([server])[0]
+
+    def check_many(self, servers, max_concurrency=16):
+        plugin_targets = [(i, server) for i, server in enumerate(servers) if target_scheme(server) is not None]
+        if not plugin_targets:
+            return self.base.check_many(servers, max_concurrency)
+
+        plain = [(i, server) for i, server in enumerate(servers) if target_scheme(server) is None]
+        limit = max(1, int(max_concurrency))
+        plugin_limit = max(1, limit * len(plugin_targets) // len(servers)) if plain else limit
+        future = asyncio.run_coroutine_threadsafe(
+            self._probe_all([server for _, server in plugin_targets], plugin_limit), self._event_loop())
+        results = [None] * len(servers)
+        if plain:
+            if limit == 1:
+                # No room for both at once: the base probes wait for the plugins
+                future.result()
+            base_results = self.base.check_many([server for _, server in plain], max(1, limit - plugin_limit))
+            for (i, _), result in zip(plain, base_results):
+                results[i] = result
+        for (i, _), result in zip(plugin_targets, future.result()):
+            results[i] = result
+        return results
+
+    async def _probe_all(self, targets, max_concurrency):
+        semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+
+        async def run(target):
+            plugin = self.plugins.get(target_scheme(target))
+            if plugin is None:
+                return _failed(target, f"unsupported probe type {target_scheme(target)}")
+            async with semaphore:
+                try:
+                    return await plugin.probe(target)
+                except Exception as e:
+                    return _failed(target, str(e))
+
+        return await asyncio.gather(*(run(target) for target in targets))
+
+    async def _close_plugins(self):
+        for plugin in set(self.plugins.values()):
+            await plugin.close()
+
+    def close(self):
+        self.base.close()
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_plugins(), self._loop).result(self.timeout)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(2.0)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
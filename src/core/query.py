@@ -0,0 +1,185 @@
+import csv
+import gzip
+import io
+import math
+from collections import namedtuple
+from datetime import datetime, timedelta
+from src.core.stats import LatencySketch
+from src.utils.log_index import TIMESTAMP_LENGTH, list_segments, load_index, timestamp_key
+
+
+class LogRow(namedtuple("LogRow", ["key", "timestamp", "server", "ping_time", "status"])):
+    """One row of the CSV log; ping_time is NaN for failed probes"""
+    __slots__ = ()
+
+    @property
+    def is_connected(self):
+        return self.status == "Connected"
+
+    @property
+    def datetime(self):
+        return datetime.strptime(self.timestamp, "%Y-%m-%d %H:%M:%S")
+
+
+def _text(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def _parse_fields(line):
+    if '"' in line:
+        return next(csv.reader((line,)))
+    # Fast path: only the status can contain commas, and then it is quoted
+    return line.rstrip("\r\n").split(",", 3)
+
+
+class LogQuery:
+    """Time range queries over network_log.csv and its rotated segments.
+
+    Every segment, including the gzip-compressed ones, has a sparse
+    timestamp -> offset index kept next to it (built or extended on first
+    use), so a query skips whole segments outside the range and seeks
+    straight to the first relevant block of the others. Rows and
+    aggregates are produced by generators without loading whole files.
+    Bounds are datetimes or "YYYY-mm-dd HH:MM:SS" strings in the log's
+    local time; start is inclusive, end exclusive.
+    """
+
+    def __init__(self, log_file="network_log.csv"):
+        self.log_file = log_file
+
+    def segments(self):
+        return list_segments(self.log_file)
+
+    def rows(self, start=None, end=None, server=None):
+        """Yield LogRows in time order"""
+        start_text, end_text = _text(start), _text(end)
+        start_key = timestamp_key(start_text) if start_text is not None else None
+        end_key = timestamp_key(end_text) if end_text is not None else None
+
+        for segment in self.segments():
+            try:
+                index = load_index(segment)
+            except OSError:
+                continue  # Rotated away while we were listing
+            if index.first_key is None:
+                continue
+            if start_key is not None and index.last_key < start_key:
+                continue
+            if end_key is not None and index.first_key >= end_key:
+                break
+
+            offset = index.seek_offset(start_key) if start_key is not None else 0
+            for row in self._read_segment(segment, index.compressed, offset, start_text, end_text, server):
+                if row is None:
+                    return
+                yield row
+
+    def _read_segment(self, segment, compressed, offset, start_text, end_text, server):
+        """Yield rows of one segment from offset; yields None once past end_text"""
+        with open(segment, 'rb') as raw:
+            raw.seek(offset)
+            stream = gzip.GzipFile(fileobj=raw) if compressed else raw
+            text = io.TextIOWrapper(stream, newline='')
+            last_stamp, key = None, None
+            for line in text:
+                if line.startswith("Timestamp,") or not line.endswith("\n"):
+                    continue
+                # Fixed-width timestamps compare correctly as strings, so
+                # rows are filtered before they are parsed
+                stamp = line[:TIMESTAMP_LENGTH]
+                if start_text is not None and stamp < start_text:
+                    continue
+                if end_text is not None and stamp >= end_text:
+                    yield None
+                    return
+                fields = _parse_fields(line)
+                if len(fields) < 4 or (server is not None and fields[1] != server):
+                    continue
+                if stamp != last_stamp:
+                    # Many rows share a second; parse each one once
+                    try:
+                        key = timestamp_key(stamp)
+                    except ValueError:
+                        continue
+                    last_stamp = stamp
+                ping = fields[2]
+                try:
+                    ping_time = math.nan if ping == "N/A" else float(ping)
+                except ValueError:
+                    continue  # A truncated or hand-edited row
+                yield LogRow(key, stamp, fields[1], ping_time, fields[3])
+
+    def aggregate(self, start=None, end=None, bucket_seconds=60, server=None, by_server=True,
+                  percentiles=(50, 95, 99)):
+        """Yield one summary dict per time bucket (and per server if by_server).
+
+        Each dict holds bucket start, server, count, lost, loss and the
+        min/avg/max and requested percentiles of the latency of answered
+        probes. Buckets are emitted as soon as the rows move past them.
+        """
+        current = None
+        groups = {}
+        for row in self.rows(start, end, server):
+            bucket = row.key - row.key % bucket_seconds
+            if bucket != current:
+                if current is not None:
+                    yield from self._emit(current, groups, percentiles)
+                current = bucket
+                groups = {}
+            group_key = row.server if by_server else None
+            group = groups.get(group_key)
+            if group is None:
+                group = groups[group_key] = _Bucket()
+            group.add(row)
+        if current is not None:
+            yield from self._emit(current, groups, percentiles)
+
+    @staticmethod
+    def _emit(bucket, groups, percentiles):
+        # Keys count local time as if it were UTC, so undo that the same way
+        bucket_start = datetime(1970, 1, 1) + timedelta(seconds=bucket)
+        for server, group in groups.items():
+            yield group.summary(bucket_start, server, percentiles)
+
+
+class _Bucket:
+    __slots__ = ("count", "lost", "minimum", "maximum", "total", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self.lost = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.total = 0.0
+        self.sketch = LatencySketch()
+
+    def add(self, row):
+        self.count += 1
+        if math.isnan(row.ping_time):
+            self.lost += 1
+            return
+        latency = row.ping_time
+        self.total += latency
+        if latency < self.minimum:
+            self.minimum = latency
+        if latency > self.maximum:
+            self.maximum = latency
+        self.sketch.add(latency)
+
+    def summary(self, bucket_start, server, percentiles):
+        answered = self.count - self.lost
+        summary = {
+            "bucket": bucket_start,
+            "server": server,
+            "count": self.count,
+            "lost": self.lost,
+            "loss": self.lost / self.count if self.count else math.nan,
+            "min": self.minimum if answered else math.nan,
+            "avg": self.total / answered if answered else math.nan,
+            "max": self.maximum if answered else math.nan,
+        }
+        for p in percentiles:
+            summary[f"p{p}"] = self.sketch.quantile(p / 100)
+        return summary
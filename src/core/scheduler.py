@@ -0,0 +1,110 @@
+import math
+import random
+import time
+
+
+class _TargetSchedule:
+    __slots__ = ("nominal", "due", "interval")
+
+    def __init__(self, nominal, interval):
+        self.nominal = nominal
+        self.due = nominal
+        self.interval = interval
+
+
+class ProbeScheduler:
+    """Keeps per-target probe deadlines on an absolute monotonic timeline.
+
+    Each target owns a nominal deadline that advances by its interval, so
+    probe duration never accumulates as drift. Targets are phase-shifted
+    across the base interval and each tick gets a little jitter, so many
+    targets do not fire at the same instant. The interval adapts per target:
+    it backs off during long healthy streaks and drops to the fast interval
+    as soon as a probe fails or crosses the poor connection threshold.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.targets = {}
+        self.last_lag = 0.0
+
+    def _options(self):
+        options = self.config.settings.get('scheduler', {})
+        return {
+            'adaptive': options.get('adaptive', True),
+            'healthy_streak': max(1, options.get('healthy_streak', 60)),
+            'max_backoff': max(1, options.get('max_backoff', 4)),
+            'fast_interval': options.get('fast_interval', 250) / 1000.0,
+            'jitter': options.get('jitter', 0.05),
+        }
+
+    @property
+    def base_interval(self):
+        return max(0.01, self.config.settings['check_interval'] / 1000.0)
+
+    def sync(self, targets, now=None):
+        """Add new targets (spread over one interval) and drop removed ones"""
+        if now is None:
+            now = time.monotonic()
+        for server in list(self.targets):
+            if server not in targets:
+                del self.targets[server]
+
+        new_targets = [server for server in targets if server not in self.targets]
+        base = self.base_interval
+        for i, server in enumerate(new_targets):
+            # The first new target fires immediately, the rest are spread
+            # evenly over one interval
+            self.targets[server] = _TargetSchedule(now + base * i / len(new_targets), base)
+
+    def reset(self, now=None):
+        """Make every target due now, e.g. after monitoring is resumed"""
+        targets = list(self.targets)
+        self.targets.clear()
+        self.sync(targets, now)
+
+    def next_deadline(self):
+        if not self.targets:
+            return None
+        return min(schedule.due for schedule in self.targets.values())
+
+    def pop_due(self, now=None):
+        """Return targets that are due, including those due within a short
+        window so that batching backends can send them together"""
+        if now is None:
+            now = time.monotonic()
+        window = min(0.02, self.base_interval * 0.05)
+        due = [server for server, schedule in self.targets.items() if schedule.due <= now + window]
+        if due:
+            self.last_lag = max(0.0, now - min(self.targets[server].due for server in due))
+        return due
+
+    def record(self, result, streak=0, now=None):
+        """Schedule the next probe of result.server based on its outcome"""
+        schedule = self.targets.get(result.server)
+        if schedule is None:
+            return
+        if now is None:
+            now = time.monotonic()
+        options = self._options()
+        base = self.base_interval
+
+        threshold = self.config.settings.get('notifications', {}).get('poor_connection_threshold', 200)
+        degraded = not result.is_connected or (
+            not math.isnan(result.ping_time) and result.ping_time > threshold)
+
+        if degraded:
+            interval = min(base, options['fast_interval'])
+        elif options['adaptive'] and streak >= options['healthy_streak']:
+            factor = min(options['max_backoff'], 2 ** (streak // options['healthy_streak']))
+            interval = base * factor
+        else:
+            interval = base
+        schedule.interval = interval
+
+        schedule.nominal += interval
+        if schedule.nominal <= now:
+            # Fell behind (or the interval shrank): skip missed ticks instead
+            # of firing a catch-up burst
+            schedule.nominal = now
+        schedule.due = schedule.nominal + random.uniform(0, interval * options['jitter'])
@@ -0,0 +1,284 @@
+"""Sharded probing: targets are split over worker processes, each running
+its own ProbeEngine and checker, so probing is not bound by one GIL.
+
+Workers stream results back over pipes as packed batches instead of
+pickled PingResults: a header, one fixed-size record per result and the
+error text of error results only.
+
+    batch    = BATCH_HEADER (targets generation, record count)
+               + count * RECORD (target index, epoch timestamp, ping ms, status code)
+               + NUL-separated UTF-8 error text of the ERROR records, in order
+
+Target indexes refer to the worker's target list of that generation, which
+the parent sent with the settings; the parent turns records back into
+PingResults for the normal pipeline.
+"""
+import multiprocessing
+import struct
+import threading
+import time
+import zlib
+from multiprocessing.connection import wait
+
+from src.core.network import (STATUS_CODES, PingResult, ResultDetail, StatusCode, create_checker, target_id,
+                              wall_offset_ns)
+from src.utils.metrics import Metrics
+
+BATCH_HEADER = struct.Struct("<II")
+RECORD = struct.Struct("<IddB")
+
+
+def shard_of(server, workers):
+    """Stable shard index of a target; the same in every process and run"""
+    return zlib.crc32(server.encode()) % workers
+
+
+def encode_batch(generation, indexes, results):
+    """Pack results (with their target indexes) into one batch"""
+    records = []
+    details = []
+    for index, result in zip(indexes, results):
+        code = result.code
+        records.append(RECORD.pack(index, result.wall_time, result.latency, code))
+        if code == StatusCode.ERROR:
+            details.append(result.detail.error)
+    return BATCH_HEADER.pack(generation, len(records)) + b"".join(records) + "\0".join(details).encode()
+
+
+def decode_batch(payload, names):
+    """PingResults of a batch; names is the target list of the batch's generation"""
+    _, count = BATCH_HEADER.unpack_from(payload)
+    end = BATCH_HEADER.size + count * RECORD.size
+    details = iter(payload[end:].decode().split("\0"))
+    offset = wall_offset_ns()
+    results = []
+    for index, timestamp, ping_time, code in RECORD.iter_unpack(payload[BATCH_HEADER.size:end]):
+        detail = ResultDetail(next(details)) if code == StatusCode.ERROR else None
+        results.append(PingResult(target_id(names[index]), ping_time, STATUS_CODES[code], detail,
+                                  int(timestamp * 1e9) - offset, offset))
+    return results
+
+
+class _ShardConfig:
+    """The slice of Config a worker's ProbeEngine reads"""
+
+    def __init__(self, settings, targets):
+        self.settings = settings
+        self.targets = targets
+
+    def get_targets(self):
+        return self.targets
+
+
+class _Streak:
+    __slots__ = ("current_streak",)
+
+    def __init__(self):
+        self.current_streak = 0
+
+
+def _worker_main(connection, settings, targets, generation, checker_factory, batch_rows, flush_interval):
+    """Entry point of a worker process"""
+    # Imported here so the parent does not need it at import time
+    from src.core.engine import ProbeEngine
+
+    config = _ShardConfig(settings, targets)
+    indexes = {server: i for i, server in enumerate(targets)}
+    streaks = {}
+    pending = []
+    lock = threading.Lock()
+
+    def flush():
+        with lock:
+            # Results of targets moved to another shard since they were queued
+            # are dropped; the indexes are those of the current generation
+            results = [result for result in pending if result.server in indexes]
+            pending.clear()
+            if not results:
+                return
+            batch = encode_batch(generation, [indexes[result.server] for result in results], results)
+            connection.send_bytes(batch)
+
+    def on_result(result):
+        streak = streaks.get(result.server)
+        if streak is None:
+            streak = streaks[result.server] = _Streak()
+        streak.current_streak = streak.current_streak + 1 if result.is_connected else 0
+        with lock:
+            if result.server not in indexes:
+                return  # Target moved to another shard since this probe started
+            pending.append(result)
+            full = len(pending) >= batch_rows
+        if full:
+            flush()
+
+    engine = ProbeEngine(checker_factory(settings), config, on_result, streaks)
+    engine.start()
+    try:
+        while True:
+            if connection.poll(flush_interval):
+                command, *arguments = connection.recv()
+                if command == "stop":
+                    break
+                if command == "pause":
+                    engine.pause()
+                elif command == "resume":
+                    engine.resume()
+                elif command == "config":
+                    flush()
+                    with lock:
+                        settings, targets, generation = arguments
+                        config.settings = settings
+                        config.targets = targets
+                        indexes = {server: i for i, server in enumerate(targets)}
+                    engine.poke()
+            flush()
+    except (EOFError, OSError):
+        pass  # Parent went away
+    finally:
+        engine.stop()
+        try:
+            flush()
+        except (OSError, ValueError):
+            pass
+
+
+class _Worker:
+    __slots__ = ("process", "connection", "targets", "generations")
+
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+        self.targets = []
+        # Target lists by generation, kept until a newer generation arrives
+        self.generations = {}
+
+
+class ShardedEngine:
+    """Drop-in for ProbeEngine that probes from worker processes.
+
+    Targets are hashed over `workers` processes (spawned, so it is safe to
+    use from the Qt application), each running a ProbeEngine with a checker
+    from checker_factory(settings). A receiver thread decodes the batches
+    and passes every PingResult to on_result, like the engine thread does.
+    Settings and targets are pushed to the workers on poke(); the number of
+    workers only changes on restart.
+    """
+
+    def __init__(self, config, on_result, workers, metrics=None, checker_factory=create_checker,
+                 batch_rows=256, flush_interval=0.05):
+        self.config = config
+        self.on_result = on_result
+        self.worker_count = max(1, int(workers))
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.checker_factory = checker_factory
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self._workers = []
+        self._generation = 0
+        self._paused = False
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.first_probe_at = None
+
+    def _split(self, targets):
+        shards = [[] for _ in range(self.worker_count)]
+        for server in targets:
+            shards[shard_of(server, self.worker_count)].append(server)
+        return shards
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        context = multiprocessing.get_context("spawn")
+        settings = dict(self.config.settings)
+        self._generation += 1
+        for targets in self._split(self.config.get_targets()):
+            parent_end, child_end = context.Pipe()
+            process = context.Process(
+                target=_worker_main, name="ProbeShard", daemon=True,
+                args=(child_end, settings, targets, self._generation, self.checker_factory, self.batch_rows,
+                      self.flush_interval))
+            process.start()
+            child_end.close()
+            worker = _Worker(process, parent_end)
+            worker.targets = targets
+            worker.generations[self._generation] = targets
+            self._workers.append(worker)
+        self._thread = threading.Thread(target=self._receive, name="ProbeShards", daemon=True)
+        self._thread.start()
+
+    def _send(self, worker, message):
+        try:
+            worker.connection.send(message)
+        except (OSError, ValueError):
+            pass  # Worker died; its results simply stop arriving
+
+    def stop(self, timeout=2.0):
+        """Stop the workers, letting them flush their last batch, then the receiver"""
+        for worker in self._workers:
+            self._send(worker, ("stop",))
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        for worker in self._workers:
+            worker.connection.close()
+        self._workers = []
+
+    def pause(self):
+        self._paused = True
+        for worker in self._workers:
+            self._send(worker, ("pause",))
+
+    def resume(self):
+        self._paused = False
+        for worker in self._workers:
+            self._send(worker, ("resume",))
+
+    def poke(self):
+        """Push the current settings and targets to every worker"""
+        settings = dict(self.config.settings)
+        with self._lock:
+            self._generation += 1
+            for worker, targets in zip(self._workers, self._split(self.config.get_targets())):
+                worker.targets = targets
+                worker.generations[self._generation] = targets
+                self._send(worker, ("config", settings, targets, self._generation))
+
+    def _receive(self):
+        connections = {worker.connection: worker for worker in self._workers}
+        metrics = self.metrics
+        while connections and not self._stopped.is_set():
+            for connection in wait(list(connections), 0.2):
+                worker = connections[connection]
+                try:
+                    payload = connection.recv_bytes()
+                except (EOFError, OSError):
+                    del connections[connection]
+                    continue
+                started = metrics.clock()
+                generation = BATCH_HEADER.unpack_from(payload)[0]
+                with self._lock:
+                    names = worker.generations.get(generation)
+                    for old in [g for g in worker.generations if g < generation]:
+                        del worker.generations[old]
+                if names is None:
+                    continue
+                results = decode_batch(payload, names)
+                if started:
+                    metrics.add("shard_decode", metrics.clock() - started, len(results))
+                if self.first_probe_at is None:
+                    self.first_probe_at = time.monotonic()
+                if self._paused:
+                    metrics.increment("results_dropped_paused", len(results))
+                    continue
+                for result in results:
+                    self.on_result(result)
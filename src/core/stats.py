@@ -0,0 +1,199 @@
+import math
+import time
+
+
+class LatencySketch:
+    """Mergeable quantile sketch with bounded memory (DDSketch-style).
+
+    Values are counted in logarithmic buckets so any quantile is returned
+    within `relative_accuracy` of the true value. Two sketches built with
+    the same accuracy merge by adding bucket counts. When more than
+    `max_buckets` buckets are in use, the lowest ones are collapsed, which
+    only costs accuracy at the very bottom of the distribution.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=1024):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        merged = sum(self.buckets.pop(key) for key in keys[:excess + 1])
+        self.buckets[keys[excess]] = merged
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def clear(self):
+        self.buckets.clear()
+        self.zero_count = 0
+        self.count = 0
+
+    def quantile(self, q):
+        """Return the q-quantile (0 <= q <= 1), or NaN if the sketch is empty"""
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(key-1), gamma^key]
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class WindowCounter:
+    """Probe and loss counts over a sliding time window, in fixed slots"""
+
+    def __init__(self, span, slots=60):
+        self.span = span
+        self.slots = slots
+        self.width = span / slots
+        self._ids = [-1] * slots
+        self._sent = [0] * slots
+        self._lost = [0] * slots
+
+    def add(self, timestamp, lost):
+        slot = int(timestamp // self.width)
+        index = slot % self.slots
+        if self._ids[index] != slot:
+            self._ids[index] = slot
+            self._sent[index] = 0
+            self._lost[index] = 0
+        self._sent[index] += 1
+        if lost:
+            self._lost[index] += 1
+
+    def totals(self, now):
+        oldest = int(now // self.width) - self.slots + 1
+        sent = lost = 0
+        for index, slot in enumerate(self._ids):
+            if slot >= oldest:
+                sent += self._sent[index]
+                lost += self._lost[index]
+        return sent, lost
+
+    def loss(self, now):
+        """Fraction of probes lost in the window, or NaN without probes"""
+        sent, lost = self.totals(now)
+        return lost / sent if sent else math.nan
+
+
+class TargetStats:
+    """Streaming statistics for one target, in constant memory.
+
+    Tracks counts and the current healthy streak, an EWMA of latency,
+    RFC 3550 interarrival jitter, latency percentiles over the last five
+    minutes (merged from per-minute sketches) and packet loss over sliding
+    1 minute, 5 minute and 1 hour windows.
+    """
+
+    LOSS_WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+    PERCENTILE_SPAN = 300
+    PERCENTILE_SLOTS = 5
+
+    def __init__(self, ewma_alpha=0.1):
+        self.ewma_alpha = ewma_alpha
+        self.total_checks = 0
+        self.failures = 0
+        self.current_streak = 0
+        self.ewma = math.nan
+        self.jitter = 0.0
+        self.last_latency = None
+        self.sketch = LatencySketch()
+        self._recent = [LatencySketch() for _ in range(self.PERCENTILE_SLOTS)]
+        self._recent_ids = [-1] * self.PERCENTILE_SLOTS
+        self.loss_windows = {name: WindowCounter(span) for name, span in self.LOSS_WINDOWS.items()}
+
+    def update(self, result, now=None):
+        if now is None:
+            now = time.monotonic()
+        self.total_checks += 1
+        lost = not result.is_connected
+        for window in self.loss_windows.values():
+            window.add(now, lost)
+
+        if lost:
+            self.failures += 1
+            self.current_streak = 0
+            self.last_latency = None
+            return
+        self.current_streak += 1
+
+        latency = result.latency
+        if math.isnan(self.ewma):
+            self.ewma = latency
+        else:
+            self.ewma += self.ewma_alpha * (latency - self.ewma)
+        if self.last_latency is not None:
+            # RFC 3550 section 6.4.1: J += (|D| - J) / 16
+            self.jitter += (abs(latency - self.last_latency) - self.jitter) / 16
+        self.last_latency = latency
+
+        self.sketch.add(latency)
+        slot = int(now // (self.PERCENTILE_SPAN / self.PERCENTILE_SLOTS))
+        index = slot % self.PERCENTILE_SLOTS
+        if self._recent_ids[index] != slot:
+            self._recent_ids[index] = slot
+            self._recent[index].clear()
+        self._recent[index].add(latency)
+
+    def recent_sketch(self, now=None):
+        """Merged sketch of the latencies from the last five minutes"""
+        if now is None:
+            now = time.monotonic()
+        oldest = int(now // (self.PERCENTILE_SPAN / self.PERCENTILE_SLOTS)) - self.PERCENTILE_SLOTS + 1
+        merged = LatencySketch()
+        for index, slot in enumerate(self._recent_ids):
+            if slot >= oldest:
+                merged.merge(self._recent[index])
+        return merged
+
+    def loss(self, window, now=None):
+        if now is None:
+            now = time.monotonic()
+        return self.loss_windows[window].loss(now)
+
+    def summary(self, now=None):
+        """Snapshot of the current statistics as a dict"""
+        if now is None:
+            now = time.monotonic()
+        recent = self.recent_sketch(now)
+        summary = {
+            "total_checks": self.total_checks,
+            "failures": self.failures,
+            "current_streak": self.current_streak,
+            "ewma": self.ewma,
+            "jitter": self.jitter,
+            "samples": recent.count,
+            "p50": recent.quantile(0.50),
+            "p95": recent.quantile(0.95),
+            "p99": recent.quantile(0.99),
+        }
+        for name in self.LOSS_WINDOWS:
+            summary[f"loss_{name}"] = self.loss(name, now)
+        return summary
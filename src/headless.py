@@ -0,0 +1,62 @@
+import argparse
+import json
+import signal
+import sys
+import threading
+from src.core.monitor import MonitorCore
+from src.utils.config import Config
+
+
+def main(argv=None):
+    """Run the monitor without a GUI; PyQt6 is never imported"""
+    parser = argparse.ArgumentParser(description="Network Monitor headless daemon")
+    parser.add_argument("--config", default="settings.json", help="settings file (default: settings.json)")
+    parser.add_argument("--server", action="append",
+                        help="server to monitor instead of the configured ones (repeatable)")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve OpenMetrics on this port, on exporter.host (default: 127.0.0.1)")
+    parser.add_argument("--collector", metavar="HOST:PORT",
+                        help="send results to a collector (agent mode)")
+    parser.add_argument("--agent-name", help="name reported to the collector (default: host name)")
+    parser.add_argument("--diagnostics", action="store_true",
+                        help="measure pipeline stage timings and print them as JSON on exit")
+    args = parser.parse_args(argv)
+
+    config = Config(args.config)
+    if args.server:
+        config.settings['server'] = args.server
+
+    if args.diagnostics:
+        config.settings['diagnostics'] = {'enabled': True}
+    if args.metrics_port is not None:
+        exporter = config.settings.get('exporter', {})
+        config.settings['exporter'] = {'enabled': True, 'host': exporter.get('host', '127.0.0.1'),
+                                       'port': args.metrics_port}
+
+    if args.collector:
+        host, _, port = args.collector.rpartition(":")
+        agent = dict(config.settings.get('agent', {}))
+        agent.update({'enabled': True, 'collector_host': host or '127.0.0.1', 'collector_port': int(port)})
+        if args.agent_name:
+            agent['name'] = args.agent_name
+        config.settings['agent'] = agent
+
+    monitor = MonitorCore(config)
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    monitor.start()
+    monitor.notify("info", f"Monitoring {', '.join(config.get_targets())} (headless)")
+    try:
+        stop.wait(args.duration)
+    finally:
+        monitor.shutdown()
+        if args.diagnostics:
+            print(json.dumps(monitor.metrics.snapshot(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
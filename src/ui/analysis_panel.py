@@ -0,0 +1,117 @@
+import math
+import threading
+from PyQt6.QtCore import QDateTime, pyqtSignal
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QDateTimeEdit, QTableWidget, QTableWidgetItem, QHeaderView)
+
+SUMMARY_COLUMNS = ["Server", "Availability", "Outages", "Downtime", "MTTR", "MTBF",
+                   "p50 (ms)", "p95 (ms)", "p99 (ms)"]
+OUTAGE_COLUMNS = ["Server", "Start", "End", "Duration"]
+MAX_OUTAGE_ROWS = 500
+
+
+class AnalysisPanel(QWidget):
+    """Outage/SLA report over the logged history.
+
+    The analysis reads every log segment in the selected range, so it runs
+    on a worker thread and the result is handed back through a signal.
+    """
+
+    analysis_ready = pyqtSignal(object)
+
+    def __init__(self, log_file="network_log.csv", parent=None):
+        super().__init__(parent)
+        self.log_file = log_file
+        self._worker = None
+        self.analysis_ready.connect(self.show_report)
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        now = QDateTime.currentDateTime()
+        self.start_input = QDateTimeEdit(now.addDays(-7))
+        self.end_input = QDateTimeEdit(now)
+        for edit in (self.start_input, self.end_input):
+            edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+            edit.setCalendarPopup(True)
+        self.run_button = QPushButton("Run analysis")
+        self.run_button.clicked.connect(self.run_analysis)
+        controls.addWidget(QLabel("From:"))
+        controls.addWidget(self.start_input)
+        controls.addWidget(QLabel("To:"))
+        controls.addWidget(self.end_input)
+        controls.addStretch()
+        controls.addWidget(self.run_button)
+        layout.addLayout(controls)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.summary_table = self._table(SUMMARY_COLUMNS)
+        self.outage_table = self._table(OUTAGE_COLUMNS)
+        layout.addWidget(QLabel("Per target:"))
+        layout.addWidget(self.summary_table)
+        layout.addWidget(QLabel("Longest outages:"))
+        layout.addWidget(self.outage_table)
+
+    @staticmethod
+    def _table(columns):
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        return table
+
+    def run_analysis(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        start = self.start_input.dateTime().toPyDateTime()
+        end = self.end_input.dateTime().toPyDateTime()
+        self.run_button.setEnabled(False)
+        self.status_label.setText("Analysing logs...")
+        self._worker = threading.Thread(target=self._analyse, args=(start, end),
+                                        name="log-analysis", daemon=True)
+        self._worker.start()
+
+    def _analyse(self, start, end):
+        try:
+            # Imported here so NumPy is only loaded when a report is requested
+            from src.core import analysis
+            data = analysis.report(analysis.load(self.log_file, start, end))
+        except Exception as e:
+            data = e
+        self.analysis_ready.emit(data)
+
+    def show_report(self, data):
+        self.run_button.setEnabled(True)
+        if isinstance(data, Exception):
+            self.status_label.setText(f"Analysis failed: {data}")
+            return
+        from src.core.analysis import format_duration
+
+        self.status_label.setText(f"{data['rows']} probes analysed")
+        servers = list(data["reliability"])
+        self.summary_table.setRowCount(len(servers))
+        for row, server in enumerate(servers):
+            stats = data["reliability"][server]
+            observed = stats["observed_seconds"]
+            availability = 1 - stats["downtime_seconds"] / observed if observed else math.nan
+            percentiles = data["latency"].get(server, {}).get("percentiles", {})
+            values = [
+                server,
+                "N/A" if math.isnan(availability) else f"{availability * 100:.3f}%",
+                str(stats["outages"]),
+                format_duration(stats["downtime_seconds"]),
+                format_duration(stats["mttr_seconds"]),
+                format_duration(stats["mtbf_seconds"]),
+            ] + [f"{percentiles[key]:.1f}" if key in percentiles else "N/A" for key in ("p50", "p95", "p99")]
+            for column, text in enumerate(values):
+                self.summary_table.setItem(row, column, QTableWidgetItem(text))
+
+        outages = sorted(data["outages"], key=lambda o: -o["duration_seconds"])[:MAX_OUTAGE_ROWS]
+        self.outage_table.setRowCount(len(outages))
+        for row, outage in enumerate(outages):
+            values = [outage["server"], outage["start"], outage["end"],
+                      format_duration(outage["duration_seconds"])]
+            for column, text in enumerate(values):
+                self.outage_table.setItem(row, column, QTableWidgetItem(text))
@@ -0,0 +1,63 @@
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer
+
+
+class UpdateCoalescer(QObject):
+    """Batches probe results between NetworkMonitor and the UI.
+
+    Results are collected as they arrive and pushed to the tray and the main
+    window at most `max_rate` times per second. The widgets themselves only
+    touch Qt when what they display actually changes, and nothing is pushed
+    to the main window while it is hidden; its pending log rows are kept
+    (capped to the log capacity) and delivered when it is shown again.
+    """
+
+    def __init__(self, monitor, max_rate=4, log_capacity=10000, parent=None):
+        super().__init__(parent)
+        self.monitor = monitor
+        self._tray_pending = []
+        self._window_pending = deque(maxlen=log_capacity)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+        self.set_rate(max_rate)
+
+    def set_rate(self, max_rate):
+        self.timer.setInterval(max(1, int(1000 / max(0.1, max_rate))))
+
+    def submit(self, result):
+        self._tray_pending.append(result)
+        if len(self._window_pending) == self._window_pending.maxlen:
+            # The oldest row will never reach the hidden window's log
+            self.monitor.metrics.increment("ui_rows_dropped")
+        self._window_pending.append(result)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        metrics = self.monitor.metrics
+        if self._tray_pending:
+            results, self._tray_pending = self._tray_pending, []
+            started = metrics.clock()
+            self.monitor.system_tray.update_status(results)
+            if started:
+                metrics.add("ui_tray", metrics.clock() - started, len(results))
+
+        # Never build the main window just to update it
+        if not self._window_pending or not self.monitor.is_main_window_built:
+            return
+        window = self.monitor.main_window
+        if window.isVisible():
+            results = list(self._window_pending)
+            self._window_pending.clear()
+            started = metrics.clock()
+            window.update_status(results)
+            if started:
+                metrics.add("ui_window", metrics.clock() - started, len(results))
+
+    def pending_rows(self):
+        return len(self._window_pending)
+
+    def clear(self):
+        self._tray_pending = []
+        self._window_pending.clear()
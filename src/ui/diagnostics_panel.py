@@ -0,0 +1,81 @@
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, QPushButton, QLabel,
+                             QTableWidget, QTableWidgetItem, QHeaderView)
+
+STAGE_COLUMNS = ["Stage", "Count", "Mean (ms)", "Max (ms)", "Total (s)"]
+
+# What each stage measures, shown as a tooltip
+STAGE_DESCRIPTIONS = {
+    "probe_batch": "Wall time of a probe round, counted per probe",
+    "scheduler_lag": "How late a probe round started after its deadline",
+    "shard_decode": "Unpacking result batches from probe worker processes, counted per result",
+    "confirmation_burst": "First failure of a target until its confirmation burst settled it",
+    "time_to_detect": "Last successful probe until the outage was confirmed",
+    "stats": "Per-target statistics and exported counters",
+    "history": "In-memory history append",
+    "log": "Handing the result to the log writer (blocks when its queue is full) and the collector agent",
+    "log_write": "Formatting and writing a batch of CSV rows, counted per row",
+    "notifications": "Connection state and quality checks",
+    "ui_tray": "Tray icon and tooltip update, counted per result",
+    "ui_window": "Main window update, counted per result",
+}
+
+
+class DiagnosticsPanel(QWidget):
+    """Self-metrics of the monitor: stage timings, queue depths and drops"""
+
+    def __init__(self, metrics, parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.cb_enabled = QCheckBox("Measure stage timings")
+        self.cb_enabled.setChecked(metrics.enabled)
+        self.cb_enabled.toggled.connect(self.set_enabled)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        controls.addWidget(self.cb_enabled)
+        controls.addStretch()
+        controls.addWidget(reset_button)
+        layout.addLayout(controls)
+
+        self.stage_table = QTableWidget(0, len(STAGE_COLUMNS))
+        self.stage_table.setHorizontalHeaderLabels(STAGE_COLUMNS)
+        self.value_table = QTableWidget(0, 2)
+        self.value_table.setHorizontalHeaderLabels(["Queue / counter", "Value"])
+        for table in (self.stage_table, self.value_table):
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+            table.verticalHeader().setVisible(False)
+            table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(QLabel("Stages:"))
+        layout.addWidget(self.stage_table)
+        layout.addWidget(QLabel("Queues and drops:"))
+        layout.addWidget(self.value_table)
+
+    def set_enabled(self, enabled):
+        self.metrics.set_enabled(enabled)
+        self.refresh()
+
+    def reset(self):
+        self.metrics.reset()
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        snapshot = self.metrics.snapshot()
+        stages = sorted(snapshot["stages"].items())
+        self.stage_table.setRowCount(len(stages))
+        for row, (name, stage) in enumerate(stages):
+            values = [name, str(stage["count"]), f"{stage['mean_ms']:.3f}", f"{stage['max_ms']:.3f}",
+                      f"{stage['total_ms'] / 1000:.2f}"]
+            for column, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                item.setToolTip(STAGE_DESCRIPTIONS.get(name, ""))
+                self.stage_table.setItem(row, column, item)
+
+        values = sorted(snapshot["gauges"].items()) + sorted(snapshot["counters"].items())
+        self.value_table.setRowCount(len(values))
+        for row, (name, value) in enumerate(values):
+            self.value_table.setItem(row, 0, QTableWidgetItem(name))
+            self.value_table.setItem(row, 1, QTableWidgetItem("N/A" if value is None else str(value)))
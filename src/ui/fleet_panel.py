@@ -0,0 +1,129 @@
+import math
+from datetime import datetime
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+                             QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView)
+from src.core.collector import FleetClient
+
+AGENT_COLUMNS = ["Agent", "Address", "Connected", "Last seen", "Results", "Targets", "Down"]
+TARGET_COLUMNS = ["Agent", "Target", "Status", "Ping (ms)", "EWMA (ms)", "Jitter (ms)", "Loss 1m", "Loss 1h",
+                  "Checks"]
+
+
+def _number(value, suffix=""):
+    return "N/A" if value is None or math.isnan(value) else f"{value:.1f}{suffix}"
+
+
+class FleetPanel(QWidget):
+    """Fleet view: the agents reporting to a collector and their targets.
+
+    Snapshots arrive on the FleetClient thread and are handed to the GUI
+    thread through a signal; the tables are only rebuilt while visible.
+    """
+
+    snapshot_ready = pyqtSignal(object)
+
+    def __init__(self, host="127.0.0.1", port=9470, parent=None):
+        super().__init__(parent)
+        self.client = None
+        self._snapshot = None
+        self.snapshot_ready.connect(self.show_snapshot)
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.host_input = QLineEdit(host)
+        self.port_input = QSpinBox()
+        self.port_input.setRange(1, 65535)
+        self.port_input.setValue(port)
+        self.connect_button = QPushButton("Connect")
+        self.connect_button.clicked.connect(self.toggle_connection)
+        controls.addWidget(QLabel("Collector:"))
+        controls.addWidget(self.host_input)
+        controls.addWidget(self.port_input)
+        controls.addStretch()
+        controls.addWidget(self.connect_button)
+        layout.addLayout(controls)
+
+        self.status_label = QLabel("Not connected")
+        layout.addWidget(self.status_label)
+
+        self.agent_table = self._table(AGENT_COLUMNS)
+        self.target_table = self._table(TARGET_COLUMNS)
+        layout.addWidget(QLabel("Agents:"))
+        layout.addWidget(self.agent_table)
+        layout.addWidget(QLabel("Targets:"))
+        layout.addWidget(self.target_table)
+
+    @staticmethod
+    def _table(columns):
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        return table
+
+    def toggle_connection(self):
+        if self.client is not None:
+            self.disconnect_collector()
+            return
+        self.client = FleetClient(self.host_input.text().strip(), self.port_input.value(), self.snapshot_ready.emit)
+        self.client.start()
+        self.connect_button.setText("Disconnect")
+        self.status_label.setText("Connecting...")
+
+    def disconnect_collector(self):
+        if self.client is not None:
+            self.client.stop()
+            self.client = None
+        self.connect_button.setText("Connect")
+        self.status_label.setText("Not connected")
+
+    def show_snapshot(self, snapshot):
+        if self.client is None:
+            return
+        if isinstance(snapshot, Exception):
+            self.status_label.setText(f"Collector unreachable ({snapshot}); retrying")
+            return
+        self._snapshot = snapshot
+        agents = snapshot["agents"]
+        connected = sum(1 for agent in agents if agent["connected"])
+        self.status_label.setText(f"{connected}/{len(agents)} agents connected, "
+                                  f"{snapshot['results']} results received")
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def refresh(self):
+        if self._snapshot is None:
+            return
+        agents = sorted(self._snapshot["agents"], key=lambda agent: agent["agent"])
+        self.agent_table.setRowCount(len(agents))
+        rows = []
+        for row, agent in enumerate(agents):
+            down = sum(1 for target in agent["targets"] if not target["connected"])
+            last_seen = datetime.fromtimestamp(agent["last_seen"]).strftime("%Y-%m-%d %H:%M:%S") \
+                if agent["last_seen"] else "N/A"
+            values = [agent["agent"], agent["address"] or "", "Yes" if agent["connected"] else "No", last_seen,
+                      str(agent["results"]), str(len(agent["targets"])), str(down)]
+            for column, text in enumerate(values):
+                self.agent_table.setItem(row, column, QTableWidgetItem(text))
+            rows.extend((agent["agent"], target) for target in sorted(agent["targets"], key=lambda t: t["target"]))
+
+        self.target_table.setRowCount(len(rows))
+        failed = QColor("#e74c3c")
+        for row, (agent, target) in enumerate(rows):
+            values = [agent, target["target"], target["status"],
+                      _number(target["ping"]) if target["connected"] else "N/A",
+                      _number(target["ewma"]), _number(target["jitter"]),
+                      _number(target["loss_1m"] * 100, "%"), _number(target["loss_1h"] * 100, "%"),
+                      str(target["checks"])]
+            for column, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                if not target["connected"]:
+                    item.setForeground(failed)
+                self.target_table.setItem(row, column, item)
@@ -0,0 +1,264 @@
+import math
+import time
+from PyQt6.QtCore import Qt, QPointF, QRect
+from PyQt6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QCheckBox, QLabel
+from src.core.history import decimate
+
+CHART_RANGES = [
+    ("1 minute", 60),
+    ("10 minutes", 600),
+    ("1 hour", 3600),
+    ("6 hours", 6 * 3600),
+    ("1 day", 86400),
+    ("1 week", 7 * 86400),
+    ("30 days", 30 * 86400),
+]
+MIN_SPAN = 30
+MAX_SPAN = 365 * 86400
+ZOOM_STEP = 1.25
+LOSS_BAR_HEIGHT = 20
+
+
+def _nice_ceiling(value):
+    """Round a positive value up to 1, 2 or 5 times a power of ten"""
+    if not value > 0:
+        return 1.0
+    magnitude = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 5, 10):
+        if value <= step * magnitude:
+            return step * magnitude
+    return 10 * magnitude
+
+
+class LatencyPlot(QWidget):
+    """Plot area: one min/max bar per pixel column plus the mean line and loss marks"""
+
+    def __init__(self, chart, parent=None):
+        super().__init__(parent)
+        self.chart = chart
+        self.setMinimumHeight(150)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self._drag_x = None
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), QColor("#ffffff"))
+        chart = self.chart
+        height = self.height() - LOSS_BAR_HEIGHT
+        if chart.y_max <= 0 or height <= 0:
+            return
+        scale = height / chart.y_max
+        first_x = max(event.rect().left() - 1, 0)
+        last_x = event.rect().right() + 1
+
+        envelope = QPen(QColor("#a9cce3"))
+        loss = QColor("#e74c3c")
+        mean_points = QPolygonF()
+        for x in range(first_x, last_x + 1):
+            column = chart.columns.get(chart.first_column + x)
+            if column is None:
+                if mean_points.size():
+                    self._draw_mean(painter, mean_points)
+                    mean_points = QPolygonF()
+                continue
+            minimum, maximum, mean, lost = column
+            if lost > 0:
+                bar = max(1, int(lost * LOSS_BAR_HEIGHT))
+                painter.fillRect(x, self.height() - bar, 1, bar, loss)
+            if mean != mean:
+                if mean_points.size():
+                    self._draw_mean(painter, mean_points)
+                    mean_points = QPolygonF()
+                continue
+            painter.setPen(envelope)
+            painter.drawLine(x, int(height - minimum * scale), x, int(height - maximum * scale))
+            mean_points.append(QPointF(x, height - mean * scale))
+        if mean_points.size():
+            self._draw_mean(painter, mean_points)
+
+    @staticmethod
+    def _draw_mean(painter, points):
+        painter.setPen(QPen(QColor("#1f618d")))
+        if points.size() == 1:
+            painter.drawPoint(points[0])
+        else:
+            painter.drawPolyline(points)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.chart.refresh(full=True)
+
+    def wheelEvent(self, event):
+        self.chart.zoom(1 / ZOOM_STEP if event.angleDelta().y() > 0 else ZOOM_STEP)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_x = event.position().x()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is None:
+            return
+        x = event.position().x()
+        pixels = int(self._drag_x - x)
+        if pixels:
+            self._drag_x -= pixels
+            self.chart.pan(pixels)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+
+
+class LatencyChart(QWidget):
+    """Latency and loss chart from the last minute up to the pyramid's retention.
+
+    The plot holds one decimated column per horizontal pixel. Columns are
+    numbered on a fixed time grid (timestamp // column width) and cached, so
+    new results only recompute the newest column and scroll the plot, and
+    panning only computes the columns that come into view. Zooming changes
+    the column width and recomputes the columns from the matching pyramid
+    level, which costs about one bucket per pixel.
+    """
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.server = None
+        self.span = CHART_RANGES[2][1]
+        self.live = True
+        self.end = None
+        self.columns = {}
+        self.column_width = None
+        self.first_column = 0
+        self.y_max = 0.0
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.target_input = QComboBox()
+        self.target_input.currentTextChanged.connect(self.set_server)
+        self.range_input = QComboBox()
+        for title, _ in CHART_RANGES:
+            self.range_input.addItem(title)
+        self.range_input.setCurrentIndex(2)
+        self.range_input.currentIndexChanged.connect(lambda i: self.set_span(CHART_RANGES[i][1]))
+        self.cb_live = QCheckBox("Live")
+        self.cb_live.setChecked(True)
+        self.cb_live.toggled.connect(self.set_live)
+        controls.addWidget(QLabel("Target:"))
+        controls.addWidget(self.target_input)
+        controls.addWidget(QLabel("Range:"))
+        controls.addWidget(self.range_input)
+        controls.addWidget(self.cb_live)
+        controls.addStretch()
+        self.scale_label = QLabel("")
+        controls.addWidget(self.scale_label)
+        layout.addLayout(controls)
+
+        self.plot = LatencyPlot(self)
+        layout.addWidget(self.plot)
+        self.range_label = QLabel("")
+        self.range_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.range_label)
+
+    def set_server(self, server):
+        self.server = server or None
+        self.refresh(full=True)
+
+    def set_span(self, span):
+        self.span = min(max(span, MIN_SPAN), MAX_SPAN)
+        self.refresh(full=True)
+
+    def set_live(self, live):
+        if live == self.live:
+            return
+        self.live = live
+        if not live:
+            self.end = time.monotonic()
+        elif self.cb_live.isChecked() != live:
+            self.cb_live.setChecked(live)
+        self.refresh()
+
+    def zoom(self, factor):
+        self.set_span(self.span * factor)
+
+    def pan(self, pixels):
+        """Move the view by a number of columns (positive = later)"""
+        if self.live:
+            self.end = time.monotonic()
+            self.cb_live.setChecked(False)
+        self.end += pixels * self.span / max(1, self.plot.width())
+        now = time.monotonic()
+        if self.end >= now:
+            self.cb_live.setChecked(True)
+            return
+        self.refresh()
+
+    def results_added(self, results):
+        """New results arrived; only the newest columns are recomputed"""
+        servers = {result.server for result in results}
+        for server in servers:
+            if self.target_input.findText(server) < 0:
+                self.target_input.addItem(server)
+        if self.live and self.server in servers:
+            self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh(full=True)
+
+    def refresh(self, full=False):
+        """Bring the column cache up to date with the view and repaint what changed"""
+        if not self.isVisible():
+            return
+        count = max(1, self.plot.width())
+        width = self.span / count
+        end = time.monotonic() if self.live else self.end
+        last = int(end // width)
+        first = last - count + 1
+        buffer = self.history.get(self.server) if self.server else None
+        pyramid = self.history.pyramid(self.server) if self.server else None
+
+        previous_first = self.first_column
+        if full or width != self.column_width or not self.columns:
+            self.columns = decimate(buffer, pyramid, first * width, (last + 1) * width, width)
+            full = True
+        else:
+            cached_first = previous_first
+            cached_last = previous_first + count - 1
+            if first < cached_first:
+                self.columns.update(decimate(buffer, pyramid, first * width,
+                                             min(cached_first, last + 1) * width, width))
+            # The newest cached column may have been partial, so redo it too
+            newest = max(first, min(cached_last, last + 1))
+            if last >= newest:
+                self.columns.update(decimate(buffer, pyramid, newest * width, (last + 1) * width, width))
+            for column in [c for c in self.columns if c < first or c > last]:
+                del self.columns[column]
+        self.column_width = width
+        self.first_column = first
+
+        maxima = [column[1] for column in self.columns.values() if column[1] == column[1]]
+        y_max = _nice_ceiling(max(maxima) * 1.1) if maxima else 0.0
+        if y_max != self.y_max:
+            self.y_max = y_max
+            full = True
+
+        self._update_labels(buffer, first * width, (last + 1) * width)
+        shift = first - previous_first
+        if full or shift < 0 or shift >= count:
+            self.plot.update()
+        else:
+            # Appending: move the existing pixels and paint only the new columns
+            if shift:
+                self.plot.scroll(-shift, 0)
+            self.plot.update(QRect(count - shift - 2, 0, shift + 2, self.plot.height()))
+
+    def _update_labels(self, buffer, start, end):
+        self.scale_label.setText(f"0 - {self.y_max:g} ms" if self.y_max else "No data")
+        if buffer is None:
+            self.range_label.setText("")
+            return
+        text = (f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(buffer.to_wall(start)))} - "
+                f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(buffer.to_wall(end)))}")
+        if self.range_label.text() != text:
+            self.range_label.setText(text)
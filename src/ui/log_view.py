@@ -0,0 +1,187 @@
+from PyQt6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel,
+                          QDateTime)
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView, QCheckBox,
+                             QLineEdit, QDateTimeEdit, QPushButton, QHeaderView,
+                             QAbstractItemView)
+
+LOG_COLUMNS = ["Time", "Server", "Ping (ms)", "Status"]
+
+
+class ConnectionLogModel(QAbstractTableModel):
+    """Table model over a fixed-capacity ring of the most recent results.
+
+    Once full, every append drops the oldest row, so memory stays flat no
+    matter how long the application runs.
+    """
+
+    def __init__(self, capacity=10000, parent=None):
+        super().__init__(parent)
+        self.capacity = max(1, capacity)
+        self._rows = [None] * self.capacity
+        self._start = 0
+        self._count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(LOG_COLUMNS)
+
+    def result_at(self, row):
+        return self._rows[(self._start + row) % self.capacity]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        result = self.result_at(index.row())
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return result.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+            if column == 1:
+                return result.server
+            if column == 2:
+                return result.ping_time if result.is_connected else "N/A"
+            return result.status
+        if role == Qt.ItemDataRole.ToolTipRole and (result.timings or result.resolve_error):
+            lines = [", ".join(f"{phase}: {value:.1f} ms" for phase, value in (result.timings or {}).items())]
+            if result.resolve_error and result.is_connected:
+                lines.append(f"Cached address used; lookup failed: {result.resolve_error}")
+            return "\n".join(line for line in lines if line)
+        if role == Qt.ItemDataRole.ForegroundRole and not result.is_connected:
+            return QColor("#e74c3c")
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return LOG_COLUMNS[section]
+        return None
+
+    def append(self, result):
+        self.append_many([result])
+
+    def append_many(self, results):
+        """Append results with one removal and one insertion notification"""
+        results = results[-self.capacity:]
+        overflow = self._count + len(results) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for i in range(overflow):
+                self._rows[(self._start + i) % self.capacity] = None
+            self._start = (self._start + overflow) % self.capacity
+            self._count -= overflow
+            self.endRemoveRows()
+        if not results:
+            return
+        self.beginInsertRows(QModelIndex(), self._count, self._count + len(results) - 1)
+        for result in results:
+            self._rows[(self._start + self._count) % self.capacity] = result
+            self._count += 1
+        self.endInsertRows()
+
+    def row_for_time(self, timestamp):
+        """First row at or after timestamp (rows are in arrival order)"""
+        wall_time = timestamp.timestamp()
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self.result_at(middle).wall_time < wall_time:
+                low = middle + 1
+            else:
+                high = middle
+        return min(low, self._count - 1)
+
+
+class ConnectionLogFilter(QSortFilterProxyModel):
+    """Optionally show only failures and/or rows whose server contains a string"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.failures_only = False
+        self.server_filter = ""
+
+    def set_failures_only(self, enabled):
+        self.failures_only = enabled
+        self.invalidateFilter()
+
+    def set_server_filter(self, text):
+        self.server_filter = text.strip()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self.failures_only and not self.server_filter:
+            return True
+        result = self.sourceModel().result_at(source_row)
+        if self.failures_only and result.is_connected:
+            return False
+        return self.server_filter in result.server
+
+
+class ConnectionLogView(QWidget):
+    """Virtualized connection log: only the visible rows are ever rendered"""
+
+    def __init__(self, capacity=10000, parent=None):
+        super().__init__(parent)
+        self.model = ConnectionLogModel(capacity, self)
+        self.proxy = ConnectionLogFilter(self)
+        self.proxy.setSourceModel(self.model)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        controls = QHBoxLayout()
+        self.cb_failures_only = QCheckBox("Failures only")
+        self.cb_failures_only.toggled.connect(self.proxy.set_failures_only)
+        self.server_input = QLineEdit()
+        self.server_input.setPlaceholderText("Filter by server")
+        self.server_input.textChanged.connect(self.proxy.set_server_filter)
+        self.time_input = QDateTimeEdit(QDateTime.currentDateTime())
+        self.time_input.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.time_input.setCalendarPopup(True)
+        jump_button = QPushButton("Go to time")
+        jump_button.clicked.connect(self.jump_to_time)
+        controls.addWidget(self.cb_failures_only)
+        controls.addWidget(self.server_input)
+        controls.addStretch()
+        controls.addWidget(self.time_input)
+        controls.addWidget(jump_button)
+        layout.addLayout(controls)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setWordWrap(False)
+        # Fixed row heights keep scrolling independent of the number of rows
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(20)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setStretchLastSection(True)
+        header.resizeSection(0, 150)
+        layout.addWidget(self.table)
+
+    def append(self, result):
+        self.append_many([result])
+
+    def append_many(self, results):
+        scrollbar = self.table.verticalScrollBar()
+        follow = scrollbar.value() == scrollbar.maximum()
+        self.model.append_many(results)
+        if follow:
+            self.table.scrollToBottom()
+
+    def jump_to_time(self):
+        if self.model.rowCount() == 0:
+            return
+        timestamp = self.time_input.dateTime().toPyDateTime()
+        source_row = self.model.row_for_time(timestamp)
+        # Under a filter, move forward to the first visible row
+        for row in range(source_row, self.model.rowCount()):
+            index = self.proxy.mapFromSource(self.model.index(row, 0))
+            if index.isValid():
+                self.table.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtTop)
+                self.table.selectRow(index.row())
+                return
@@ -1,13 +1,34 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QCheckBox, 
                            QPushButton, QGroupBox, QSpinBox, QLabel, QHBoxLayout, 
                            QDialogButtonBox, QApplication, QMainWindow, QWidget,
-                           QTextEdit, QSplitter, QSystemTrayIcon, QSystemTrayIcon)
+                           QSplitter, QSystemTrayIcon, QSystemTrayIcon,
+                           QTableWidget, QTableWidgetItem, QHeaderView, QTabWidget)
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPixmap
 from src.ui.icons import create_app_icon
+from src.core.history import HistoryStore
+from src.utils.metrics import Metrics
+from src.ui.analysis_panel import AnalysisPanel
+from src.ui.diagnostics_panel import DiagnosticsPanel
+from src.ui.fleet_panel import FleetPanel
+from src.ui.latency_chart import LatencyChart
+from src.ui.log_view import ConnectionLogView
 import json
+import math
 import os
 
+STATS_COLUMNS = [
+    ("Server", None),
+    ("EWMA (ms)", "ewma"),
+    ("Jitter (ms)", "jitter"),
+    ("p50 (ms)", "p50"),
+    ("p95 (ms)", "p95"),
+    ("p99 (ms)", "p99"),
+    ("Loss 1m", "loss_1m"),
+    ("Loss 5m", "loss_5m"),
+    ("Loss 1h", "loss_1h"),
+]
+
 class MainWindow(QMainWindow):
     def __init__(self, monitor, settings, parent=None):
         super().__init__(parent)
@@ -42,12 +63,19 @@ class MainWindow(QMainWindow):
         threshold_layout.addWidget(QLabel("Poor connection threshold (ms):"))
         self.threshold_input = QSpinBox()
         self.threshold_input.setRange(50, 1000)
+
+        loss_layout = QHBoxLayout()
+        loss_layout.addWidget(QLabel("Poor connection loss (%):"))
+        self.loss_input = QSpinBox()
+        self.loss_input.setRange(1, 100)
+        loss_layout.addWidget(self.loss_input)
         
         notif_layout.addWidget(self.cb_disconnect)
         notif_layout.addWidget(self.cb_reconnect)
         notif_layout.addWidget(self.cb_poor)
         notif_layout.addLayout(threshold_layout)
         notif_layout.addWidget(self.threshold_input)
+        notif_layout.addLayout(loss_layout)
         notif_group.setLayout(notif_layout)
         
         # Log Rotation Group
@@ -94,17 +122,47 @@ class MainWindow(QMainWindow):
         self.current_status_label = QLabel("Current Status: Unknown")
         self.current_ping_label = QLabel("Current Ping: N/A")
         
-        # Connection log
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
+        # Per-target statistics (p95/p99 over the last five minutes)
+        self.stats_table = QTableWidget(0, len(STATS_COLUMNS))
+        self.stats_table.setHorizontalHeaderLabels([title for title, _ in STATS_COLUMNS])
+        self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.stats_table.verticalHeader().setVisible(False)
+        self.stats_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+
+        # Connection log, capped to the most recent results
+        self.log_view = ConnectionLogView(self.settings.get('log_view', {}).get('capacity', 10000))
         
         status_inner_layout.addWidget(self.current_status_label)
         status_inner_layout.addWidget(self.current_ping_label)
+        status_inner_layout.addWidget(QLabel("Statistics:"))
+        status_inner_layout.addWidget(self.stats_table)
         status_inner_layout.addWidget(QLabel("Connection Log:"))
-        status_inner_layout.addWidget(self.log_text)
+        status_inner_layout.addWidget(self.log_view)
         
         status_group.setLayout(status_inner_layout)
-        status_layout.addWidget(status_group)
+
+        # Outage/SLA report over the logged history
+        log_file = self.monitor.logger.log_file if self.monitor else "network_log.csv"
+        self.analysis_panel = AnalysisPanel(log_file)
+
+        # Latency/loss chart over the in-memory history
+        self.latency_chart = LatencyChart(self.monitor.history if self.monitor else HistoryStore())
+
+        tabs = QTabWidget()
+        tabs.addTab(status_group, "Status")
+        tabs.addTab(self.latency_chart, "Graph")
+        tabs.addTab(self.analysis_panel, "Analysis")
+
+        # Timings, queue depths and drops of the monitor itself
+        self.diagnostics_panel = DiagnosticsPanel(self.monitor.metrics if self.monitor else Metrics())
+        tabs.addTab(self.diagnostics_panel, "Diagnostics")
+
+        # Agents and targets reporting to a collector
+        agent_settings = self.settings.get('agent', {})
+        self.fleet_panel = FleetPanel(agent_settings.get('collector_host', '127.0.0.1'),
+                                      agent_settings.get('collector_port', 9470))
+        tabs.addTab(self.fleet_panel, "Fleet")
+        status_layout.addWidget(tabs)
         
         # Add widgets to splitter
         splitter.addWidget(settings_widget)
@@ -119,12 +177,18 @@ class MainWindow(QMainWindow):
         # Load current settings
         self.load_settings()
 
+        # Statistics are computed on demand, so refresh them on a slow timer
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_statistics)
+        self.stats_timer.start(1000)
+
     def load_settings(self):
         notifications = self.settings.get('notifications', {})
         self.cb_disconnect.setChecked(notifications.get("notify_on_disconnect", True))
         self.cb_reconnect.setChecked(notifications.get("notify_on_reconnect", True))
         self.cb_poor.setChecked(notifications.get("notify_on_poor_connection", True))
         self.threshold_input.setValue(notifications.get("poor_connection_threshold", 200))
+        self.loss_input.setValue(notifications.get("poor_connection_loss", 5))
         
         log_settings = self.settings.get("log_rotation", {
             "enabled": False,
@@ -141,29 +205,62 @@ class MainWindow(QMainWindow):
             "notify_on_reconnect": self.cb_reconnect.isChecked(),
             "notify_on_poor_connection": self.cb_poor.isChecked(),
             "poor_connection_threshold": self.threshold_input.value(),
+            "poor_connection_loss": self.loss_input.value(),
         }
         self.settings['log_rotation'] = {
             "enabled": self.cb_enable_rotation.isChecked(),
             "max_size_mb": self.max_size_input.value(),
-            "backup_count": self.backup_count_input.value()
+            "backup_count": self.backup_count_input.value(),
+            "compress": self.settings.get('log_rotation', {}).get("compress", True)
         }
         # If you need to persist the settings, you might want to call a method on the monitor
         if self.monitor:
             self.monitor.save_settings(self.settings)
 
-    def update_status(self, result):
-        """Update the connection status display"""
+    def update_status(self, results):
+        """Update the connection status display with a batch of results"""
+        result = results[-1]
         status = result.status
         ping = result.ping_time if result.is_connected else "N/A"
-        
-        self.current_status_label.setText(f"Current Status: {status}")
-        self.current_ping_label.setText(f"Current Ping: {ping}")
-        
-        # Add to log with timestamp
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] Status: {status}, Ping: {ping}"
-        self.log_text.append(log_entry)
+
+        self._set_label(self.current_status_label, f"Current Status ({result.server}): {status}")
+        self._set_label(self.current_ping_label, f"Current Ping ({result.server}): {ping}")
+        self.log_view.append_many(results)
+        self.latency_chart.results_added(results)
+
+    @staticmethod
+    def _set_label(label, text):
+        # Skip relayout and repaint when nothing changed
+        if label.text() != text:
+            label.setText(text)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Results that arrived while hidden were held back by the coalescer
+        if self.monitor:
+            self.monitor.ui_updates.flush()
+
+    def refresh_statistics(self):
+        """Fill the statistics table from the monitor's per-target stats"""
+        if not self.isVisible() or not self.monitor:
+            return
+        self.diagnostics_panel.refresh()
+        stats = list(self.monitor.stats.items())
+        self.stats_table.setRowCount(len(stats))
+        for row, (server, target_stats) in enumerate(stats):
+            summary = target_stats.summary()
+            for column, (_, key) in enumerate(STATS_COLUMNS):
+                if key is None:
+                    text = server
+                else:
+                    value = summary[key]
+                    if math.isnan(value):
+                        text = "N/A"
+                    elif key.startswith("loss"):
+                        text = f"{value * 100:.1f}%"
+                    else:
+                        text = f"{value:.1f}"
+                self.stats_table.setItem(row, column, QTableWidgetItem(text))
 
     def closeEvent(self, event):
         """Hide window instead of closing it"""
@@ -0,0 +1,121 @@
+import time
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from PyQt6.QtWidgets import QSystemTrayIcon
+from src.core.monitor import MonitorCore, INFO, WARNING, CRITICAL
+from src.ui.coalescer import UpdateCoalescer
+from src.ui.main_window import MainWindow
+from src.ui.system_tray import SystemTray
+from src.utils.metrics import SamplingProfiler
+
+MESSAGE_ICONS = {
+    INFO: QSystemTrayIcon.MessageIcon.Information,
+    WARNING: QSystemTrayIcon.MessageIcon.Warning,
+    CRITICAL: QSystemTrayIcon.MessageIcon.Critical,
+}
+
+
+class ProbeBridge(QObject):
+    """Carries results from the probe thread, and confirmed state changes
+    from the confirmation thread, to the GUI thread"""
+    result_ready = pyqtSignal(object)
+    state_changed = pyqtSignal(str, bool, object)
+
+
+class NetworkMonitor(MonitorCore):
+    """MonitorCore with the system tray and main window attached.
+
+    The main window is only built the first time it is opened; until then
+    the application lives in the tray.
+    """
+
+    def __init__(self, progress=None):
+        progress = progress or (lambda value, message: None)
+        self.startup_started = time.monotonic()
+        self.startup_times = {}
+        progress(10, "Loading settings...")
+        super().__init__()
+        self._main_window = None
+        self.profiler = SamplingProfiler()
+        # Results emitted by the engine thread and handled on the GUI thread;
+        # the difference is the depth of the queued signal
+        self._dispatched = 0
+        self._handled = 0
+        self.metrics.gauge("result_queue", lambda: self._dispatched - self._handled)
+
+        # UI updates are batched; the coalescer only needs the widgets when it flushes
+        ui_settings = self.config.settings.get('ui', {})
+        self.ui_updates = UpdateCoalescer(
+            self,
+            ui_settings.get('max_updates_per_second', 4),
+            self.config.settings.get('log_view', {}).get('capacity', 10000)
+        )
+        self.metrics.gauge("ui_pending_rows", self.ui_updates.pending_rows)
+
+        # The tray comes before the probes: results, state changes and
+        # notifications queued by the probe threads are delivered on the next
+        # processEvents(), which the splash screen runs between steps. The
+        # main window is still only built on first open.
+        progress(40, "Creating tray icon...")
+        self.system_tray = SystemTray(self)
+        self._mark("tray_icon")
+
+        progress(70, "Starting network probes...")
+        self.initialize()
+        progress(100, "Ready")
+
+    def initialize(self):
+        # Probes run on the engine thread; results come back to the GUI
+        # thread through a queued signal.
+        self.bridge = ProbeBridge()
+        self.bridge.result_ready.connect(self.handle_result, Qt.ConnectionType.QueuedConnection)
+        self.bridge.state_changed.connect(self.handle_state_change, Qt.ConnectionType.QueuedConnection)
+        self.start()
+
+    def _mark(self, name):
+        self.startup_times.setdefault(name, time.monotonic() - self.startup_started)
+
+    @property
+    def main_window(self):
+        if self._main_window is None:
+            self._main_window = MainWindow(self, self.config.settings)
+        return self._main_window
+
+    @property
+    def is_main_window_built(self):
+        return self._main_window is not None
+
+    def dispatch_result(self, result):
+        self._dispatched += 1
+        self.bridge.result_ready.emit(result)
+
+    def handle_result(self, result):
+        """Process a probe result on the GUI thread"""
+        self._handled += 1
+        if not self.is_monitoring:
+            self.metrics.increment("results_dropped_paused")
+            return
+        if "first_result" not in self.startup_times:
+            self._mark("first_result")
+            self.startup_times["first_probe"] = self.engine.first_probe_at - self.startup_started
+        self.process_result(result)
+        self.ui_updates.submit(result)
+
+    def dispatch_state_change(self, server, down, result):
+        self.bridge.state_changed.emit(server, down, result)
+
+    def handle_state_change(self, server, down, result):
+        super().handle_state_change(server, down, result)
+        # The icon follows the confirmed state, which may change between results
+        self.system_tray.update_status([])
+
+    def notify(self, level, message):
+        self.system_tray.showMessage("Network Monitor", message, MESSAGE_ICONS[level], 3000)
+
+    def toggle_monitoring(self):
+        super().toggle_monitoring()
+        if not self.is_monitoring:
+            self.ui_updates.clear()
+
+    def save_settings(self, new_settings):
+        super().save_settings(new_settings)
+        self.ui_updates.set_rate(new_settings.get('ui', {}).get('max_updates_per_second', 4))
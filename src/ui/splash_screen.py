@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import QSplashScreen, QProgressBar
+from PyQt6.QtWidgets import QSplashScreen, QProgressBar, QApplication
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QPainter, QColor, QPixmap, QLinearGradient, QFont
 from src.ui.icons import create_app_icon
@@ -34,6 +34,14 @@ class SplashScreen(QSplashScreen):
         """)
         
         self.version = "1.0.0"
+        self.message = "Loading..."
+
+    def set_step(self, progress, message):
+        """Show the current initialization step and repaint immediately"""
+        self.message = message
+        self.progress_bar.setValue(progress)
+        self.repaint()
+        QApplication.processEvents()
         
     def drawContents(self, painter: QPainter):
         # Draw background
@@ -73,5 +81,5 @@ class SplashScreen(QSplashScreen):
         painter.drawText(
             loading_rect,
             Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
-            "Loading..."
+            self.message
         )
\ No newline at end of file
@@ -1,11 +1,15 @@
 from PyQt6.QtWidgets import QSystemTrayIcon, QMenu
 from PyQt6.QtGui import QIcon, QAction
 from src.ui.icons import create_status_icon
+from src.core.confirmation import DOWN
 
 class SystemTray(QSystemTrayIcon):
     def __init__(self, monitor):
         super().__init__()
         self.monitor = monitor
+        self.latest_results = {}
+        self._icon_state = None
+        self._tooltip = None
         self.setup_ui()
         self.setup_context_menu()
         
@@ -23,7 +27,7 @@ class SystemTray(QSystemTrayIcon):
         self.disconnected_icon = create_status_icon("disconnected")
         self.paused_icon = create_status_icon("paused")
         
-        self.setIcon(self.connected_icon)
+        self.set_icon_state("connected")
         self.setToolTip("Network Monitor\nClick to open")
         
         # Connect clicked signal to show main window
@@ -47,6 +51,11 @@ class SystemTray(QSystemTrayIcon):
         self.toggle_monitoring_action.triggered.connect(self.toggle_monitoring)
         self.menu.addAction(self.toggle_monitoring_action)
 
+        # Profiling capture for diagnosing a slow monitor
+        self.profiling_action = QAction("Start Profiling", self.menu)
+        self.profiling_action.triggered.connect(self.toggle_profiling)
+        self.menu.addAction(self.profiling_action)
+
         # Add separator
         self.menu.addSeparator()
 
@@ -70,7 +79,7 @@ class SystemTray(QSystemTrayIcon):
         # Update action text based on monitoring state
         if self.monitor.is_monitoring:
             self.toggle_monitoring_action.setText("Pause Monitoring")
-            self.setIcon(self.connected_icon)  # Reset to last known state
+            self.set_icon_state("connected")  # Reset to last known state
             self.showMessage(
                 "Network Monitor",
                 "Monitoring resumed",
@@ -79,7 +88,7 @@ class SystemTray(QSystemTrayIcon):
             )
         else:
             self.toggle_monitoring_action.setText("Resume Monitoring")
-            self.setIcon(self.paused_icon)  # Set yellow paused icon
+            self.set_icon_state("paused")  # Set yellow paused icon
             self.showMessage(
                 "Network Monitor",
                 "Monitoring paused",
@@ -87,9 +96,26 @@ class SystemTray(QSystemTrayIcon):
                 2000
             )
 
+    def toggle_profiling(self):
+        """Start or stop sampling every thread; the profile is written on stop"""
+        profiler = self.monitor.profiler
+        if not profiler.is_running:
+            profiler.start()
+            self.profiling_action.setText("Stop Profiling")
+            return
+        self.profiling_action.setText("Start Profiling")
+        try:
+            path = profiler.stop()
+        except OSError as e:
+            self.showMessage("Network Monitor", f"Could not write profile: {e}",
+                             QSystemTrayIcon.MessageIcon.Warning, 3000)
+            return
+        self.showMessage("Network Monitor", f"Profile written to {path}",
+                         QSystemTrayIcon.MessageIcon.Information, 3000)
+
     def exit_application(self):
         """Cleanly exit the application"""
-        # You might want to add cleanup code here
+        self.monitor.shutdown()
         from PyQt6.QtWidgets import QApplication
         QApplication.instance().quit()
 
@@ -97,12 +123,47 @@ class SystemTray(QSystemTrayIcon):
         if reason == QSystemTrayIcon.ActivationReason.Trigger:  # Left click
             self.show_config()
 
-    def update_status(self, result):
-        # Only update icon if monitoring is active
+    def update_status(self, results):
+        """Apply a batch of results; Qt is only called when the icon or tooltip changes"""
+        for result in results:
+            self.latest_results[result.server] = result
+        targets = self.monitor.config.get_targets()
+        current = [self.latest_results[server] for server in targets if server in self.latest_results]
+        if not current:
+            return
+        # A target counts as down once the confirmation engine declared it so,
+        # not on a single failed probe
+        confirmation = self.monitor.confirmation
+        down = [r.server for r in current if confirmation.state(r.server) == DOWN]
+
+        # Only update icon if monitoring is active; any unreachable target turns it red
         if self.monitor.is_monitoring:
-            icon = self.connected_icon if result.is_connected else self.disconnected_icon
-            self.setIcon(icon)
-        self.setToolTip(f"Network Monitor\nStatus: {result.status}\nPing: {result.ping_time}ms")
+            self.set_icon_state("disconnected" if down else "connected")
+
+        if len(current) == 1:
+            result = current[0]
+            tooltip = f"Network Monitor\nStatus: {result.status}\nPing: {result.ping_time}ms"
+        else:
+            # Tray tooltips are short on most platforms, so summarize
+            tooltip = f"Network Monitor\n{len(current) - len(down)}/{len(current)} targets connected"
+            if down:
+                tooltip += "\nDown: " + ", ".join(down[:3])
+                if len(down) > 3:
+                    tooltip += f" (+{len(down) - 3})"
+        if tooltip != self._tooltip:
+            self._tooltip = tooltip
+            self.setToolTip(tooltip)
+
+    def set_icon_state(self, state):
+        if state == self._icon_state:
+            return
+        self._icon_state = state
+        icons = {
+            "connected": self.connected_icon,
+            "disconnected": self.disconnected_icon,
+            "paused": self.paused_icon,
+        }
+        self.setIcon(icons[state])
 
     def showMessage(self, title, message, icon, duration=3000):
         """Override to ensure notifications are shown properly"""
@@ -0,0 +1,119 @@
+import threading
+import time
+from src.utils.metrics import Metrics
+
+
+class BatchWriter:
+    """Queues results and writes them in batches from a background thread.
+
+    A batch is written either once flush_rows rows are queued, every
+    flush_interval seconds, or right away when flush() is called. Callers
+    block while max_pending_rows rows are queued or being written, so a crash
+    loses at most max_pending_rows rows.
+
+    Subclasses open their output before calling __init__, which starts the
+    thread, and implement write_batch(); rotate(), write_failed() and
+    close_output() are optional.
+    """
+
+    def __init__(self, flush_rows=100, flush_interval=1.0, max_pending_rows=500, metrics=None, name="LogWriter"):
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.max_pending_rows = max(self.flush_rows, max_pending_rows)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._pending = []
+        self._in_flight = 0
+        self._closed = False
+        self._rotate_requested = False
+        self._flush_requested = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def write_batch(self, batch):
+        """Write a batch of results; returns True when the output should rotate"""
+        raise NotImplementedError
+
+    def rotate(self):
+        """Start a new output; called on the writer thread"""
+
+    def write_failed(self, error):
+        print(f"Error writing results: {error}")
+
+    def close_output(self):
+        """Release the output once the writer thread is done"""
+
+    def put(self, result):
+        with self._condition:
+            if len(self._pending) + self._in_flight >= self.max_pending_rows:
+                self.metrics.increment("log_writer_blocked")
+            while len(self._pending) + self._in_flight >= self.max_pending_rows and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return
+            self._pending.append(result)
+            if len(self._pending) >= self.flush_rows:
+                self._condition.notify_all()
+
+    def pending_rows(self):
+        """Rows queued or being written"""
+        return len(self._pending) + self._in_flight
+
+    def request_rotation(self):
+        """Rotate from the writer thread, which owns the output"""
+        with self._condition:
+            self._rotate_requested = True
+            self._condition.notify_all()
+
+    def flush(self):
+        """Block until every queued row has been written out"""
+        with self._condition:
+            # Write the queued rows now instead of at the end of the interval
+            self._flush_requested = True
+            self._condition.notify_all()
+            while (self._pending or self._in_flight) and self._thread.is_alive():
+                self._condition.wait(0.1)
+
+    def close(self):
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(2.0)
+        self.close_output()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while (not self._closed and not self._rotate_requested and not self._flush_requested
+                       and len(self._pending) < self.flush_rows):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending
+                self._pending = []
+                self._in_flight = len(batch)
+                self._flush_requested = False
+                closed = self._closed
+                rotate = self._rotate_requested
+                self._rotate_requested = False
+
+            metrics = self.metrics
+            started = metrics.clock()
+            try:
+                if batch:
+                    rotate = self.write_batch(batch) or rotate
+                    if started:
+                        metrics.add("log_write", metrics.clock() - started, len(batch))
+                if rotate:
+                    self.rotate()
+            except Exception as e:
+                self.write_failed(e)
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+            if closed:
+                return
@@ -2,21 +2,93 @@ import json
 import os
 
 class Config:
-    def __init__(self):
-        self.config_file = 'settings.json'
+    def __init__(self, config_file='settings.json'):
+        self.config_file = config_file
         self.default_settings = {
-            'server': '8.8.8.8',
+            'server': ['8.8.8.8'],
             'check_interval': 1000,
+            'max_concurrency': 16,
+            'backend': 'ping3',
+            'sharding': {
+                'workers': 0
+            },
+            'dns_cache': {
+                'enabled': True,
+                'default_ttl': 300,
+                'min_ttl': 5,
+                'max_ttl': 3600,
+                'max_stale': 86400,
+                'timeout': 2.0
+            },
+            'probes': {
+                'timeout': 2.0,
+                'http_pool_size': 2
+            },
+            'scheduler': {
+                'adaptive': True,
+                'healthy_streak': 60,
+                'max_backoff': 4,
+                'fast_interval': 250,
+                'jitter': 0.05
+            },
+            'confirmation': {
+                'enabled': True,
+                'burst_size': 3,
+                'quorum': 0.6,
+                'timeout': 300,
+                'recover_after': 2,
+                'paths': {}
+            },
             'notifications': {
                 'notify_on_disconnect': True,
                 'notify_on_reconnect': True,
                 'notify_on_poor_connection': True,
-                'poor_connection_threshold': 200
+                'poor_connection_threshold': 200,
+                'poor_connection_loss': 5
+            },
+            'ui': {
+                'max_updates_per_second': 4
+            },
+            'log_view': {
+                'capacity': 10000
+            },
+            'exporter': {
+                'enabled': False,
+                'host': '127.0.0.1',
+                'port': 9469
+            },
+            'agent': {
+                'enabled': False,
+                'name': '',
+                'collector_host': '127.0.0.1',
+                'collector_port': 9470,
+                'spool_dir': 'spool',
+                'max_spool_mb': 100
+            },
+            'diagnostics': {
+                'enabled': False
+            },
+            'history': {
+                'capacity': 86400,
+                'pyramid': True,
+                'max_memory_mb': 256,
+                'pyramid_max_targets': 100
+            },
+            'storage': {
+                'backend': 'csv',
+                'database': 'network_log.db'
+            },
+            'log_writer': {
+                'mode': 'buffered',
+                'flush_rows': 100,
+                'flush_interval': 1000,
+                'max_pending_rows': 500
             },
             'log_rotation': {
                 'enabled': False,
                 'max_size_mb': 10,
-                'backup_count': 3
+                'backup_count': 3,
+                'compress': True
             }
         }
         self.settings = self.load_settings()
@@ -33,6 +105,13 @@ class Config:
             print(f"Error loading settings: {e}")
         return self.default_settings.copy()
 
+    def get_targets(self):
+        """Return the configured servers as a list; a single host string is still accepted"""
+        servers = self.settings.get('server', [])
+        if isinstance(servers, str):
+            servers = [servers]
+        return [server for server in servers if server]
+
     def save_settings(self):
         try:
             with open(self.config_file, 'w') as f:
@@ -0,0 +1,233 @@
+import calendar
+import glob
+import gzip
+import os
+import re
+import struct
+from array import array
+
+# Sidecar index format: header followed by (timestamp key, byte offset) pairs
+INDEX_MAGIC = b"NMIX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sHHqqqq")  # magic, version, compressed, covered, first, last, count
+INDEX_SPACING = 64 * 1024       # bytes of CSV between entries of a plain segment
+GZIP_MEMBER_SIZE = 1024 * 1024  # bytes of CSV per gzip member of a compressed segment
+TIMESTAMP_LENGTH = len("YYYY-mm-dd HH:MM:SS")
+
+
+def timestamp_key(text):
+    """Sortable integer for a log timestamp ("YYYY-mm-dd HH:MM:SS").
+
+    The naive local time is counted as if it were UTC, which keeps keys in
+    the same order as the timestamps written to the log.
+    """
+    return calendar.timegm((
+        int(text[0:4]), int(text[5:7]), int(text[8:10]),
+        int(text[11:13]), int(text[14:16]), int(text[17:19]), 0, 0, 0
+    ))
+
+
+def line_key(line):
+    """Timestamp key of a raw CSV line, or None for the header and broken lines"""
+    try:
+        return timestamp_key(line[:TIMESTAMP_LENGTH].decode("ascii"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class SegmentIndex:
+    """Sparse timestamp -> byte offset index for one log segment.
+
+    For plain segments offsets point at line starts; for compressed
+    segments they point at the start of a gzip member, so a reader can seek
+    there and decompress from that point on. `covered` is the number of
+    bytes of the segment that the index has seen, which lets the index of
+    the active log be extended instead of rebuilt.
+    """
+
+    def __init__(self, compressed=False):
+        self.compressed = compressed
+        self.covered = 0
+        self.first_key = None
+        self.last_key = None
+        self.keys = array('q')
+        self.offsets = array('q')
+
+    def add(self, key, offset):
+        self.keys.append(key)
+        self.offsets.append(offset)
+
+    def seek_offset(self, key):
+        """Offset from which every row with a timestamp >= key can be read"""
+        low, high = 0, len(self.keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self.keys[middle] < key:
+                low = middle + 1
+            else:
+                high = middle
+        # Rows sharing the entry's second may sit just before it
+        return self.offsets[low - 1] if low > 0 else 0
+
+    def save(self, path):
+        header = INDEX_HEADER.pack(
+            INDEX_MAGIC, INDEX_VERSION, int(self.compressed), self.covered,
+            self.first_key if self.first_key is not None else -1,
+            self.last_key if self.last_key is not None else -1,
+            len(self.keys)
+        )
+        pairs = array('q')
+        for key, offset in zip(self.keys, self.offsets):
+            pairs.append(key)
+            pairs.append(offset)
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(header)
+            pairs.tofile(f)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index file; returns None if it is missing or unreadable"""
+        try:
+            with open(path, 'rb') as f:
+                magic, version, compressed, covered, first, last, count = INDEX_HEADER.unpack(
+                    f.read(INDEX_HEADER.size))
+                if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                    return None
+                pairs = array('q')
+                pairs.fromfile(f, count * 2)
+        except (OSError, EOFError, struct.error):
+            return None
+        index = cls(bool(compressed))
+        index.covered = covered
+        index.first_key = first if first >= 0 else None
+        index.last_key = last if last >= 0 else None
+        index.keys = pairs[0::2]
+        index.offsets = pairs[1::2]
+        return index
+
+
+def index_path(segment):
+    return f"{segment}.idx"
+
+
+def update_plain_index(segment, index=None):
+    """Build or extend the index of an uncompressed segment"""
+    size = os.path.getsize(segment)
+    if index is None or index.compressed or size < index.covered:
+        index = SegmentIndex()
+    with open(segment, 'rb') as f:
+        if index.covered and index.first_key is not None:
+            # Make sure this is still the file we indexed (the active log is
+            # replaced on rotation)
+            f.readline()
+            if line_key(f.readline()) != index.first_key:
+                index = SegmentIndex()
+        f.seek(index.covered)
+        offset = index.covered
+        last_entry = index.offsets[-1] if len(index.offsets) else -INDEX_SPACING
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Partially written row; index it next time
+            key = line_key(line)
+            if key is not None:
+                if index.first_key is None:
+                    index.first_key = key
+                index.last_key = key
+                if offset - last_entry >= INDEX_SPACING:
+                    index.add(key, offset)
+                    last_entry = offset
+            offset += len(line)
+        index.covered = offset
+    return index
+
+
+def compress_segment(source, target):
+    """Gzip a rotated segment as independent ~1 MB members and write its index.
+
+    Multi-member gzip files are still ordinary .gz files, but a reader can
+    start decompressing at any member boundary recorded in the index.
+    """
+    index = SegmentIndex(compressed=True)
+    with open(source, 'rb') as src, open(f"{target}.tmp", 'wb') as dst:
+        chunk = []
+        chunk_size = 0
+        chunk_key = None
+
+        def write_member():
+            index.add(chunk_key if chunk_key is not None else index.last_key or 0, dst.tell())
+            dst.write(gzip.compress(b"".join(chunk)))
+
+        for line in src:
+            key = line_key(line)
+            if key is not None:
+                if index.first_key is None:
+                    index.first_key = key
+                index.last_key = key
+                if chunk_key is None:
+                    chunk_key = key
+            chunk.append(line)
+            chunk_size += len(line)
+            if chunk_size >= GZIP_MEMBER_SIZE:
+                write_member()
+                chunk, chunk_size, chunk_key = [], 0, None
+        if chunk:
+            write_member()
+        index.covered = dst.tell()
+    os.replace(f"{target}.tmp", target)
+    index.save(index_path(target))
+    return index
+
+
+def build_compressed_index(segment):
+    """Index a .gz segment that was written without one (one entry at offset 0)"""
+    index = SegmentIndex(compressed=True)
+    with gzip.open(segment, 'rb') as f:
+        for line in f:
+            key = line_key(line)
+            if key is not None:
+                if index.first_key is None:
+                    index.first_key = key
+                index.last_key = key
+    if index.first_key is not None:
+        index.add(index.first_key, 0)
+    index.covered = os.path.getsize(segment)
+    return index
+
+
+def load_index(segment):
+    """Return an up-to-date index for a segment, building or extending it as needed"""
+    path = index_path(segment)
+    index = SegmentIndex.load(path)
+    compressed = segment.endswith(".gz")
+    if compressed:
+        if index is None or index.covered != os.path.getsize(segment):
+            index = build_compressed_index(segment)
+            index.save(path)
+        return index
+    covered = index.covered if index is not None else -1
+    index = update_plain_index(segment, index)
+    if index.covered != covered:
+        try:
+            index.save(path)
+        except OSError:
+            pass  # Read-only directory: the index still serves this query
+    return index
+
+
+def list_segments(log_file):
+    """All segments of a log, oldest first: .N(.gz) ... .1(.gz), in-flight rotations, active log"""
+    numbered = []
+    pattern = re.compile(re.escape(log_file) + r"\.(\d+)(\.gz)?$")
+    for path in glob.glob(f"{glob.escape(log_file)}.*"):
+        match = pattern.match(path)
+        if match:
+            numbered.append((int(match.group(1)), path))
+    segments = [path for _, path in sorted(numbered, reverse=True)]
+
+    rotating = [path for path in glob.glob(f"{glob.escape(log_file)}.rotating-*")
+                if not path.endswith((".idx", ".tmp"))]
+    segments.extend(sorted(rotating, key=lambda path: [int(part) for part in re.findall(r"\d+", path[len(log_file):])]))
+    if os.path.exists(log_file):
+        segments.append(log_file)
+    return segments
@@ -1,67 +1,227 @@
 import csv
+import glob
+import io
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from src.utils.batch_writer import BatchWriter
+from src.utils.log_index import compress_segment, index_path
+from src.utils.metrics import Metrics
+from src.utils.sqlite_store import SqliteLogWriter
+
+class BufferedLogWriter(BatchWriter):
+    """Appends queued results to the CSV log through one persistent file
+    handle; see BatchWriter for batching and backpressure."""
+
+    def __init__(self, logger, flush_rows=100, flush_interval=1.0, max_pending_rows=500):
+        self.logger = logger
+        self._last_second = None
+        self._last_stamp = ""
+        self._file = open(self.logger.log_file, 'a', newline='')
+        super().__init__(flush_rows, flush_interval, max_pending_rows, logger.metrics, "LogWriter")
+
+    def _format_timestamp(self, wall_time):
+        # Results arrive many per second; format each second only once
+        second = int(wall_time)
+        if second != self._last_second:
+            self._last_second = second
+            self._last_stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        return self._last_stamp
+
+    def write_batch(self, batch):
+        text = self.logger.encode_rows(
+            self.logger.format_row(result, self._format_timestamp(result.wall_time))
+            for result in batch
+        )
+        self._file.write(text)
+        self._file.flush()
+        return self.logger.record_written(text)
+
+    def rotate(self):
+        self._file.close()
+        try:
+            self.logger.perform_rotation()
+        finally:
+            self._file = open(self.logger.log_file, 'a', newline='')
+
+    def write_failed(self, error):
+        self.logger.log_error(f"Error logging results: {error}")
+
+    def close_output(self):
+        self._file.close()
+
 
 class Logger:
-    def __init__(self):
+    def __init__(self, settings=None, metrics=None):
         self.log_file = "network_log.csv"
-        self.initialize_log()
+        self.settings = settings if settings is not None else {}
+        self.metrics = metrics if metrics is not None else Metrics()
+        storage = self.settings.get('storage', {})
+        self.backend = storage.get('backend', 'csv')
+        if self.backend != 'sqlite':
+            self.initialize_log()
+        # Track the size ourselves so writes never have to stat the file
+        self.bytes_written = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+        self._rotation_lock = threading.Lock()
+        self._rotation_serial = 0
+        # Rotated segments are shifted and compressed one at a time, off the
+        # writing thread
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="LogCompressor")
+        for pending in sorted(glob.glob(f"{glob.escape(self.log_file)}.rotating-*[0-9]")):
+            # Left over from a previous run that exited mid-compression
+            self._compressor.submit(self._finish_rotation, pending)
+
+        self.writer = None
+        options = self.settings.get('log_writer', {})
+        if self.backend == 'sqlite':
+            # Rows always go through the writer thread, one transaction per batch
+            self.writer = SqliteLogWriter(
+                storage.get('database', 'network_log.db'),
+                flush_rows=options.get('flush_rows', 100),
+                flush_interval=options.get('flush_interval', 1000) / 1000.0,
+                max_pending_rows=options.get('max_pending_rows', 500),
+                metrics=self.metrics,
+                on_error=self.log_error
+            )
+            self.metrics.gauge("log_writer_pending", self.writer.pending_rows)
+        elif options.get('mode', 'buffered') == 'buffered':
+            self.writer = BufferedLogWriter(
+                self,
+                flush_rows=options.get('flush_rows', 100),
+                flush_interval=options.get('flush_interval', 1000) / 1000.0,
+                max_pending_rows=options.get('max_pending_rows', 500)
+            )
+            self.metrics.gauge("log_writer_pending", self.writer.pending_rows)
     
     def initialize_log(self):
         if not os.path.exists(self.log_file):
             with open(self.log_file, 'w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(["Timestamp", "Server", "Ping (ms)", "Status"])
+                file.write(self.encode_rows([["Timestamp", "Server", "Ping (ms)", "Status"]]))
+
+    @staticmethod
+    def format_row(result, timestamp):
+        return [
+            timestamp,
+            result.server,
+            result.ping_time if result.is_connected else "N/A",
+            result.status
+        ]
+
+    @staticmethod
+    def encode_rows(rows):
+        """Render rows as CSV text"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
 
     def log_result(self, result):
         """Log a ping result to the CSV file"""
+        if self.writer is not None:
+            self.writer.put(result)
+            return
         try:
+            text = self.encode_rows([self.format_row(result, result.timestamp.strftime("%Y-%m-%d %H:%M:%S"))])
             with open(self.log_file, 'a', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow([
-                    result.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                    result.server,
-                    result.ping_time if result.is_connected else "N/A",
-                    result.status
-                ])
+                file.write(text)
+            if self.record_written(text):
+                self.perform_rotation()
         except Exception as e:
             self.log_error(f"Error logging result: {e}")
 
-    def rotate_logs(self, settings):
+    def flush(self):
+        """Write out any buffered results"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        """Flush buffered results, finish pending compression and release the log file"""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self._compressor.shutdown(wait=True)
+
+    def _rotation_settings(self, settings=None):
+        settings = settings if settings is not None else self.settings
+        return settings.get("log_rotation", {
+            "enabled": False,
+            "max_size_mb": 10,
+            "backup_count": 3
+        })
+
+    def record_written(self, text):
+        """Account for text appended to the log; returns True when the log should rotate"""
+        self.bytes_written += len(text.encode())
+        log_settings = self._rotation_settings()
+        return (log_settings.get("enabled", False)
+                and self.bytes_written >= log_settings.get("max_size_mb", 10) * 1024 * 1024)
+
+    def rotate_logs(self, settings=None):
         """Rotate log file if it gets too large"""
+        if self.backend == 'sqlite':
+            return
         try:
-            log_settings = settings.get("log_rotation", {
-                "enabled": False,
-                "max_size_mb": 10,
-                "backup_count": 3
-            })
-            
+            log_settings = self._rotation_settings(settings)
             if not log_settings["enabled"]:
                 return
-            
+            if self.bytes_written >= log_settings["max_size_mb"] * 1024 * 1024:
+                if self.writer is not None:
+                    # The writer owns the file handle
+                    self.writer.request_rotation()
+                else:
+                    self.perform_rotation()
+        except Exception as e:
+            self.log_error(f"Error rotating logs: {e}")
+
+    def perform_rotation(self):
+        """Move the active log aside and start a new one.
+
+        Only a rename happens here; shifting older segments and gzip
+        compression run on the compressor thread.
+        """
+        with self._rotation_lock:
             if not os.path.exists(self.log_file):
                 return
-            
-            current_size = os.path.getsize(self.log_file) / (1024 * 1024)
-            
-            if current_size > log_settings["max_size_mb"]:
-                self._perform_rotation(log_settings["backup_count"])
-            
+            self._rotation_serial += 1
+            pending = f"{self.log_file}.rotating-{os.getpid()}-{self._rotation_serial}"
+            os.rename(self.log_file, pending)
+            self.initialize_log()
+            self.bytes_written = os.path.getsize(self.log_file)
+        self._compressor.submit(self._finish_rotation, pending)
+
+    def _finish_rotation(self, pending):
+        try:
+            log_settings = self._rotation_settings()
+            self._perform_rotation(log_settings.get("backup_count", 3))
+            if log_settings.get("compress", True):
+                # Written as seekable gzip members with a sidecar index so
+                # time range queries do not have to decompress everything
+                compress_segment(pending, f"{self.log_file}.1.gz")
+                os.remove(pending)
+            else:
+                os.replace(pending, f"{self.log_file}.1")
+            if os.path.exists(index_path(pending)):
+                os.remove(index_path(pending))
         except Exception as e:
-            self.log_error(f"Error rotating logs: {e}")
+            self.log_error(f"Error compressing rotated log: {e}")
 
     def _perform_rotation(self, backup_count):
-        """Helper method to perform the actual log rotation"""
-        for i in range(backup_count - 1, 0, -1):
-            old_file = f"{self.log_file}.{i}"
-            new_file = f"{self.log_file}.{i + 1}"
-            if os.path.exists(old_file):
-                os.rename(old_file, new_file)
-        
-        if os.path.exists(self.log_file):
-            os.rename(self.log_file, f"{self.log_file}.1")
-        
-        self.initialize_log()
+        """Shift rotated segments (.1, .2, ... compressed or not) and their indexes up by one, dropping the oldest"""
+        for i in range(backup_count, 0, -1):
+            for suffix in (".gz", "", ".gz.idx", ".idx"):
+                old_file = f"{self.log_file}.{i}{suffix}"
+                if not os.path.exists(old_file):
+                    continue
+                if i >= backup_count:
+                    os.remove(old_file)
+                else:
+                    os.replace(old_file, f"{self.log_file}.{i + 1}{suffix}")
+
+    def log_event(self, level, message):
+        """Log a connection event such as a disconnect"""
+        event_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{event_time}] {level.capitalize()}: {message}", flush=True)
 
     def log_error(self, message):
         """Log error messages"""
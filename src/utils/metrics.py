@@ -0,0 +1,144 @@
+import collections
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+
+class StageTimer:
+    """Count, total and maximum duration of one pipeline stage"""
+    __slots__ = ("count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, duration_ns, count=1):
+        self.count += count
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+
+class Metrics:
+    """Self-metrics of the monitoring pipeline.
+
+    Hot paths read `clock` around the code they time and call add() only
+    when the start time is non-zero. While disabled, `clock` is the builtin
+    int(), which returns 0, so an instrumented stage costs a couple of
+    trivial calls and records nothing. Counters (dropped results and the
+    like) are cheap and always kept; gauges are callables evaluated only
+    when a snapshot is taken.
+    """
+
+    def __init__(self, enabled=False):
+        self.stages = {}
+        self.counters = collections.Counter()
+        self.gauges = {}
+        self.started = time.monotonic()
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+        self.clock = time.perf_counter_ns if self.enabled else int
+
+    def add(self, stage, duration_ns, count=1):
+        timer = self.stages.get(stage)
+        if timer is None:
+            timer = self.stages.setdefault(stage, StageTimer())
+        timer.add(duration_ns, count)
+
+    def increment(self, counter, amount=1):
+        self.counters[counter] += amount
+
+    def gauge(self, name, function):
+        """Register a callable reporting a current value, such as a queue depth"""
+        self.gauges[name] = function
+
+    def reset(self):
+        self.stages = {}
+        self.counters = collections.Counter()
+        self.started = time.monotonic()
+
+    def snapshot(self):
+        """Plain dict of every stage, counter and gauge"""
+        stages = {}
+        for name, timer in list(self.stages.items()):
+            stages[name] = {
+                "count": timer.count,
+                "mean_ms": timer.total_ns / timer.count / 1e6 if timer.count else 0.0,
+                "max_ms": timer.max_ns / 1e6,
+                "total_ms": timer.total_ns / 1e6,
+            }
+        gauges = {}
+        for name, function in list(self.gauges.items()):
+            try:
+                gauges[name] = function()
+            except Exception:
+                gauges[name] = None
+        return {
+            "enabled": self.enabled,
+            "uptime": time.monotonic() - self.started,
+            "stages": stages,
+            "counters": dict(self.counters),
+            "gauges": gauges,
+        }
+
+
+class SamplingProfiler:
+    """Samples the stacks of every thread at a fixed interval.
+
+    Unlike cProfile, which only sees the thread that enabled it, this also
+    covers the probe engine and log writer threads, and its cost does not
+    depend on how many function calls the monitor makes. Stop writes the
+    samples as collapsed stacks ("thread;outer;...;inner count" per line),
+    the input format of flame graph tools.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.samples.clear()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def stop(self, directory="."):
+        """Stop sampling and write the profile; returns its path"""
+        if self._thread is None:
+            return None
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        path = os.path.join(directory, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt")
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
@@ -0,0 +1,312 @@
+"""SQLite storage for probe results, with incrementally maintained rollups.
+
+    targets    (id, name)
+    results    (time, target, ping, code, detail)   one row per probe
+    rollup_1m  (target, bucket, count, lost, errors, ping_sum, ping_min, ping_max)
+    rollup_1h  same, per hour
+
+Times are integer epoch milliseconds in results and epoch seconds (UTC
+aligned) in the rollup buckets; code is the StatusCode value, ping is NULL
+for failed probes and detail holds the status text of errors only. Every
+batch updates the rollups in the same transaction as its rows, so a
+month-long per-hour query reads a few thousand rollup rows.
+
+The database runs in WAL mode, so readers (queries, the importer's
+progress checks) never block the writer thread.
+
+    python -m src.utils.sqlite_store import network_log.csv --database network_log.db
+    python -m src.utils.sqlite_store summary --database network_log.db --bucket 3600
+"""
+import argparse
+import csv
+import gzip
+import math
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime
+from src.utils.batch_writer import BatchWriter
+from src.utils.log_index import list_segments
+
+# StatusCode values, kept here so utils does not import core
+CONNECTED, CONNECTION_LOST, ERROR = 0, 1, 2
+STATUS_TEXT = {CONNECTED: "Connected", CONNECTION_LOST: "Connection Lost"}
+ROLLUPS = {"rollup_1m": 60, "rollup_1h": 3600}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS targets (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS results (
+    time INTEGER NOT NULL,
+    target INTEGER NOT NULL REFERENCES targets(id),
+    ping REAL,
+    code INTEGER NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS results_target_time ON results (target, time);
+CREATE INDEX IF NOT EXISTS results_time ON results (time);
+CREATE TABLE IF NOT EXISTS import_marks (target INTEGER PRIMARY KEY, time INTEGER NOT NULL);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    target INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    lost INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    ping_sum REAL NOT NULL,
+    ping_min REAL,
+    ping_max REAL,
+    PRIMARY KEY (target, bucket)
+) WITHOUT ROWID;
+""" for table in ROLLUPS)
+
+# NULL-safe min/max: a bucket without answered probes has no extremes
+UPSERT = """
+INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (target, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    lost = lost + excluded.lost,
+    errors = errors + excluded.errors,
+    ping_sum = ping_sum + excluded.ping_sum,
+    ping_min = coalesce(min(ping_min, excluded.ping_min), ping_min, excluded.ping_min),
+    ping_max = coalesce(max(ping_max, excluded.ping_max), ping_max, excluded.ping_max)
+"""
+
+StoredResult = namedtuple("StoredResult", ["timestamp", "server", "ping_time", "code", "status"])
+
+
+def _epoch(value):
+    """Epoch seconds of a bound: a local datetime or "YYYY-mm-dd HH:MM:SS" string, epoch seconds or None"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    return value.timestamp()
+
+
+class SqliteStore:
+    """A results database: schema, batched inserts with rollups, and queries"""
+
+    def __init__(self, database="network_log.db"):
+        self.database = database
+        self.connection = sqlite3.connect(database, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # WAL makes NORMAL durable against application crashes; only an OS
+        # crash can lose the last transactions
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._target_ids = dict((name, id) for id, name in self.connection.execute("SELECT id, name FROM targets"))
+        self._target_names = {id: name for name, id in self._target_ids.items()}
+
+    def close(self):
+        self.connection.close()
+
+    def target_id(self, name):
+        target = self._target_ids.get(name)
+        if target is None:
+            self.connection.execute("INSERT OR IGNORE INTO targets (name) VALUES (?)", (name,))
+            (target,) = self.connection.execute("SELECT id FROM targets WHERE name = ?", (name,)).fetchone()
+            self._target_ids[name] = target
+            self._target_names[target] = name
+        return target
+
+    def insert(self, rows, import_marks=False):
+        """Insert (epoch ms, server, ping or None, code, detail or None) rows and
+        update the rollups, all in one transaction. With import_marks, the
+        per-target high-water marks of imported rows move along in the same
+        transaction."""
+        records = []
+        rollups = {table: {} for table in ROLLUPS}
+        for milliseconds, server, ping, code, detail in rows:
+            target = self.target_id(server)
+            records.append((milliseconds, target, ping, code, detail))
+            seconds = milliseconds // 1000
+            for table, width in ROLLUPS.items():
+                key = (target, seconds - seconds % width)
+                bucket = rollups[table].get(key)
+                if bucket is None:
+                    bucket = rollups[table][key] = [0, 0, 0, 0.0, None, None]
+                bucket[0] += 1
+                if ping is None:
+                    bucket[1] += 1
+                    if code == ERROR:
+                        bucket[2] += 1
+                    continue
+                bucket[3] += ping
+                if bucket[4] is None or ping < bucket[4]:
+                    bucket[4] = ping
+                if bucket[5] is None or ping > bucket[5]:
+                    bucket[5] = ping
+        with self.connection:
+            self.connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?)", records)
+            for table, buckets in rollups.items():
+                self.connection.executemany(UPSERT.format(table=table),
+                                            [key + tuple(values) for key, values in buckets.items()])
+            if import_marks:
+                newest = {}
+                for milliseconds, target, _, _, _ in records:
+                    if milliseconds > newest.get(target, -1):
+                        newest[target] = milliseconds
+                self.connection.executemany(
+                    "INSERT INTO import_marks VALUES (?, ?) "
+                    "ON CONFLICT (target) DO UPDATE SET time = max(time, excluded.time)", newest.items())
+        return len(records)
+
+    def rows(self, start=None, end=None, server=None):
+        """Yield StoredResults with start <= time < end, in time order"""
+        query = "SELECT time, target, ping, code, detail FROM results WHERE time >= ? AND time < ?"
+        parameters = [int((_epoch(start) or 0) * 1000), int(_epoch(end) * 1000) if end is not None else 2 ** 62]
+        if server is not None:
+            query += " AND target = ?"
+            parameters.append(self._target_ids.get(server, -1))
+        names = self._target_names
+        for milliseconds, target, ping, code, detail in self.connection.execute(query + " ORDER BY time", parameters):
+            yield StoredResult(datetime.fromtimestamp(milliseconds / 1000), names[target],
+                               math.nan if ping is None else ping, code, detail or STATUS_TEXT.get(code, "Error"))
+
+    def aggregate(self, start=None, end=None, bucket_seconds=3600, server=None):
+        """Yield per-bucket, per-server summaries like LogQuery.aggregate
+        (without percentiles). Whole minutes or hours are answered from the
+        rollups; anything finer is computed from the results."""
+        table = next((table for table, width in sorted(ROLLUPS.items(), key=lambda item: -item[1])
+                      if bucket_seconds % width == 0), None)
+        start_s = int(_epoch(start) or 0)
+        end_s = int(_epoch(end)) if end is not None else 2 ** 40
+        if table is not None:
+            query = (f"SELECT bucket - bucket % ?1 AS b, target, sum(count), sum(lost), sum(ping_sum), min(ping_min), "
+                     f"max(ping_max) FROM {table} WHERE bucket >= ?2 AND bucket < ?3")
+        else:
+            query = ("SELECT time / 1000 - time / 1000 % ?1 AS b, target, count(*), sum(ping IS NULL), "
+                     "total(ping), min(ping), max(ping) FROM results WHERE time >= ?2 * 1000 AND time < ?3 * 1000")
+        parameters = [bucket_seconds, start_s, end_s]
+        if server is not None:
+            query += " AND target = ?4"
+            parameters.append(self._target_ids.get(server, -1))
+        query += " GROUP BY b, target ORDER BY b, target"
+        names = self._target_names
+        for bucket, target, count, lost, ping_sum, minimum, maximum in self.connection.execute(query, parameters):
+            answered = count - lost
+            yield {
+                "bucket": datetime.fromtimestamp(bucket),
+                "server": names[target],
+                "count": count,
+                "lost": lost,
+                "loss": lost / count if count else math.nan,
+                "min": minimum if answered else math.nan,
+                "avg": ping_sum / answered if answered else math.nan,
+                "max": maximum if answered else math.nan,
+            }
+
+    def import_csv(self, log_file, batch_rows=50000):
+        """Import a CSV log and its rotated segments. Returns the number of rows added.
+
+        Rows are skipped when their target already has imported rows at or
+        after their timestamp, so importing again after the log grew or was
+        rotated only adds the new rows. Rows logged in the same second as the
+        newest row of the previous import are skipped too; CSV timestamps
+        cannot tell them apart from rows already imported.
+        """
+        marks = {}
+        for target, milliseconds in self.connection.execute("SELECT target, time FROM import_marks"):
+            marks[self._target_names[target]] = milliseconds
+        imported = 0
+        for segment in list_segments(log_file):
+            batch = []
+            last_stamp = None
+            last_ms = 0
+            opener = gzip.open if segment.endswith(".gz") else open
+            with opener(segment, "rt", newline="") as f:
+                reader = csv.reader(f)
+                for fields in reader:
+                    if len(fields) < 4 or fields[0] == "Timestamp":
+                        continue
+                    stamp, server, ping, status = fields[0], fields[1], fields[2], fields[3]
+                    if stamp != last_stamp:
+                        try:
+                            last_ms = int(datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+                        except ValueError:
+                            continue
+                        last_stamp = stamp
+                    if last_ms <= marks.get(server, -1):
+                        continue
+                    if status == "Connected":
+                        try:
+                            batch.append((last_ms, server, float(ping), CONNECTED, None))
+                        except ValueError:
+                            continue
+                    elif status.startswith("Error"):
+                        batch.append((last_ms, server, None, ERROR, status))
+                    else:
+                        batch.append((last_ms, server, None, CONNECTION_LOST, None))
+                    if len(batch) >= batch_rows:
+                        imported += self.insert(batch, import_marks=True)
+                        batch = []
+            if batch:
+                imported += self.insert(batch, import_marks=True)
+        return imported
+
+
+class SqliteLogWriter(BatchWriter):
+    """Inserts queued results into a SqliteStore, one transaction per batch;
+    see BatchWriter for batching and backpressure. The database is not
+    rotated."""
+
+    def __init__(self, database, flush_rows=100, flush_interval=1.0, max_pending_rows=500, metrics=None,
+                 on_error=print):
+        self.database = database
+        self.on_error = on_error
+        # Opened here so a bad path fails at startup, used only by the writer thread
+        self.store = SqliteStore(database)
+        super().__init__(flush_rows, flush_interval, max_pending_rows, metrics, "SqliteWriter")
+
+    def request_rotation(self):
+        pass
+
+    @staticmethod
+    def _row(result):
+        code = result.code
+        return (int(result.wall_time * 1000), result.server, result.latency if code == CONNECTED else None,
+                int(code), result.status if code == ERROR else None)
+
+    def write_batch(self, batch):
+        self.store.insert([self._row(result) for result in batch])
+        return False
+
+    def write_failed(self, error):
+        self.on_error(f"Error writing results to {self.database}: {error}")
+
+    def close_output(self):
+        self.store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Network Monitor SQLite storage")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="import a CSV log and its rotated segments")
+    importer.add_argument("log", nargs="?", default="network_log.csv")
+    importer.add_argument("--database", default="network_log.db")
+    summary = commands.add_parser("summary", help="print per-bucket loss and latency")
+    summary.add_argument("--database", default="network_log.db")
+    summary.add_argument("--start", help="YYYY-mm-dd HH:MM:SS (local time)")
+    summary.add_argument("--end", help="YYYY-mm-dd HH:MM:SS (local time)")
+    summary.add_argument("--bucket", type=int, default=3600, help="bucket width in seconds")
+    summary.add_argument("--server")
+    args = parser.parse_args(argv)
+
+    store = SqliteStore(args.database)
+    try:
+        if args.command == "import":
+            started = time.perf_counter()
+            rows = store.import_csv(args.log)
+            print(f"Imported {rows} rows into {args.database} in {time.perf_counter() - started:.1f}s")
+            return 0
+        for row in store.aggregate(args.start, args.end, args.bucket, args.server):
+            print(f"{row['bucket']:%Y-%m-%d %H:%M}  {row['server']}  probes {row['count']}  "
+                  f"loss {row['loss'] * 100:.2f}%  min/avg/max {row['min']:.1f}/{row['avg']:.1f}/{row['max']:.1f} ms")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+import socket
+import time
+
+from bench_collector import free_port
+
+from src.core.collector import (ACK, BATCH_ID, HELLO, SPOOL_SUFFIX, Collector, CollectorAgent, FleetStore,
+                                batch_id, recv_frame, send_frame)
+from src.core.network import PingResult
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def submit(agent, prefix, count):
+    """One result per target, so every target must end up with exactly one"""
+    for i in range(count):
+        agent.submit(PingResult.connected(f"{prefix}-{i}.test", float(i % 50)))
+
+
+def assert_delivered_once(store, name, prefixes, count):
+    stats = store.agents[name].stats
+    expected = {f"{prefix}-{i}.test" for prefix in prefixes for i in range(count)}
+    assert set(stats) == expected
+    assert all(target.total_checks == 1 for target in stats.values())
+    assert store.results == len(expected)
+
+
+def test_agent_spools_while_the_collector_is_down(tmp_path):
+    port = free_port()
+    spool = tmp_path / "spool"
+    agent = CollectorAgent("127.0.0.1", port, "agent", str(spool), flush_interval=0.05)
+    agent.start()
+    submit(agent, "spooled", 200)
+    assert wait_until(lambda: list(spool.glob(f"*{SPOOL_SUFFIX}")))
+    agent.stop(timeout=0.2)
+    assert not agent.connected
+
+    store = FleetStore()
+    collector = Collector(store, port=port)
+    collector.start()
+    try:
+        # A new run sends what the previous one left in the spool
+        agent = CollectorAgent("127.0.0.1", port, "agent", str(spool), flush_interval=0.05)
+        agent.start()
+        agent.stop(timeout=10.0)
+    finally:
+        collector.stop()
+    assert_delivered_once(store, "agent", ["spooled"], 200)
+    assert not list(spool.glob(f"*{SPOOL_SUFFIX}"))
+
+
+def test_each_result_is_delivered_once_across_a_collector_restart(tmp_path):
+    port = free_port()
+    store = FleetStore()
+    collector = Collector(store, port=port)
+    collector.start()
+    agent = CollectorAgent("127.0.0.1", port, "agent", str(tmp_path / "spool"), flush_interval=0.05)
+    agent.start()
+    try:
+        submit(agent, "before", 150)
+        assert wait_until(lambda: store.results == 150)
+        collector.stop()
+
+        submit(agent, "during", 150)
+        time.sleep(0.3)
+        collector = Collector(store, port=port)
+        collector.start()
+        submit(agent, "after", 150)
+        agent.stop(timeout=15.0)
+    finally:
+        collector.stop()
+    assert_delivered_once(store, "agent", ["before", "during", "after"], 150)
+
+
+def test_acks_retire_only_the_batch_they_name(tmp_path):
+    port = free_port()
+    spool = tmp_path / "spool"
+    agent = CollectorAgent("127.0.0.1", port, "agent", str(spool), flush_interval=0.05)
+    agent.start()
+    submit(agent, "first", 10)
+    assert wait_until(lambda: len(list(spool.glob(f"*{SPOOL_SUFFIX}"))) == 1)
+    submit(agent, "second", 10)
+    assert wait_until(lambda: len(list(spool.glob(f"*{SPOOL_SUFFIX}"))) == 2)
+    agent.stop(timeout=0.2)
+    first, second = sorted(spool.glob(f"*{SPOOL_SUFFIX}"))
+    first_id, second_id = batch_id(first.read_bytes()), batch_id(second.read_bytes())
+
+    # A collector that answers with a stale ACK, then out of order
+    with socket.create_server(("127.0.0.1", port)) as server:
+        agent = CollectorAgent("127.0.0.1", port, "agent", str(spool), flush_interval=0.05)
+        agent.start()
+        try:
+            connection, _ = server.accept()
+            with connection:
+                assert recv_frame(connection)[0] == HELLO
+                sent = [batch_id(recv_frame(connection)[1]) for _ in range(2)]
+                assert sent == [first_id, second_id]
+
+                send_frame(connection, ACK, BATCH_ID.pack(first_id[0], first_id[1] + 100))
+                time.sleep(0.3)
+                assert first.exists() and second.exists()
+
+                send_frame(connection, ACK, BATCH_ID.pack(*second_id))
+                assert wait_until(lambda: not second.exists())
+                assert first.exists()
+
+                send_frame(connection, ACK, BATCH_ID.pack(*first_id))
+                assert wait_until(lambda: not first.exists())
+                assert agent.metrics.counters["agent_stale_acks"] == 1
+        finally:
+            agent.stop(timeout=0.2)
@@ -0,0 +1,88 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.core.confirmation import DOWN, UP, ConfirmationEngine
+from src.core.network import PingResult
+from src.core.stats import TargetStats
+
+DELAY = 0.5
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answers every request after DELAY seconds, like a distant server"""
+
+    def do_GET(self):
+        time.sleep(DELAY)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_target():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def settings(timeout=300):
+    return {"confirmation": {"burst_size": 3, "quorum": 0.6, "timeout": timeout}, "probes": {"timeout": 2.0}}
+
+
+def test_burst_timeout_follows_the_recent_latency():
+    stats = {"fast": TargetStats(), "slow": TargetStats()}
+    for _ in range(20):
+        stats["fast"].update(PingResult.connected("fast", 5.0))
+        stats["slow"].update(PingResult.connected("slow", 400.0))
+    engine = ConfirmationEngine(settings(), lambda *args: None, stats=stats)
+    assert engine.burst_timeout("fast") == 0.3
+    assert 1.5 < engine.burst_timeout("slow") <= 2.0
+    assert engine.burst_timeout("unknown") == 2.0
+
+
+def test_a_slow_target_is_not_declared_down_by_a_single_loss(slow_target):
+    stats = {slow_target: TargetStats()}
+    for _ in range(20):
+        stats[slow_target].update(PingResult.connected(slow_target, DELAY * 1000))
+    changes = []
+    engine = ConfirmationEngine(settings(), lambda server, down, result: changes.append(down), stats=stats)
+    try:
+        engine.observe(PingResult.connected(slow_target, DELAY * 1000))
+        engine.observe(PingResult.lost(slow_target))
+        assert wait_until(lambda: engine.metrics.counters["confirmations_refuted"]
+                          + engine.metrics.counters["confirmations_down"] > 0)
+        assert engine.state(slow_target) == UP
+        assert changes == []
+    finally:
+        engine.stop()
+
+
+def test_a_dead_target_is_still_declared_down():
+    dead = "tcp://127.0.0.1:1"
+    engine = ConfirmationEngine(settings(), lambda *args: None)
+    try:
+        engine.observe(PingResult.connected(dead, 1.0))
+        engine.observe(PingResult.lost(dead))
+        assert wait_until(lambda: engine.state(dead) == DOWN)
+    finally:
+        engine.stop()
@@ -0,0 +1,132 @@
+import asyncio
+import socket
+
+import pytest
+from bench_probes import StandInServers
+
+from src.core.network import NetworkChecker, PingResult, StatusCode
+from src.core.probes import DnsProbe, HttpProbe, PluginChecker, ProbePlugin, TcpProbe
+
+TIMEOUT = 0.5
+
+
+@pytest.fixture(scope="module")
+def servers():
+    servers = StandInServers()
+    yield servers
+    servers.close()
+
+
+@pytest.fixture
+def checker():
+    checker = PluginChecker(NetworkChecker(), [TcpProbe(TIMEOUT), DnsProbe(TIMEOUT), HttpProbe(TIMEOUT)], TIMEOUT)
+    yield checker
+    checker.close()
+
+
+@pytest.fixture
+def silent_ports():
+    """A TCP port that accepts connections and a UDP port, neither of which ever answers"""
+    tcp = socket.socket()
+    tcp.bind(("127.0.0.1", 0))
+    tcp.listen(8)
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp.bind(("127.0.0.1", 0))
+    yield tcp.getsockname()[1], udp.getsockname()[1]
+    tcp.close()
+    udp.close()
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_successful_probes(servers, checker):
+    targets = [f"tcp://127.0.0.1:{servers.tcp_port}",
+               f"dns://127.0.0.1:{servers.dns_port}/host.test",
+               f"http://127.0.0.1:{servers.http_port}/health"]
+    results = checker.check_many(targets)
+    for target, result in zip(targets, results):
+        assert result.is_connected, (target, result.status)
+        assert result.server == target
+        assert result.ping_time >= 0
+    assert "connect" in results[0].timings
+    assert "first_byte" in results[2].timings
+
+
+def test_http_request_reaches_the_server(servers, checker):
+    requests = servers.http_requests
+    assert checker.check(f"http://127.0.0.1:{servers.http_port}/café?q=a b").is_connected
+    assert servers.http_requests == requests + 1
+
+
+def test_refused_connection_is_an_error(checker):
+    result = checker.check(f"tcp://127.0.0.1:{closed_port()}")
+    assert result.code == StatusCode.ERROR
+    assert result.status.startswith("Error: ")
+
+
+def test_error_responses(servers, checker):
+    http, dns = checker.check_many([f"http://127.0.0.1:{servers.http_port}/missing",
+                                    f"dns://127.0.0.1:{servers.dns_port}/missing.test"])
+    assert http.code == StatusCode.ERROR and http.status == "Error: HTTP 404"
+    assert dns.code == StatusCode.ERROR and "NXDOMAIN" in dns.status
+
+
+def test_timeouts_are_lost(checker, silent_ports):
+    tcp_port, udp_port = silent_ports
+    http, dns = checker.check_many([f"http://127.0.0.1:{tcp_port}/", f"dns://127.0.0.1:{udp_port}/host.test"])
+    for result in (http, dns):
+        assert result.code == StatusCode.CONNECTION_LOST, result.status
+        assert result.status == "Connection Lost"
+
+
+class CountingProbe(ProbePlugin):
+    """Tracks how many probes are in flight at once"""
+    schemes = ("fake",)
+
+    def __init__(self):
+        super().__init__()
+        self.active = self.peak = 0
+
+    async def probe(self, target):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        return PingResult.connected(target, 1.0)
+
+
+class RecordingChecker(NetworkChecker):
+    def __init__(self):
+        super().__init__()
+        self.limits = []
+
+    def check_many(self, servers, max_concurrency=16):
+        self.limits.append(max_concurrency)
+        return [PingResult.connected(server, 1.0) for server in servers]
+
+
+@pytest.mark.parametrize("limit", [1, 4, 10])
+def test_plugins_and_base_share_one_concurrency_limit(limit):
+    plugin = CountingProbe()
+    base = RecordingChecker()
+    checker = PluginChecker(base, [plugin], TIMEOUT)
+    try:
+        targets = [f"fake://target-{i}" for i in range(12)] + [f"192.0.2.{i}" for i in range(1, 5)]
+        results = checker.check_many(targets, limit)
+    finally:
+        checker.close()
+    assert [result.server for result in results] == targets
+    if limit == 1:
+        assert plugin.peak == 1 and base.limits == [1]
+    else:
+        assert plugin.peak + base.limits[0] <= limit
+
+
+def test_system_resolver_rejects_other_record_types(checker):
+    result = checker.check("dns:///localhost?type=MX")
+    assert result.code == StatusCode.ERROR
+    assert "A and AAAA" in result.status
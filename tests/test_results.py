@@ -0,0 +1,48 @@
+import math
+import pickle
+import time
+
+from bench_results import bytes_per_result, compact_result, legacy_result, outcomes
+
+from src.core.network import PingResult, StatusCode
+
+
+def test_compact_result_uses_fewer_bytes_than_the_legacy_dataclass():
+    plan = outcomes(20000, 100, loss=0.02, error_rate=0.01)
+    legacy = bytes_per_result(legacy_result, plan)
+    compact = bytes_per_result(compact_result, plan)
+    assert compact < legacy * 0.75, (compact, legacy)
+
+
+def test_result_has_no_instance_dict():
+    result = PingResult.connected("192.0.2.1", 12.5)
+    assert not hasattr(result, "__dict__")
+    assert result.detail is None
+
+
+def test_derived_fields():
+    connected = PingResult.connected("192.0.2.1", 12.5)
+    lost = PingResult.lost("192.0.2.1")
+    error = PingResult.error("192.0.2.1", "Network is unreachable")
+    assert (connected.server, connected.ping_time, connected.is_connected, connected.status) == \
+        ("192.0.2.1", 12.5, True, "Connected")
+    assert math.isnan(lost.ping_time) and not lost.is_connected and lost.status == "Connection Lost"
+    assert error.code == StatusCode.ERROR and error.status == "Error: Network is unreachable"
+
+
+def test_pickle_keeps_the_wall_clock_time():
+    result = PingResult.error("192.0.2.1", "timed out")
+    copy = pickle.loads(pickle.dumps(result))
+    assert (copy.server, copy.code, copy.status) == (result.server, result.code, result.status)
+    assert abs(copy.wall_time - result.wall_time) < 1e-3
+
+
+def test_wall_time_follows_a_step_of_the_wall_clock(monkeypatch):
+    before = PingResult.connected("192.0.2.1", 12.5)
+    real_time_ns = time.time_ns
+    # Like a resume from suspend or an NTP step: the monotonic clock does not move
+    monkeypatch.setattr(time, "time_ns", lambda: real_time_ns() + 3600 * 10 ** 9)
+    after = PingResult.connected("192.0.2.1", 12.5)
+    assert abs(after.wall_time - before.wall_time - 3600) < 1.0
+    assert abs(before.wall_time - real_time_ns() / 1e9) < 1.0
+    assert abs(PingResult.from_wall("192.0.2.1", 1.0, 0, None, after.wall_time).wall_time - after.wall_time) < 1e-3